@@ -1,18 +1,34 @@
 # app_dejeuner.py
 
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
 from datetime import date
 
+from dejeuner import archives, metrics, timing, warmup
+from dejeuner.catalog import load_catalog_snapshot
+from dejeuner.consensus import (
+    agreger,
+    bulletins_top3,
+    bulletins_utilites,
+    get_consensus_board,
+    matrice_preferences,
+)
+from dejeuner.lazy import lazy_import
+from dejeuner.memo import memo_stats, memoize
+from dejeuner.scoring import ScoringEngine, get_engine, score_global, utilites_equipe
+from dejeuner.similarity import get_similarites
+from dejeuner.storage import get_storage
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
 # ==============================
 # Constantes et chemins
 # ==============================
 
-DATA_DIR = "data"
-USERS_PATH = os.path.join(DATA_DIR, "users.csv")
-TOPS_PATH = os.path.join(DATA_DIR, "tops.csv")
+DATA_DIR = "data"  # users.csv, tops/ (un CSV par jour) ou dejeuner.sqlite3
 RESTAURANTS_PATH = "Restaurants.xlsx"
 ADMIN_USER_ID = "admin admin"
 
@@ -21,128 +37,123 @@ ADMIN_USER_ID = "admin admin"
 # Utils fichiers & données
 # ==============================
 
-def ensure_data_dir():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+def storage():
+    return get_storage(DATA_DIR)
+
+
+def consensus():
+    return get_consensus_board(storage(), exclure=(ADMIN_USER_ID,))
 
 
+@timing.timed("chargement.restaurants")
 def charger_restaurants(path: str = RESTAURANTS_PATH) -> pd.DataFrame:
     """Charge la base de restaurants."""
     if not os.path.exists(path):
         st.error(f"Fichier {path} introuvable. Place-le dans le même dossier que app_dejeuner.py.")
         st.stop()
-    df = pd.read_excel(path)
+    return lire_catalogue(path)
+
+
+def lire_catalogue(path: str = RESTAURANTS_PATH) -> pd.DataFrame:
+    """Catalogue (copie), registre des ids resynchronisé seulement si le fichier a changé."""
+    version, df = load_catalog_snapshot(path)
+    storage().sync_restaurants(df, version=version)
     return df
 
 
 def load_users() -> pd.DataFrame:
-    ensure_data_dir()
-    if not os.path.exists(USERS_PATH):
-        cols = ["user_id", "prenom", "nom", "password", "description"]
-        return pd.DataFrame(columns=cols)
-    return pd.read_csv(USERS_PATH, dtype=str)
+    return storage().load_users()
 
 
 def save_users(df: pd.DataFrame):
-    ensure_data_dir()
-    df.to_csv(USERS_PATH, index=False, encoding="utf-8")
-
-
-def load_tops() -> pd.DataFrame:
-    ensure_data_dir()
-    if not os.path.exists(TOPS_PATH):
-        cols = [
-            "date",
-            "user_id",
-            "prenom",
-            "nom",
-            "Restau_1",
-            "Restau_2",
-            "Restau_3",
-            "Score_1",
-            "Score_2",
-            "Score_3",
-        ]
-        return pd.DataFrame(columns=cols)
-    return pd.read_csv(TOPS_PATH, dtype=str)
+    storage().save_users(df)
 
 
-def save_tops(df: pd.DataFrame):
-    ensure_data_dir()
-    df.to_csv(TOPS_PATH, index=False, encoding="utf-8")
+def description_de(user_id: str):
+    """Description d'un utilisateur (lecture indexée, sans charger tout l'annuaire)."""
+    user = storage().get_user(user_id)
+    return user.get("description") if user else None
 
 
-# ==============================
-# Utils scoring restos
-# ==============================
+@timing.timed("chargement.tops")
+def load_tops(day: str = None) -> pd.DataFrame:
+    """Tops d'un jour (`day`) ou de tout l'historique si `day` est None."""
+    return storage().load_tops(day)
+
 
-def construire_score_directionnel(serie, slider_val, low_is_best=False):
+def tops_du_jour(day: str) -> pd.DataFrame:
     """
-    Transforme une série de 1 à 10 en un score aligné avec la préférence de l'utilisateur.
+    Tops d'un jour sans l'admin, partagés par toutes les sessions tant que
+    les tops ne changent pas (ne pas modifier le DataFrame renvoyé).
+    """
+    def calcul():
+        tops_df = load_tops(day)
+        return tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
 
-    slider_val va de 0 à 10 :
-      - 5 = pas de préférence -> renvoie None (pas utilisé)
-      - >5 = préfère 'haut' (10)
-      - <5 = préfère 'bas' (1)
+    return memoize(("tops_du_jour", DATA_DIR, day), storage().version("tops"), calcul)
 
-    low_is_best = False pour :
-        - Chaleur : 1 = froid, 10 = chaud
-        - Healthy : 1 = pas healthy, 10 = healthy
-        - Sandwich : 1 = bol, 10 = sandwich
-    """
-    if slider_val == 5:
-        return None
 
-    if slider_val > 5:
-        # On préfère les valeurs hautes
-        if low_is_best:
-            score = 11 - serie
-        else:
-            score = serie
-    else:
-        # slider < 5 -> on préfère les valeurs basses
-        if low_is_best:
-            score = serie
-        else:
-            score = 11 - serie
+def version_du_jour(day: str, *autres):
+    """Version des vues dérivées des tops d'un jour (+ autres versions éventuelles)."""
+    return (DATA_DIR, day, storage().version("tops")) + autres
 
-    score = score.clip(lower=1, upper=10)
-    return score
 
+def classement_du_jour(day: str) -> pd.DataFrame:
+    """Classement de consensus 3/2/1 du jour (vue partagée)."""
+    return memoize(("consensus", day), version_du_jour(day), lambda: consensus().classement(day))
 
-def calculer_score_global(df, coeffs, scores_dyn):
-    """
-    df : DataFrame filtré
-    coeffs : dict nom_critère -> coefficient (float)
-    scores_dyn : dict nom_critère -> série de scores (alignée sur df)
-    """
-    contributions = []
-    poids = []
-
-    for name, coeff in coeffs.items():
-        if coeff is None or coeff <= 0:
-            continue
-        score_serie = scores_dyn.get(name)
-        if score_serie is None:
-            continue
-        contributions.append(coeff * score_serie)
-        poids.append(coeff)
-
-    if len(contributions) == 0:
+
+def heatmap_du_jour(day: str, tops_today: pd.DataFrame):
+    """Heatmap des préférences du jour (vue partagée)."""
+    return memoize(("heatmap", day), version_du_jour(day), lambda: heatmap_preferences(tops_today))
+
+
+def utilites_du_jour(day: str, engine: ScoringEngine, tops_today: pd.DataFrame) -> pd.DataFrame:
+    """Utilités Personne × Restaurant du jour (vue partagée)."""
+    return memoize(
+        ("utilites", day),
+        version_du_jour(day, engine.version),
+        lambda: utilites_equipe(engine, tops_today),
+    )
+
+
+def save_tops(df: pd.DataFrame):
+    """Réécrit tout l'historique : réservé aux opérations globales."""
+    storage().save_tops(df)
+    consensus().invalidate()
+
+
+@timing.timed("ecriture.top")
+def save_top_du_jour(row: dict):
+    """Enregistre (ou remplace) le top d'un utilisateur pour le jour de `row`."""
+    storage().upsert_top(row)
+    consensus().record(row)
+    metrics.incr("dejeuner_tops_saved_total")
+
+
+def delete_user_data(user_id: str):
+    """Supprime un compte et tous ses tops."""
+    storage().delete_user(user_id)
+    storage().delete_user_tops(user_id)
+    consensus().invalidate()
+
+
+# ==============================
+# Utils scoring restos
+# ==============================
+
+@timing.timed("calcul.scoring")
+def calculer_score_global(df, engine, coeffs, sliders, masque):
+    """Classement du profil courant (voir dejeuner.scoring.score_global), erreurs affichées."""
+    try:
+        df, moyenne_simple = score_global(df, engine, coeffs, sliders, masque)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    if moyenne_simple:
         # Aucun critère -> moyenne simple des scores de base
-        base_cols = ["Score_Distance", "Score_Prix", "Score_Quantite", "Score_Gourmandise"]
-        existantes = [c for c in base_cols if c in df.columns]
-        if not existantes:
-            st.error("Impossible de calculer un score global : aucune colonne de score trouvée.")
-            st.stop()
-        df["Score_Global"] = df[existantes].mean(axis=1)
-        df["Score_Global"] = df["Score_Global"].round(2)
         st.info("Aucun critère sélectionné : classement basé sur la moyenne des scores de base.")
-        return df
-
-    total_poids = sum(poids)
-    score_global = sum(contributions) / total_poids
-    df["Score_Global"] = score_global.round(2)
     return df
 
 
@@ -150,7 +161,8 @@ def calculer_score_global(df, coeffs, scores_dyn):
 # Utils similarité entre personnes
 # ==============================
 
-def calculer_similarites(tops_df: pd.DataFrame, current_user_id: str):
+@timing.timed("calcul.similarite")
+def calculer_similarites(tops_df: pd.DataFrame, current_user_id: str, metrique: str = "rang"):
     """
     tops_df : dataframe filtré sur la date du jour (sans admin).
     Retourne une liste de dicts :
@@ -159,51 +171,37 @@ def calculer_similarites(tops_df: pd.DataFrame, current_user_id: str):
     if tops_df.empty:
         return []
 
-    users_df = load_users()
-
-    # Top de l'utilisateur courant
-    my_rows = tops_df[tops_df["user_id"] == current_user_id]
-    if my_rows.empty:
+    version = version_du_jour(date.today().isoformat())
+    voisins = get_similarites(tops_df, metrique, version=version).voisins(current_user_id)
+    if not voisins:
         return []
 
-    my_row = my_rows.iloc[0]
-    my_top = [my_row["Restau_1"], my_row["Restau_2"], my_row["Restau_3"]]
-    my_pos = {r: i + 1 for i, r in enumerate(my_top) if isinstance(r, str)}
-
-    similitudes = []
-    others = tops_df[tops_df["user_id"] != current_user_id]
-
-    for _, row in others.iterrows():
-        other_top = [row["Restau_1"], row["Restau_2"], row["Restau_3"]]
-        other_pos = {r: i + 1 for i, r in enumerate(other_top) if isinstance(r, str)}
-
-        communs = set(my_pos.keys()) & set(other_pos.keys())
-        if not communs:
-            continue
-
-        # scoring : (4 - rang_moi) + (4 - rang_autre) par resto commun
-        score_sim = 0
-        for resto in communs:
-            score_sim += (4 - my_pos[resto]) + (4 - other_pos[resto])
-
-        u = users_df[users_df["user_id"] == row["user_id"]]
-        desc = ""
-        if not u.empty:
-            desc = u.iloc[0].get("description", "")
-
-        similitudes.append(
-            {
-                "user_id": row["user_id"],
-                "prenom": row["prenom"],
-                "nom": row["nom"],
-                "description": desc,
-                "score_sim": score_sim,
-                "restos_communs": ", ".join(communs),
-            }
-        )
+    for v in voisins:
+        v["description"] = description_de(v["user_id"]) or ""
+    return voisins
+
 
-    similitudes.sort(key=lambda x: x["score_sim"], reverse=True)
-    return similitudes
+# ==============================
+# Vues d'équipe
+# ==============================
+
+@timing.timed("calcul.heatmap")
+def heatmap_preferences(tops_today: pd.DataFrame):
+    """Matrice Personne × Restaurant des poids 3/2/1 (None si aucun top exploitable)."""
+    return matrice_preferences(tops_today)
+
+
+def degrade_heatmap(heat: pd.DataFrame) -> pd.DataFrame:
+    """Couleurs de fond CSS proportionnelles aux poids (sans matplotlib, que
+    `Styler.background_gradient` importerait)."""
+    valeurs = heat.to_numpy(dtype=float)
+    maximum = np.nanmax(valeurs) if valeurs.size else 0
+    alpha = np.nan_to_num(valeurs / maximum) if maximum > 0 else np.zeros_like(valeurs)
+    return pd.DataFrame(
+        [[f"background-color: rgba(220, 38, 38, {a:.2f})" for a in ligne] for ligne in alpha],
+        index=heat.index,
+        columns=heat.columns,
+    )
 
 
 # ==============================
@@ -247,27 +245,30 @@ def login_block():
                 st.session_state["user_id"] = ADMIN_USER_ID
                 st.session_state["prenom"] = "admin"
                 st.session_state["nom"] = "admin"
+                metrics.incr("dejeuner_logins_total", app="dejeuner", result="ok")
                 st.sidebar.success("Connecté en tant qu'admin.")
             else:
+                metrics.incr("dejeuner_logins_total", app="dejeuner", result="echec")
                 st.sidebar.error("Mot de passe admin incorrect.")
             return
 
         # Cas utilisateur normal
-        users_df = load_users()
         user_id = f"{prenom.strip()} {nom.strip()}"
-        existing = users_df[users_df["user_id"] == user_id]
+        existing = storage().get_user(user_id)
 
-        if not existing.empty:
+        if existing is not None:
             # Utilisateur existe -> on vérifie le mot de passe
-            stored_pwd = existing.iloc[0]["password"]
+            stored_pwd = existing["password"]
             if password == stored_pwd:
                 st.session_state["logged_in"] = True
                 st.session_state["is_admin"] = False
                 st.session_state["user_id"] = user_id
                 st.session_state["prenom"] = prenom.strip()
                 st.session_state["nom"] = nom.strip()
+                metrics.incr("dejeuner_logins_total", app="dejeuner", result="ok")
                 st.sidebar.success(f"Re-bonjour {prenom} !")
             else:
+                metrics.incr("dejeuner_logins_total", app="dejeuner", result="echec")
                 st.sidebar.error("Mot de passe incorrect.")
         else:
             # Nouveau compte
@@ -278,14 +279,14 @@ def login_block():
                 "password": password,
                 "description": description.strip() if description else "",
             }
-            users_df = pd.concat([users_df, pd.DataFrame([new_row])], ignore_index=True)
-            save_users(users_df)
+            storage().add_user(new_row)
 
             st.session_state["logged_in"] = True
             st.session_state["is_admin"] = False
             st.session_state["user_id"] = user_id
             st.session_state["prenom"] = prenom.strip()
             st.session_state["nom"] = nom.strip()
+            metrics.incr("dejeuner_logins_total", app="dejeuner", result="inscription")
             st.sidebar.success(f"Bienvenue {prenom}, ton compte a été créé !")
 
     if st.session_state["logged_in"]:
@@ -314,13 +315,7 @@ def delete_account_block():
             st.warning("Aucun compte utilisateur standard connecté.")
             return
 
-        users_df = load_users()
-        users_df = users_df[users_df["user_id"] != user_id]
-        save_users(users_df)
-
-        tops_df = load_tops()
-        tops_df = tops_df[tops_df["user_id"] != user_id]
-        save_tops(tops_df)
+        delete_user_data(user_id)
 
         st.session_state["logged_in"] = False
         st.session_state["is_admin"] = False
@@ -336,6 +331,69 @@ def delete_account_block():
 # Admin panel
 # ==============================
 
+def performance_panel():
+    """Temps par étape des reruns de ce processus (voir dejeuner.timing)."""
+    st.subheader("⏱️ Performances (ce processus)")
+    lignes = timing.rapport()
+    if not lignes:
+        st.info("Aucune mesure pour l'instant.")
+    else:
+        st.dataframe(pd.DataFrame(lignes), use_container_width=True, hide_index=True)
+    stats = memo_stats()
+    st.caption(f"Cache des vues : {stats['hits']} lectures / {stats['misses']} calculs ({stats['entries']} entrées)")
+    st.caption(warmup.resume("dejeuner"))
+    if st.button("🔄 Remettre les mesures à zéro"):
+        timing.reset()
+        st.rerun()
+
+
+def archives_panel():
+    """Archivage des jours anciens de tops et swipes (voir dejeuner.archives)."""
+    st.subheader("🗄️ Archivage de l'historique")
+    jours = st.number_input(
+        "Jours gardés dans les fichiers du jour", min_value=1, value=archives.RETENTION_DAYS, step=1
+    )
+    avant = archives.cutoff(int(jours))
+    a_archiver = sum(len(d) for d in storage().compact(avant, dry_run=True).values())
+    st.caption(f"{a_archiver} partition(s) antérieure(s) au {avant} à archiver.")
+    if st.button("🗄️ Archiver", disabled=a_archiver == 0):
+        faits = storage().compact(avant)
+        st.success(" · ".join(f"{table} : {len(d)} jour(s) archivé(s)" for table, d in faits.items()))
+
+
+def renommages_panel(tops_df: pd.DataFrame):
+    """
+    Rattache l'historique d'un restaurant renommé dans Restaurants.xlsx à son
+    nouveau nom (sans colonne `ID` dans le catalogue, voir dejeuner.restaurants).
+    """
+    st.subheader("🏷️ Restaurants renommés")
+    if not os.path.exists(RESTAURANTS_PATH):
+        st.info(f"Fichier {RESTAURANTS_PATH} introuvable.")
+        return
+    catalogue = charger_restaurants()["Restaurant"].dropna().astype(str).tolist()
+    swipes = storage().load_swipes()
+    historique = set(swipes["restaurant"].dropna()) if not swipes.empty else set()
+    for col in ["Restau_1", "Restau_2", "Restau_3"]:
+        if col in tops_df.columns:
+            historique |= set(tops_df[col].dropna())
+    orphelins = sorted(n for n in historique if isinstance(n, str) and n.strip() and n not in set(catalogue))
+    if not orphelins:
+        st.caption("Tous les restaurants de l'historique sont dans le catalogue.")
+        return
+    st.caption(f"{len(orphelins)} nom(s) de l'historique absent(s) du catalogue (restaurant renommé ou retiré).")
+    col_ancien, col_nouveau = st.columns(2)
+    with col_ancien:
+        ancien = st.selectbox("Ancien nom (historique)", orphelins)
+    with col_nouveau:
+        nouveau = st.selectbox("Nouveau nom (catalogue)", sorted(catalogue))
+    if st.button("🏷️ Renommer dans tout l'historique"):
+        storage().rename_restaurant(ancien, nouveau)
+        consensus().invalidate()
+        st.success(f"« {ancien} » renommé en « {nouveau} » dans les tops et les swipes.")
+        st.rerun()
+
+
+@timing.timed("rendu.admin")
 def admin_panel():
     st.title("🔑 Espace admin – gestion des comptes")
 
@@ -366,20 +424,26 @@ def admin_panel():
         selected_user = st.selectbox("Choisir un utilisateur à supprimer", user_ids)
 
         if st.button("❌ Supprimer cet utilisateur et toutes ses réponses"):
-            users_df = users_df[users_df["user_id"] != selected_user]
-            save_users(users_df)
-
-            tops_df = tops_df[tops_df["user_id"] != selected_user]
-            save_tops(tops_df)
+            delete_user_data(selected_user)
 
             st.success(f"Utilisateur '{selected_user}' et ses réponses ont été supprimés.")
             st.rerun()
 
+    st.markdown("---")
+    renommages_panel(tops_df)
+
+    st.markdown("---")
+    archives_panel()
+
+    st.markdown("---")
+    performance_panel()
+
 
 # ==============================
 # App utilisateur (non-admin)
 # ==============================
 
+@timing.timed("rendu.perso")
 def user_personal_tab(df, user_id):
     """Onglet 'Mon dej idéal' : critères, top 3, top 10, similarités, suppression compte."""
     st.header("1️⃣ Tes priorités (importance de chaque critère)")
@@ -400,12 +464,10 @@ def user_personal_tab(df, user_id):
 
     # 🔁 On récupère les préférences du jour si elles existent déjà
     today_str = date.today().isoformat()
-    tops_df = load_tops()
+    tops_df = tops_du_jour(today_str)
     pref_row = None
-    if not tops_df.empty and "user_id" in tops_df.columns and "date" in tops_df.columns:
-        # éviter l'admin au cas où
-        tops_df = tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
-        mask = (tops_df["user_id"] == user_id) & (tops_df["date"] == today_str)
+    if not tops_df.empty and "user_id" in tops_df.columns:
+        mask = tops_df["user_id"] == user_id
         if mask.any():
             pref_row = tops_df[mask].iloc[0]
 
@@ -527,16 +589,18 @@ def user_personal_tab(df, user_id):
         help="Si tu choisis 'Oui', on ne garde que les restaurants marqués comme conventionnels."
     )
 
-    df_filtre = df.copy()
+    # Le moteur (matrice de critères) est partagé tant que le catalogue ne change pas
+    engine = get_engine(RESTAURANTS_PATH)
+    if len(engine) != len(df):
+        engine = ScoringEngine(df)
 
-    if conv_choice == "Oui, conventionnel uniquement":
-        if "Filtre_Convention" in df_filtre.columns:
-            df_filtre = df_filtre[df_filtre["Filtre_Convention"] == 1]
-        else:
-            st.warning("Colonne 'Filtre_Convention' absente, impossible d'appliquer ce filtre.")
+    conventionnel = conv_choice == "Oui, conventionnel uniquement"
+    if conventionnel and "Filtre_Convention" not in df.columns:
+        st.warning("Colonne 'Filtre_Convention' absente, impossible d'appliquer ce filtre.")
 
-    if "Filtre_Type" in df_filtre.columns:
-        types_dispos = sorted(df_filtre["Filtre_Type"].dropna().unique().tolist())
+    no_go = []
+    if "Filtre_Type" in df.columns:
+        types_dispos = sorted(df.loc[engine.masque(conventionnel), "Filtre_Type"].dropna().unique().tolist())
         no_go = st.multiselect(
             "Y a-t-il des **no-go** ? (types de resto à exclure)",
             options=types_dispos,
@@ -545,60 +609,30 @@ def user_personal_tab(df, user_id):
         if no_go:
             no_go_str = ", ".join([f"<span style='color:red'>{t}</span>" for t in no_go])
             st.markdown(f"No-go sélectionnés : {no_go_str}", unsafe_allow_html=True)
-            df_filtre = df_filtre[~df_filtre["Filtre_Type"].isin(no_go)]
     else:
         st.warning("Colonne 'Filtre_Type' absente, impossible de gérer les no-go.")
 
-    if df_filtre.empty:
+    masque = engine.masque(conventionnel, no_go)
+    if not masque.any():
         st.error("Aucun restaurant ne correspond à ces filtres (conventionnel / no-go). Allège un peu les contraintes 😉")
         st.stop()
 
     # 4️⃣ Calcul des scores
     st.header("4️⃣ Résultat")
 
-    max_coeff_base = max(distance_coeff, prix_coeff, quantite_coeff, gourmandise_coeff)
-    filtre_coeff_base = max_coeff_base if max_coeff_base > 0 else 1
-
-    scores_dyn = {
-        "distance": df_filtre["Score_Distance"] if "Score_Distance" in df_filtre.columns else None,
-        "prix": df_filtre["Score_Prix"] if "Score_Prix" in df_filtre.columns else None,
-        "quantite": df_filtre["Score_Quantite"] if "Score_Quantite" in df_filtre.columns else None,
-        "gourmandise": df_filtre["Score_Gourmandise"] if "Score_Gourmandise" in df_filtre.columns else None,
-        "chaleur": None,
-        "healthy": None,
-        "sandwich": None,
-    }
-
     coeffs = {
         "distance": distance_coeff,
         "prix": prix_coeff,
         "quantite": quantite_coeff,
         "gourmandise": gourmandise_coeff,
-        "chaleur": None,
-        "healthy": None,
-        "sandwich": None,
+    }
+    sliders = {
+        "chaleur": chaleur_slider,
+        "healthy": healthy_slider,
+        "sandwich": sandwich_slider,
     }
 
-    if "Filtre_Chaleur" in df_filtre.columns:
-        sc = construire_score_directionnel(df_filtre["Filtre_Chaleur"], chaleur_slider, low_is_best=False)
-        scores_dyn["chaleur"] = sc
-        if sc is not None:
-            coeffs["chaleur"] = filtre_coeff_base
-
-    if "Filtre_Healthy" in df_filtre.columns:
-        sc = construire_score_directionnel(df_filtre["Filtre_Healthy"], healthy_slider, low_is_best=False)
-        scores_dyn["healthy"] = sc
-        if sc is not None:
-            coeffs["healthy"] = filtre_coeff_base
-
-    if "Filtre_Sandwich" in df_filtre.columns:
-        sc = construire_score_directionnel(df_filtre["Filtre_Sandwich"], sandwich_slider, low_is_best=False)
-        scores_dyn["sandwich"] = sc
-        if sc is not None:
-            coeffs["sandwich"] = filtre_coeff_base
-
-    df_scored = df_filtre.copy()
-    df_scored = calculer_score_global(df_scored, coeffs, scores_dyn)
+    df_scored = calculer_score_global(df, engine, coeffs, sliders, masque)
     df_scored = df_scored.sort_values("Score_Global", ascending=False)
 
     top3 = df_scored.head(3)
@@ -662,13 +696,6 @@ def user_personal_tab(df, user_id):
 
     if not top3.empty:
         if st.button("💾 Enregistrer mon top 3 pour aujourd'hui"):
-            tops_df = load_tops()
-
-            tops_df = tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
-
-            mask = ~((tops_df["user_id"] == user_id) & (tops_df["date"] == today_str))
-            tops_df = tops_df[mask]
-
             r1 = top3.iloc[0]["Restaurant"] if "Restaurant" in top3.columns else ""
             r2 = top3.iloc[1]["Restaurant"] if len(top3) > 1 and "Restaurant" in top3.columns else ""
             r3 = top3.iloc[2]["Restaurant"] if len(top3) > 2 and "Restaurant" in top3.columns else ""
@@ -698,20 +725,19 @@ def user_personal_tab(df, user_id):
                 "Sandwich_slider": sandwich_slider,
             }
 
-            tops_df = pd.concat([tops_df, pd.DataFrame([new_row])], ignore_index=True)
-            save_tops(tops_df)
+            save_top_du_jour(new_row)
 
             st.success("Ton top 3 du jour a été enregistré ✅")
 
-    tops_df = load_tops()
-    tops_df = tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
-    tops_today = tops_df[tops_df["date"] == today_str]
+    tops_today = tops_du_jour(today_str)
 
     st.subheader("👥 Qui te ressemble aujourd'hui ?")
     if tops_today.empty or not any(tops_today["user_id"] == user_id):
         st.caption("Enregistre ton top 3 pour voir avec qui tu matches 😉")
     else:
-        similitudes = calculer_similarites(tops_today, user_id)
+        mesures = {"Rangs du top 3": "rang", "Cosinus": "cosinus", "Kendall": "kendall"}
+        mesure = st.radio("Mesure de similarité", list(mesures), horizontal=True)
+        similitudes = calculer_similarites(tops_today, user_id, mesures[mesure])
         if not similitudes:
             st.info("Personne n'a de resto en commun avec toi dans le top 3 aujourd'hui.")
         else:
@@ -727,6 +753,7 @@ def user_personal_tab(df, user_id):
     delete_account_block()
 
 
+@timing.timed("rendu.equipe")
 def user_team_tab():
     """Onglet 'Vue d'équipe' : consensualité, équipe recommandée, heatmap, liste des répondants du jour."""
     st.header("👥 Vue d'équipe – aujourd'hui")
@@ -736,34 +763,7 @@ def user_team_tab():
         st.rerun()
 
     today_str = date.today().isoformat()
-    tops_df = load_tops()
-    if tops_df.empty:
-        st.info("Personne n'a encore enregistré son top 3.")
-        return
-
-    tops_df = tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
-    tops_today = tops_df[tops_df["date"] == today_str]
-
-    if tops_today.empty:
-        st.info("Personne n'a encore enregistré son top 3 aujourd'hui.")
-        return
-
-def user_team_tab():
-    """Onglet 'Vue d'équipe' : consensualité, équipe recommandée, heatmap, liste des répondants du jour."""
-    st.header("👥 Vue d'équipe – aujourd'hui")
-
-    # 🔄 Bouton pour rafraîchir les réponses (si d'autres ont répondu entre temps)
-    if st.button("🔄 Actualiser les réponses du jour"):
-        st.rerun()
-
-    today_str = date.today().isoformat()
-    tops_df = load_tops()
-    if tops_df.empty:
-        st.info("Personne n'a encore enregistré son top 3.")
-        return
-
-    tops_df = tops_df[tops_df["user_id"].str.lower() != ADMIN_USER_ID]
-    tops_today = tops_df[tops_df["date"] == today_str]
+    tops_today = tops_du_jour(today_str)
 
     if tops_today.empty:
         st.info("Personne n'a encore enregistré son top 3 aujourd'hui.")
@@ -772,34 +772,57 @@ def user_team_tab():
     # 1) Resto le plus consensuel
     st.subheader("🏆 Resto le plus consensuel")
 
-    scores_resto = {}
-    counts_resto = {}
+    methodes = {
+        "Points 3/2/1": None,
+        "Borda complet": "borda",
+        "Approbation (3 préférés)": "approbation",
+        "Condorcet (Schulze)": "schulze",
+        "Kemeny (approché)": "kemeny",
+    }
+    aides = {
+        None: "Score de consensus basé sur la position dans les tops (3 points pour un top 1, 2 pour top 2, 1 pour top 3).",
+        "borda": "Nombre total de restos battus dans les classements de chacun.",
+        "approbation": "Nombre de personnes qui ont ce resto parmi leurs 3 préférés.",
+        "schulze": "Nombre de restos battus en duel (chemins les plus forts de Schulze).",
+        "kemeny": "Ordre qui contredit le moins de préférences par paire (m - position).",
+    }
+    col_methode, col_bulletins = st.columns(2)
+    with col_methode:
+        methode = methodes[st.selectbox("Méthode de vote", list(methodes))]
+    with col_bulletins:
+        source = st.radio(
+            "Bulletins",
+            ["Top 3 du jour", "Classements complets (sliders)"],
+            horizontal=True,
+            disabled=methode is None,
+        )
+
+    engine = get_engine(RESTAURANTS_PATH)
 
-    for _, row in tops_today.iterrows():
-        for col, weight in [("Restau_1", 3), ("Restau_2", 2), ("Restau_3", 1)]:
-            resto = row[col]
-            if not isinstance(resto, str) or resto.strip() == "":
-                continue
-            resto = resto.strip()
-            scores_resto[resto] = scores_resto.get(resto, 0) + weight
-            counts_resto[resto] = counts_resto.get(resto, 0) + 1
-
-    if not scores_resto:
+    with timing.span("calcul.consensus"):
+        if methode is None:
+            df_cons = classement_du_jour(today_str)
+        elif source == "Top 3 du jour":
+            df_cons = memoize(
+                ("vote", today_str, methode, "top3"),
+                version_du_jour(today_str),
+                lambda: agreger(methode, *bulletins_top3(tops_today)),
+            )
+        else:
+            df_cons = memoize(
+                ("vote", today_str, methode, "sliders"),
+                version_du_jour(today_str, engine.version),
+                lambda: agreger(methode, *bulletins_utilites(utilites_du_jour(today_str, engine, tops_today))),
+            )
+
+    if df_cons.empty:
         st.info("Impossible de calculer un resto consensuel (tops vides ?).")
     else:
-        df_cons = pd.DataFrame(
-            {
-                "Restaurant": list(scores_resto.keys()),
-                "Score_consensus": list(scores_resto.values()),
-                "Nb_personnes": [counts_resto[r] for r in scores_resto.keys()],
-            }
-        ).sort_values(["Score_consensus", "Nb_personnes"], ascending=False)
-
         best = df_cons.iloc[0]
         st.metric(
             "Resto le plus consensuel du jour",
             f"{best['Restaurant']}",
-            help="Score de consensus basé sur la position dans les tops (3 points pour un top 1, 2 pour top 2, 1 pour top 3)."
+            help=aides[methode]
         )
         st.write(df_cons.reset_index(drop=True))
 
@@ -807,61 +830,44 @@ def user_team_tab():
         st.subheader("🧑‍🤝‍🧑 Équipe de dej recommandée")
         resto_ref = best["Restaurant"]
 
-        subset = tops_today[
-            (tops_today["Restau_1"] == resto_ref)
-            | (tops_today["Restau_2"] == resto_ref)
-            | (tops_today["Restau_3"] == resto_ref)
-        ].copy()
-
-        if subset.empty:
-            st.info("Personne n'a ce resto dans son top 3 (bizarre, vu qu'il est consensuel 😅).")
+        equipe = consensus().votants(today_str, resto_ref)
+        if not equipe:
+            st.info("Personne n'a ce resto dans son top 3 aujourd'hui.")
         else:
-            users_df = load_users()
-            users_df = users_df[users_df["user_id"].str.lower() != ADMIN_USER_ID]
-
-            subset = subset.merge(
-                users_df[["user_id", "description"]],
-                on="user_id",
-                how="left"
-            )
-
             st.caption(f"Autour de **{resto_ref}**, voici l'équipe de dej recommandée :")
-            for _, row in subset.iterrows():
-                st.markdown(f"- **{row['prenom']} {row['nom']}**")
-                if isinstance(row.get("description", ""), str) and row["description"].strip():
-                    st.caption(f"_\"{row['description']}\"_")
+            for membre in equipe:
+                st.markdown(f"- **{membre['prenom']} {membre['nom']}**")
+                description = description_de(membre["user_id"])
+                if isinstance(description, str) and description.strip():
+                    st.caption(f"_\"{description}\"_")
+
+    # 2 bis) Utilité de chaque resto pour toute l'équipe (classements complets)
+    st.subheader("📈 Utilité de chaque resto pour l'équipe")
+    st.caption(
+        "Calculée à partir des préférences enregistrées de chacun (sliders), "
+        "sur tout le catalogue et pas seulement les top 3."
+    )
+    utilites = utilites_du_jour(today_str, engine, tops_today)
+    df_util = pd.DataFrame(
+        {
+            "Restaurant": utilites.columns,
+            "Utilité_moyenne": utilites.mean(axis=0).round(2).to_numpy(),
+            "Utilité_min": utilites.min(axis=0).round(2).to_numpy(),
+        }
+    ).sort_values(["Utilité_moyenne", "Utilité_min"], ascending=False)
+    st.write(df_util.reset_index(drop=True))
+
+    with st.expander("Voir l'utilité de chaque resto pour chaque personne"):
+        noms = dict(zip(tops_today["user_id"], tops_today["prenom"] + " " + tops_today["nom"]))
+        st.dataframe(utilites.rename(index=noms).round(2))
 
     # 3) Heatmap des préférences
     st.subheader("🔥 Heatmap des préférences (poids 3/2/1)")
 
-    records = []
-    for _, row in tops_today.iterrows():
-        uid = row["user_id"]
-        label = f"{row['prenom']} {row['nom']}"
-        for col, weight in [("Restau_1", 3), ("Restau_2", 2), ("Restau_3", 1)]:
-            resto = row[col]
-            if not isinstance(resto, str) or resto.strip() == "":
-                continue
-            records.append(
-                {"Personne": label, "Restaurant": resto.strip(), "Poids": weight}
-            )
+    heat = heatmap_du_jour(today_str, tops_today)
 
-    if records:
-        df_long = pd.DataFrame(records)
-        heat = df_long.pivot_table(
-            index="Personne",
-            columns="Restaurant",
-            values="Poids",
-            aggfunc="sum",
-            fill_value=0,
-        )
-
-        #Tentative de heatmap stylée
-        try:
-            import matplotlib
-            st.dataframe(heat.style.background_gradient(axis=None))
-        except ImportError:
-            st.dataframe(heat)
+    if heat is not None:
+        st.dataframe(heat.style.apply(degrade_heatmap, axis=None))
     else:
         st.info("Pas assez de données pour afficher une heatmap.")
 
@@ -893,8 +899,33 @@ def user_team_tab():
 # App principale
 # ==============================
 
+def echauffement() -> list:
+    """Étapes de l'échauffement (dejeuner.warmup) : ce que paierait le premier rerun de la journée."""
+    def vues():
+        today_str = date.today().isoformat()
+        tops_today = tops_du_jour(today_str)
+        if tops_today.empty:
+            return
+        classement_du_jour(today_str)
+        heatmap_du_jour(today_str, tops_today)
+        utilites_du_jour(today_str, get_engine(RESTAURANTS_PATH), tops_today)
+        get_similarites(tops_today, "rang", version=version_du_jour(today_str))
+
+    return [
+        ("catalogue", lire_catalogue),
+        ("scoring", lambda: get_engine(RESTAURANTS_PATH)),
+        ("tops", lambda: tops_du_jour(date.today().isoformat())),
+        ("vues", vues),
+    ]
+
+
+@timing.timed("rerun")
 def main():
     st.set_page_config(page_title="App Déjeuner", page_icon="🍽️", layout="wide")
+    # L'écran de connexion n'a besoin ni de pandas ni de numpy : importés
+    # pendant la saisie, avec le catalogue et les vues du jour
+    warmup.start("dejeuner", echauffement())
+    metrics.start_exporter()
 
     init_session()
     login_block()
@@ -1,18 +1,25 @@
 # app_tinder_resto.py
 
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
 import os
 import random
 from datetime import date
 
+from dejeuner import metrics, timing, warmup
+from dejeuner.catalog import load_catalog_snapshot
+from dejeuner.lazy import lazy_import
+from dejeuner.likers import get_likers_index
+from dejeuner.writebehind import get_swipe_storage
+
+pd = lazy_import("pandas")
+
 # ============================
 # Constantes
 # ============================
 
-DATA_DIR = "data"
-USERS_PATH = os.path.join(DATA_DIR, "users.csv")
-SWIPES_PATH = os.path.join(DATA_DIR, "tinder_swipes.csv")
+DATA_DIR = "data"  # users.csv, tinder_swipes/ (un CSV par jour) ou dejeuner.sqlite3
 RESTAURANTS_PATH = "Restaurants.xlsx"
 
 ADMIN_USER_ID = "admin admin"
@@ -22,48 +29,78 @@ ADMIN_USER_ID = "admin admin"
 # Utils fichiers
 # ============================
 
-def ensure_data_dir():
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+def storage():
+    """Stockage partagé (swipes différés si TINDER_WRITE_BEHIND=1, voir dejeuner.writebehind)."""
+    return get_swipe_storage(DATA_DIR)
+
+
+def likers_index():
+    """Index (jour, resto) -> likers, partagé par toutes les sessions."""
+    return get_likers_index(storage())
 
 
 def load_users() -> pd.DataFrame:
-    ensure_data_dir()
-    if not os.path.exists(USERS_PATH):
-        cols = ["user_id", "prenom", "nom", "password", "description"]
-        return pd.DataFrame(columns=cols)
-    return pd.read_csv(USERS_PATH, dtype=str)
+    return storage().load_users()
 
 
 def save_users(df: pd.DataFrame):
-    ensure_data_dir()
-    df.to_csv(USERS_PATH, index=False, encoding="utf-8")
+    storage().save_users(df)
 
 
-def load_swipes() -> pd.DataFrame:
-    ensure_data_dir()
-    if not os.path.exists(SWIPES_PATH):
-        cols = ["date", "user_id", "prenom", "nom", "restaurant", "decision"]
-        return pd.DataFrame(columns=cols)
-    return pd.read_csv(SWIPES_PATH, dtype=str)
+@timing.timed("chargement.swipes")
+def load_swipes(day: str = None) -> pd.DataFrame:
+    """Swipes d'un jour (`day`) ou de tout l'historique si `day` est None."""
+    return storage().load_swipes(day)
 
 
 def save_swipes(df: pd.DataFrame):
-    ensure_data_dir()
-    df.to_csv(SWIPES_PATH, index=False, encoding="utf-8")
+    """Réécrit tout l'historique : réservé aux opérations globales."""
+    storage().save_swipes(df)
+
+
+@timing.timed("ecriture.swipe")
+def append_swipe(row: dict):
+    """Enregistre un swipe (une ligne ajoutée, jamais de réécriture)."""
+    storage().append_swipe(row)
+    likers_index().record(row)
+    metrics.incr("dejeuner_swipes_total", app="tinder", decision=row["decision"])
+
+
+def delete_swipes(day: str = None, user_id: str = None):
+    storage().delete_swipes(day=day, user_id=user_id)
+    likers_index().invalidate(day)
+
+
+def pop_last_swipe(day: str, user_id: str):
+    storage().pop_last_swipe(day, user_id)
+    likers_index().invalidate(day)
+
 
+def delete_user_data(user_id: str):
+    """Supprime un compte et tous ses swipes."""
+    storage().delete_user(user_id)
+    delete_swipes(user_id=user_id)
 
+
+@timing.timed("chargement.restaurants")
 def load_restaurants() -> pd.DataFrame:
     if not os.path.exists(RESTAURANTS_PATH):
         st.error(f"Fichier {RESTAURANTS_PATH} introuvable. Place-le dans le même dossier que app_tinder_resto.py.")
         st.stop()
-    df = pd.read_excel(RESTAURANTS_PATH)
+    df = lire_catalogue()
     if "Restaurant" not in df.columns:
         st.error("Le fichier Restaurants.xlsx doit contenir une colonne 'Restaurant'.")
         st.stop()
     return df
 
 
+def lire_catalogue() -> pd.DataFrame:
+    """Catalogue (copie), registre des ids resynchronisé seulement si le fichier a changé."""
+    version, df = load_catalog_snapshot(RESTAURANTS_PATH)
+    storage().sync_restaurants(df, version=version)
+    return df
+
+
 # ============================
 # Session & Auth
 # ============================
@@ -114,18 +151,19 @@ def login_block():
                 st.session_state["swipe_index"] = 0
                 st.session_state["last_feedback"] = ""
                 st.session_state["match_popup"] = {"show": False, "resto": None, "people": [], "index": 0}
+                metrics.incr("dejeuner_logins_total", app="tinder", result="ok")
                 st.sidebar.success("Connecté en tant qu'admin.")
             else:
+                metrics.incr("dejeuner_logins_total", app="tinder", result="echec")
                 st.sidebar.error("Mot de passe admin incorrect.")
             return
 
         # === Cas utilisateur normal ===
-        users_df = load_users()
         user_id = f"{prenom.strip()} {nom.strip()}"
-        existing = users_df[users_df["user_id"] == user_id]
+        existing = storage().get_user(user_id)
 
-        if not existing.empty:
-            stored_pwd = existing.iloc[0]["password"]
+        if existing is not None:
+            stored_pwd = existing["password"]
             if password == stored_pwd:
                 st.session_state["logged_in"] = True
                 st.session_state["is_admin"] = False
@@ -135,8 +173,10 @@ def login_block():
                 st.session_state["swipe_index"] = 0
                 st.session_state["last_feedback"] = ""
                 st.session_state["match_popup"] = {"show": False, "resto": None, "people": [], "index": 0}
+                metrics.incr("dejeuner_logins_total", app="tinder", result="ok")
                 st.sidebar.success(f"Re-bonjour {prenom} !")
             else:
+                metrics.incr("dejeuner_logins_total", app="tinder", result="echec")
                 st.sidebar.error("Mot de passe incorrect.")
         else:
             new_row = {
@@ -146,8 +186,7 @@ def login_block():
                 "password": password,
                 "description": description.strip() if description else "",
             }
-            users_df = pd.concat([users_df, pd.DataFrame([new_row])], ignore_index=True)
-            save_users(users_df)
+            storage().add_user(new_row)
 
             st.session_state["logged_in"] = True
             st.session_state["is_admin"] = False
@@ -157,6 +196,7 @@ def login_block():
             st.session_state["swipe_index"] = 0
             st.session_state["last_feedback"] = ""
             st.session_state["match_popup"] = {"show": False, "resto": None, "people": [], "index": 0}
+            metrics.incr("dejeuner_logins_total", app="tinder", result="inscription")
             st.sidebar.success(f"Bienvenue {prenom}, ton compte a été créé !")
 
     if st.session_state["logged_in"]:
@@ -192,13 +232,7 @@ def delete_account_block():
             st.warning("Aucun compte connecté.")
             return
 
-        users_df = load_users()
-        users_df = users_df[users_df["user_id"] != user_id]
-        save_users(users_df)
-
-        swipes_df = load_swipes()
-        swipes_df = swipes_df[swipes_df["user_id"] != user_id]
-        save_swipes(swipes_df)
+        delete_user_data(user_id)
 
         st.session_state["logged_in"] = False
         st.session_state["is_admin"] = False
@@ -217,6 +251,21 @@ def delete_account_block():
 # Panneau admin
 # ============================
 
+def performance_panel():
+    """Temps par étape des reruns de ce processus (voir dejeuner.timing)."""
+    st.subheader("⏱️ Performances (ce processus)")
+    lignes = timing.rapport()
+    if not lignes:
+        st.info("Aucune mesure pour l'instant.")
+    else:
+        st.dataframe(pd.DataFrame(lignes), use_container_width=True, hide_index=True)
+    st.caption(warmup.resume("tinder"))
+    if st.button("🔄 Remettre les mesures à zéro"):
+        timing.reset()
+        st.rerun()
+
+
+@timing.timed("rendu.admin")
 def admin_panel():
     st.title("🔑 Panneau admin – gestion globale")
 
@@ -226,7 +275,7 @@ def admin_panel():
     today_str = date.today().isoformat()
     total_users = len(users_df)
     total_swipes = len(swipes_df)
-    swipes_today = len(swipes_df[swipes_df["date"] == today_str]) if not swipes_df.empty else 0
+    swipes_today = int((swipes_df["date"] == today_str).sum()) if not swipes_df.empty else 0
 
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -248,11 +297,7 @@ def admin_panel():
         selected_user = st.selectbox("Choisir un utilisateur à supprimer", user_ids)
 
         if st.button("❌ Supprimer cet utilisateur et toutes ses réponses"):
-            users_df = users_df[users_df["user_id"] != selected_user]
-            save_users(users_df)
-
-            swipes_df = swipes_df[swipes_df["user_id"] != selected_user]
-            save_swipes(swipes_df)
+            delete_user_data(selected_user)
 
             st.success(f"Utilisateur '{selected_user}' et ses swipes ont été supprimés.")
             st.rerun()
@@ -263,19 +308,19 @@ def admin_panel():
     col_a, col_b = st.columns(2)
     with col_a:
         if st.button("🗑️ Supprimer tous les swipes d'aujourd'hui"):
-            if not swipes_df.empty:
-                swipes_df = swipes_df[swipes_df["date"] != today_str]
-                save_swipes(swipes_df)
+            delete_swipes(day=today_str)
             st.success("Tous les swipes d'aujourd'hui ont été supprimés.")
             st.rerun()
 
     with col_b:
         if st.button("🔥 Supprimer tous les swipes (toutes dates)"):
-            empty = pd.DataFrame(columns=["date", "user_id", "prenom", "nom", "restaurant", "decision"])
-            save_swipes(empty)
+            delete_swipes()
             st.success("Tous les swipes ont été supprimés.")
             st.rerun()
 
+    st.markdown("---")
+    performance_panel()
+
 
 # ============================
 # Swipe Logic
@@ -330,6 +375,7 @@ def render_resto_card(row):
     st.markdown(card_html, unsafe_allow_html=True)
 
 
+@timing.timed("rendu.swipe")
 def swipe_tab(df: pd.DataFrame):
     today_str = date.today().isoformat()
     user_id = st.session_state["user_id"]
@@ -419,16 +465,8 @@ def swipe_tab(df: pd.DataFrame):
     prenom = st.session_state["prenom"]
     nom = st.session_state["nom"]
 
-    swipes_df_before = load_swipes()
-    if not swipes_df_before.empty:
-        likes_others = swipes_df_before[
-            (swipes_df_before["restaurant"] == resto_name)
-            & (swipes_df_before["decision"] == "like")
-            & (swipes_df_before["user_id"] != user_id)
-            & (swipes_df_before["date"] == today_str)
-        ]
-    else:
-        likes_others = pd.DataFrame(columns=["user_id", "prenom", "nom", "restaurant", "decision", "date"])
+    # {user_id: "Prénom Nom"} des autres personnes ayant liké ce resto aujourd'hui
+    likes_others = likers_index().likers(today_str, resto_name, exclude=user_id)
 
     # Boutons "swipe" côte à côte, même largeur
     col_no, col_yes = st.columns(2)
@@ -441,11 +479,7 @@ def swipe_tab(df: pd.DataFrame):
     col_reset, col_back = st.columns(2)
     with col_reset:
         if st.button("🧹 Réinitialiser mes choix d'aujourd'hui"):
-            swipes_df = load_swipes()
-            if not swipes_df.empty:
-                mask = ~((swipes_df["user_id"] == user_id) & (swipes_df["date"] == today_str))
-                swipes_df = swipes_df[mask]
-                save_swipes(swipes_df)
+            delete_swipes(day=today_str, user_id=user_id)
             st.session_state["swipe_index"] = 0
             st.session_state["last_feedback"] = ""
             st.session_state["match_popup"] = {"show": False, "resto": None, "people": [], "index": 0}
@@ -456,14 +490,7 @@ def swipe_tab(df: pd.DataFrame):
             if idx <= 0:
                 st.caption("Tu es déjà au début 😉")
             else:
-                swipes_df = load_swipes()
-                if not swipes_df.empty:
-                    mask = (swipes_df["user_id"] == user_id) & (swipes_df["date"] == today_str)
-                    last_swipes = swipes_df[mask]
-                    if not last_swipes.empty:
-                        last_idx = last_swipes.index[-1]
-                        swipes_df = swipes_df.drop(last_idx)
-                        save_swipes(swipes_df)
+                pop_last_swipe(today_str, user_id)
                 st.session_state["swipe_index"] = idx - 1
                 st.session_state["last_feedback"] = ""
                 st.session_state["match_popup"] = {"show": False, "resto": None, "people": [], "index": 0}
@@ -471,21 +498,19 @@ def swipe_tab(df: pd.DataFrame):
 
     # === LIKE ===
     if yes_btn:
-        swipes_df = load_swipes()
-        new_row = {
-            "date": today_str,
-            "user_id": user_id,
-            "prenom": prenom,
-            "nom": nom,
-            "restaurant": resto_name,
-            "decision": "like",
-        }
-        swipes_df = pd.concat([swipes_df, pd.DataFrame([new_row])], ignore_index=True)
-        save_swipes(swipes_df)
-
-        if not likes_others.empty:
-            names = [f"{r['prenom']} {r['nom']}" for _, r in likes_others.iterrows()]
-            names = list(sorted(set(names)))
+        append_swipe(
+            {
+                "date": today_str,
+                "user_id": user_id,
+                "prenom": prenom,
+                "nom": nom,
+                "restaurant": resto_name,
+                "decision": "like",
+            }
+        )
+
+        if likes_others:
+            names = sorted(set(likes_others.values()))
             if len(names) > 3:
                 names_sample = random.sample(names, 3)
             else:
@@ -506,19 +531,18 @@ def swipe_tab(df: pd.DataFrame):
 
     # === DISLIKE ===
     if no_btn:
-        swipes_df = load_swipes()
-        new_row = {
-            "date": today_str,
-            "user_id": user_id,
-            "prenom": prenom,
-            "nom": nom,
-            "restaurant": resto_name,
-            "decision": "dislike",
-        }
-        swipes_df = pd.concat([swipes_df, pd.DataFrame([new_row])], ignore_index=True)
-        save_swipes(swipes_df)
-
-        if not likes_others.empty:
+        append_swipe(
+            {
+                "date": today_str,
+                "user_id": user_id,
+                "prenom": prenom,
+                "nom": nom,
+                "restaurant": resto_name,
+                "decision": "dislike",
+            }
+        )
+
+        if likes_others:
             st.caption("Dommage, t'as manqué un match 😅 (mais t'as le droit d'avoir du goût différent)")
         st.session_state["swipe_index"] = idx + 1
         st.session_state["last_feedback"] = ""
@@ -533,6 +557,7 @@ def swipe_tab(df: pd.DataFrame):
 # Matchs tab
 # ============================
 
+@timing.timed("rendu.matchs")
 def matches_tab():
     st.header("💞 Mes matchs (aujourd'hui)")
 
@@ -540,45 +565,21 @@ def matches_tab():
         st.rerun()
 
     user_id = st.session_state["user_id"]
-    swipes_df = load_swipes()
-
-    if swipes_df.empty:
-        st.info("Tu n'as encore swipé aucun resto.")
-        return
-
     today_str = date.today().isoformat()
-    swipes_df = swipes_df[swipes_df["date"] == today_str]
-
-    if swipes_df.empty:
-        st.info("Aucun swipe pour aujourd'hui (toi ou les autres).")
-        return
-
-    my_likes = swipes_df[
-        (swipes_df["user_id"] == user_id) & (swipes_df["decision"] == "like")
-    ]
 
-    if my_likes.empty:
+    if not likers_index().likes(today_str, user_id):
         st.info("Tu n'as pas encore liké de resto aujourd'hui. Va swiperrr 💘")
         return
 
     matches_data = []
     all_matched_people = set()
 
-    for _, row in my_likes.iterrows():
-        resto = row["restaurant"]
-        others = swipes_df[
-            (swipes_df["restaurant"] == resto)
-            & (swipes_df["decision"] == "like")
-            & (swipes_df["user_id"] != user_id)
-        ]
-        if others.empty:
-            continue
-
-        names = sorted(
-            set(f"{r['prenom']} {r['nom']}" for _, r in others.iterrows())
-        )
-        for n in names:
-            all_matched_people.add(n)
+    with timing.span("calcul.matchs"):
+        matches = likers_index().matches(today_str, user_id)
+
+    for resto, others in matches.items():
+        names = sorted(set(others.values()))
+        all_matched_people.update(names)
 
         matches_data.append(
             {
@@ -604,8 +605,21 @@ def matches_tab():
 # Main app
 # ============================
 
+def echauffement() -> list:
+    """Étapes de l'échauffement (dejeuner.warmup) : catalogue et swipes du jour."""
+    return [
+        ("catalogue", lire_catalogue),
+        ("swipes", lambda: likers_index().preload(date.today().isoformat())),
+    ]
+
+
+@timing.timed("rerun")
 def main():
     st.set_page_config(page_title="Tinder des restos", page_icon="💘", layout="wide")
+    # L'écran de connexion n'a pas besoin de pandas : importé pendant la saisie,
+    # avec le catalogue et les swipes du jour
+    warmup.start("tinder", echauffement())
+    metrics.start_exporter()
 
     init_session()
     login_block()
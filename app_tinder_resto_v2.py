@@ -1,20 +1,19 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
 import hashlib
 from datetime import datetime
-import json
-import os
 from pathlib import Path
 
-# Configuration de la page
-st.set_page_config(
-    page_title="Lunch Tinder 🍽️",
-    page_icon="🍽️",
-    layout="centered"
-)
+from dejeuner import archives, metrics, timing, warmup
+from dejeuner.catalog import load_catalog_snapshot
+from dejeuner.lazy import lazy_import
+from dejeuner.writebehind import get_swipe_lunch_tinder_store
+
+pd = lazy_import("pandas")
 
 # CSS personnalisé pour les animations et le style avec support tactile mobile
-st.markdown("""
+STYLE = """
 <style>
     .main {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -285,19 +284,30 @@ const observer = new MutationObserver(() => {
 });
 observer.observe(document.body, { childList: true, subtree: true });
 </script>
-""", unsafe_allow_html=True)
+"""
+
+def config_page():
+    """Configuration de la page et CSS (appelé au lancement de l'app)"""
+    st.set_page_config(
+        page_title="Lunch Tinder 🍽️",
+        page_icon="🍽️",
+        layout="centered"
+    )
+    st.markdown(STYLE, unsafe_allow_html=True)
 
 # Fichiers de données
 DATA_DIR = Path("lunch_tinder_data")
-DATA_DIR.mkdir(exist_ok=True)
-USERS_FILE = DATA_DIR / "users.json"
-SWIPES_FILE = DATA_DIR / "swipes.json"
+
+def store():
+    """Stockage utilisateurs / swipes (JSON ou SQLite selon DEJEUNER_STORAGE)"""
+    return get_swipe_lunch_tinder_store(str(DATA_DIR))
 
 # Fonctions de gestion des données
+@timing.timed("chargement.restaurants")
 def load_restaurants():
     """Charge la base de restaurants depuis Excel"""
     try:
-        df = pd.read_excel("Restaurants.xlsx")
+        df = lire_catalogue()
         # S'assurer que la colonne 'Restaurant' existe
         if 'Restaurant' not in df.columns:
             st.error("❌ Le fichier Excel doit contenir une colonne 'Restaurant'")
@@ -307,96 +317,70 @@ def load_restaurants():
         st.error("❌ Fichier restaurants.xlsx non trouvé!")
         return pd.DataFrame()
 
+def lire_catalogue():
+    """Catalogue (copie), registre des ids resynchronisé seulement si le fichier a changé"""
+    version, df = load_catalog_snapshot("Restaurants.xlsx")
+    store().sync_restaurants(df, version=version)
+    return df
+
+def ensure_admin():
+    """Crée l'admin par défaut s'il n'existe pas encore"""
+    if store().get_user("admin") is None:
+        admin_password = hashlib.sha256("admin".encode()).hexdigest()
+        store().add_user("admin", {
+            "prenom": "Admin",
+            "nom": "Admin",
+            "password": admin_password,
+            "is_admin": True
+        })
+
 def load_users():
     """Charge les utilisateurs"""
-    if USERS_FILE.exists():
-        with open(USERS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    else:
-        # Création de l'admin par défaut
-        admin_password = hashlib.sha256("admin".encode()).hexdigest()
-        users = {
-            "admin": {
-                "prenom": "Admin",
-                "nom": "Admin",
-                "password": admin_password,
-                "is_admin": True
-            }
-        }
-        save_users(users)
-        return users
+    ensure_admin()
+    return store().load_users()
 
 def save_users(users):
     """Sauvegarde les utilisateurs"""
-    with open(USERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    store().save_users(users)
 
 def load_swipes():
     """Charge l'historique des swipes"""
-    if SWIPES_FILE.exists():
-        with open(SWIPES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    return store().load_swipes()
 
 def save_swipes(swipes):
     """Sauvegarde les swipes"""
-    with open(SWIPES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(swipes, f, ensure_ascii=False, indent=2)
+    store().save_swipes(swipes)
 
 def get_today_key():
     """Retourne la clé pour aujourd'hui"""
     return datetime.now().strftime("%Y-%m-%d")
 
+@timing.timed("ecriture.swipe")
 def add_swipe(username, restaurant_name, liked):
     """Ajoute un swipe"""
-    swipes = load_swipes()
-    today = get_today_key()
-    
-    if today not in swipes:
-        swipes[today] = {}
-    
-    if username not in swipes[today]:
-        swipes[today][username] = {}
-    
-    swipes[today][username][restaurant_name] = liked
-    save_swipes(swipes)
+    store().add_swipe(get_today_key(), username, restaurant_name, liked)
+    metrics.incr("dejeuner_swipes_total", app="tinder_v2", decision="like" if liked else "dislike")
 
+@timing.timed("calcul.matchs")
 def get_matches(username, restaurant_name):
     """Trouve les matches pour un restaurant"""
-    swipes = load_swipes()
-    today = get_today_key()
-    
-    if today not in swipes:
-        return []
-    
-    matches = []
-    for user, user_swipes in swipes[today].items():
-        if user != username and restaurant_name in user_swipes and user_swipes[restaurant_name]:
-            users = load_users()
-            if user in users:
-                matches.append(f"{users[user]['prenom']} {users[user]['nom']}")
-    
-    return matches
+    return store().matches(get_today_key(), username, restaurant_name)
 
+@timing.timed("chargement.swipes")
 def get_user_swipes_today(username):
     """Retourne les restaurants déjà swipés aujourd'hui"""
-    swipes = load_swipes()
-    today = get_today_key()
-    
-    if today not in swipes or username not in swipes[today]:
-        return {}
-    
-    return swipes[today][username]
+    return store().user_swipes(get_today_key(), username)
 
 # Initialisation de la session
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-    st.session_state.username = None
-    st.session_state.current_resto_idx = 0
-    st.session_state.show_match = False
-    st.session_state.match_restaurant = None
-    st.session_state.match_users = []
-    st.session_state.swipe_trigger = 0
+def init_session():
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+        st.session_state.username = None
+        st.session_state.current_resto_idx = 0
+        st.session_state.show_match = False
+        st.session_state.match_restaurant = None
+        st.session_state.match_users = []
+        st.session_state.swipe_trigger = 0
 
 # Page de connexion
 def login_page():
@@ -410,17 +394,21 @@ def login_page():
         password = st.text_input("Mot de passe", type="password", key="login_password")
         
         if st.button("Se connecter", key="login_btn"):
-            users = load_users()
-            if username in users:
+            ensure_admin()
+            user = store().get_user(username)
+            if user is not None:
                 hashed_pw = hashlib.sha256(password.encode()).hexdigest()
-                if users[username]["password"] == hashed_pw:
+                if user["password"] == hashed_pw:
+                    metrics.incr("dejeuner_logins_total", app="tinder_v2", result="ok")
                     st.session_state.logged_in = True
                     st.session_state.username = username
-                    st.session_state.is_admin = users[username].get("is_admin", False)
+                    st.session_state.is_admin = user.get("is_admin", False)
                     st.rerun()
                 else:
+                    metrics.incr("dejeuner_logins_total", app="tinder_v2", result="echec")
                     st.error("❌ Mot de passe incorrect")
             else:
+                metrics.incr("dejeuner_logins_total", app="tinder_v2", result="echec")
                 st.error("❌ Utilisateur non trouvé")
     
     with tab2:
@@ -436,24 +424,24 @@ def login_page():
             elif not new_username or not prenom or not nom or not new_password:
                 st.error("❌ Tous les champs sont obligatoires")
             else:
-                users = load_users()
-                if new_username in users:
+                ensure_admin()
+                if store().get_user(new_username) is not None:
                     st.error("❌ Ce nom d'utilisateur existe déjà")
                 else:
                     hashed_pw = hashlib.sha256(new_password.encode()).hexdigest()
-                    users[new_username] = {
+                    store().add_user(new_username, {
                         "prenom": prenom,
                         "nom": nom,
                         "password": hashed_pw,
                         "is_admin": False
-                    }
-                    save_users(users)
+                    })
+                    metrics.incr("dejeuner_logins_total", app="tinder_v2", result="inscription")
                     st.success("✅ Compte créé avec succès! Vous pouvez maintenant vous connecter.")
 
 # Page principale de swipe
+@timing.timed("rendu.swipe")
 def swipe_page():
-    users = load_users()
-    user_info = users[st.session_state.username]
+    user_info = store().get_user(st.session_state.username)
     
     st.title(f"🍽️ Bonjour {user_info['prenom']} !")
     
@@ -562,6 +550,7 @@ def swipe_page():
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Admin page
+@timing.timed("rendu.admin")
 def admin_page():
     st.title("👑 Panel Admin")
     
@@ -570,19 +559,20 @@ def admin_page():
         st.session_state.username = None
         st.rerun()
     
-    tab1, tab2, tab3 = st.tabs(["📊 Statistiques", "👥 Utilisateurs", "🍽️ Restaurants"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["📊 Statistiques", "👥 Utilisateurs", "🍽️ Restaurants", "⏱️ Performances", "🗄️ Archives"]
+    )
     
     with tab1:
         st.subheader("📊 Statistiques du jour")
-        swipes = load_swipes()
-        today = get_today_key()
+        swipes_today = store().swipes_for_day(get_today_key())
         
-        if today in swipes:
-            st.write(f"**Utilisateurs actifs:** {len(swipes[today])}")
+        if swipes_today:
+            st.write(f"**Utilisateurs actifs:** {len(swipes_today)}")
             
             # Compter les likes par restaurant
             resto_likes = {}
-            for user_swipes in swipes[today].values():
+            for user_swipes in swipes_today.values():
                 for resto, liked in user_swipes.items():
                     if liked:
                         resto_likes[resto] = resto_likes.get(resto, 0) + 1
@@ -607,9 +597,46 @@ def admin_page():
         restaurants = load_restaurants()
         if not restaurants.empty:
             st.dataframe(restaurants, use_container_width=True)
+    
+    with tab4:
+        st.subheader("⏱️ Temps par étape (ce processus)")
+        lignes = timing.rapport()
+        if lignes:
+            st.dataframe(pd.DataFrame(lignes), use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucune mesure pour l'instant")
+        st.caption(warmup.resume("tinder_v2"))
+        if st.button("🔄 Remettre les mesures à zéro"):
+            timing.reset()
+            st.rerun()
+
+    with tab5:
+        st.subheader("🗄️ Archivage des swipes anciens")
+        jours = st.number_input("Jours gardés dans les fichiers du jour", min_value=1, value=archives.RETENTION_DAYS, step=1)
+        avant = archives.cutoff(int(jours))
+        a_archiver = sum(len(d) for d in store().compact(avant, dry_run=True).values())
+        st.caption(f"{a_archiver} jour(s) antérieur(s) au {avant} à archiver")
+        if st.button("🗄️ Archiver", disabled=a_archiver == 0):
+            faits = store().compact(avant)
+            st.success(f"{sum(len(d) for d in faits.values())} jour(s) archivé(s)")
+
+def echauffement():
+    """Étapes de l'échauffement (dejeuner.warmup) : catalogue et swipes du jour"""
+    return [
+        ("catalogue", lire_catalogue),
+        ("swipes", lambda: store().swipes_for_day(get_today_key())),
+    ]
 
 # Router principal
+@timing.timed("rerun")
 def main():
+    config_page()
+    DATA_DIR.mkdir(exist_ok=True)
+    # L'écran de connexion n'a pas besoin de pandas : importé pendant la saisie,
+    # avec le catalogue et les swipes du jour
+    warmup.start("tinder_v2", echauffement())
+    metrics.start_exporter()
+    init_session()
     if not st.session_state.logged_in:
         login_page()
     else:
@@ -0,0 +1 @@
+"""Benchmarks de la couche de stockage (à lancer avec `python -m benchmarks.<nom>`)."""
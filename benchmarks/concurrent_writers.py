@@ -0,0 +1,131 @@
+"""
+Rush de midi simulé : N processus écrivent en même temps dans le stockage.
+
+    python -m benchmarks.concurrent_writers --writers 50 --ops 20 --scenario tops
+
+Scénarios :
+  - tops      : chaque écrivain enregistre / remplace son top du jour (lecture-modification-écriture) ;
+  - users     : chaque écrivain crée des comptes dans users.csv ;
+  - swipes    : chaque écrivain ajoute des swipes (ajout en fin de journal) ;
+  - lt_users  : créations de comptes Lunch Tinder (users.json).
+À la fin, on vérifie qu'aucune écriture n'a été perdue et on affiche le
+débit, les latences et les conflits optimistes rejoués.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+SCENARIOS = ("tops", "users", "swipes", "lt_users")
+DAY = "2026-01-19"
+
+
+def _writer(args):
+    scenario, data_dir, writer_id, ops, barrier, backend = args
+    from dejeuner import locking
+    from dejeuner.storage import get_lunch_tinder_store, get_storage
+
+    if scenario == "lt_users":
+        store = get_lunch_tinder_store(data_dir, backend=backend)
+    else:
+        store = get_storage(data_dir, backend=backend)
+    barrier.wait()
+
+    latences = []
+    for i in range(ops):
+        debut = time.perf_counter()
+        if scenario == "tops":
+            store.upsert_top(
+                {"date": DAY, "user_id": f"w{writer_id}", "prenom": "W", "nom": str(writer_id), "Restau_1": f"R{i}"}
+            )
+        elif scenario == "users":
+            store.add_user({"user_id": f"w{writer_id}-{i}", "prenom": "W", "nom": str(i), "password": "x"})
+        elif scenario == "swipes":
+            store.append_swipe(
+                {"date": DAY, "user_id": f"w{writer_id}", "prenom": "W", "nom": str(writer_id),
+                 "restaurant": f"R{i}", "decision": "like"}
+            )
+        else:
+            store.add_user(f"w{writer_id}-{i}", {"prenom": "W", "nom": str(i), "password": "x", "is_admin": False})
+        latences.append(time.perf_counter() - debut)
+    return latences, dict(locking.stats)
+
+
+def _attendu(scenario, store, writers, ops):
+    """(lignes trouvées, lignes attendues)."""
+    if scenario == "tops":
+        tops = store.load_tops(DAY)
+        derniers = dict(zip(tops["user_id"], tops["Restau_1"]))
+        ok = all(derniers.get(f"w{w}") == f"R{ops - 1}" for w in range(writers))
+        return len(tops) if ok else -1, writers
+    if scenario == "users":
+        return len(store.load_users()), writers * ops
+    if scenario == "swipes":
+        return len(store.load_swipes(DAY)), writers * ops
+    return len(store.load_users()), writers * ops
+
+
+def run(scenario: str, writers: int = 50, ops: int = 20, backend: str = None) -> dict:
+    from dejeuner.storage import get_lunch_tinder_store, get_storage
+
+    data_dir = tempfile.mkdtemp(prefix="bench-writers-")
+    try:
+        ctx = mp.get_context("spawn")
+        with ctx.Manager() as manager:
+            barrier = manager.Barrier(writers + 1)
+            with ctx.Pool(writers) as pool:
+                result = pool.map_async(
+                    _writer, [(scenario, data_dir, w, ops, barrier, backend) for w in range(writers)]
+                )
+                barrier.wait()
+                debut = time.perf_counter()
+                resultats = result.get()
+                duree = time.perf_counter() - debut
+
+        if scenario == "lt_users":
+            store = get_lunch_tinder_store(data_dir, backend=backend)
+        else:
+            store = get_storage(data_dir, backend=backend)
+        trouve, attendu = _attendu(scenario, store, writers, ops)
+
+        latences = np.concatenate([np.array(r[0]) for r in resultats]) * 1000
+        stats = {k: sum(r[1][k] for r in resultats) for k in resultats[0][1]}
+        return {
+            "scenario": scenario,
+            "writers": writers,
+            "ops": writers * ops,
+            "seconds": round(duree, 3),
+            "ops_per_second": round(writers * ops / duree, 1),
+            "p50_ms": round(float(np.percentile(latences, 50)), 2),
+            "p95_ms": round(float(np.percentile(latences, 95)), 2),
+            "p99_ms": round(float(np.percentile(latences, 99)), 2),
+            "lost": attendu - trouve if trouve >= 0 else "top perdu",
+            **stats,
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=20, help="écritures par écrivain")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--backend", choices=("files", "sqlite"), default=None)
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        # Une base par run, dans le dossier temporaire du benchmark
+        os.environ["DEJEUNER_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-db-"), "bench.sqlite3")
+
+    for scenario in SCENARIOS if args.scenario == "all" else (args.scenario,):
+        print(run(scenario, args.writers, args.ops, args.backend))
+
+
+if __name__ == "__main__":
+    main()
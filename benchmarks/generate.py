@@ -0,0 +1,150 @@
+"""
+Générateur de données synthétiques réalistes pour les benchmarks.
+
+    python -m benchmarks.generate /tmp/bench-data --restaurants 500 --users 2000 --days 90
+
+Écrit, dans le dossier cible, ce que les apps trouvent en production :
+  - Restaurants.xlsx (mêmes colonnes que le vrai catalogue) ;
+  - la base Excel de app_bobun ;
+  - data/users.csv, data/tops.csv, data/tinder_swipes.csv (anciens formats
+    monolithiques, migrés par le stockage au premier lancement) ;
+  - lunch_tinder_data/users.json et swipes.json (app_tinder_resto_v2).
+Le dernier jour généré est aujourd'hui, pour que les vues « du jour » aient
+des données.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+TYPES = ["Italien", "Bol", "Burger", "Asiatique", "Sandwich", "Salade", "Libanais", "Indien", "Mexicain", "Japonais"]
+BOBUN_EXCEL = "20260119 - Benchmark - Bo Bun.xlsx"
+PRENOMS = ["Ana", "Bob", "Chloé", "David", "Emma", "Farid", "Gaëlle", "Hugo", "Inès", "Jules", "Karim", "Léa"]
+
+
+def catalogue(n: int, rng) -> pd.DataFrame:
+    distance = rng.integers(20, 1500, n)
+    return pd.DataFrame(
+        {
+            "Restaurant": [f"Resto {i:04d}" for i in range(n)],
+            "Distance (m à pieds)": distance,
+            "Score_Distance": np.round(10 - 9 * distance / 1500, 1),
+            "Score_Prix": rng.integers(1, 11, n),
+            "Score_Quantite": rng.integers(1, 11, n),
+            "Score_Gourmandise": rng.integers(1, 11, n),
+            "Filtre_Chaleur": rng.integers(1, 11, n),
+            "Filtre_Healthy": rng.integers(1, 11, n),
+            "Filtre_Sandwich": rng.integers(1, 11, n),
+            "Filtre_Convention": rng.integers(0, 2, n),
+            "Filtre_Type": rng.choice(TYPES, n),
+        }
+    )
+
+
+def base_bobun(n: int, rng) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Restaurant": [f"Bobun {i:04d}" for i in range(n)],
+            "Temps de trajet": rng.integers(3, 30, n),
+            "Note": np.round(rng.uniform(3, 5, n), 1),
+            "Prix": np.round(rng.uniform(9, 18, n), 2),
+        }
+    )
+
+
+def utilisateurs(n: int, rng):
+    prenoms = rng.choice(PRENOMS, n)
+    return [(f"{p.lower()} user{i:05d}", p, f"User{i:05d}") for i, p in enumerate(prenoms)]
+
+
+def generate(out_dir: str, restaurants: int = 200, users: int = 500, days: int = 30,
+             participation: float = 0.6, swipes_per_user: int = 15, seed: int = 0) -> dict:
+    """Écrit le jeu de données et retourne un résumé (tailles)."""
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out_dir, "data")
+    lt_dir = os.path.join(out_dir, "lunch_tinder_data")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(lt_dir, exist_ok=True)
+
+    cat = catalogue(restaurants, rng)
+    cat.to_excel(os.path.join(out_dir, "Restaurants.xlsx"), index=False)
+    base_bobun(restaurants, rng).to_excel(os.path.join(out_dir, BOBUN_EXCEL), index=False)
+    noms = cat["Restaurant"].to_numpy()
+    # Popularité inégale : quelques restos concentrent les votes
+    popularite = rng.zipf(1.6, restaurants).astype(float)
+    popularite /= popularite.sum()
+
+    people = utilisateurs(users, rng)
+    pd.DataFrame(
+        [{"user_id": uid, "prenom": p, "nom": n, "password": "", "description": f"J'aime le resto {i % 7}"}
+         for i, (uid, p, n) in enumerate(people)]
+    ).to_csv(os.path.join(data_dir, "users.csv"), index=False)
+
+    today = date.today()
+    jours = [(today - timedelta(days=d)).isoformat() for d in range(days - 1, -1, -1)]
+    tops, swipes = [], []
+    lt_swipes = {}
+    for jour in jours:
+        presents = rng.random(users) < participation
+        for i in np.flatnonzero(presents):
+            uid, prenom, nom = people[i]
+            top = rng.choice(noms, size=min(3, restaurants), replace=False, p=popularite)
+            coeffs = rng.integers(0, 11, 7)
+            tops.append(
+                {
+                    "date": jour, "user_id": uid, "prenom": prenom, "nom": nom,
+                    "Restau_1": top[0], "Restau_2": top[1], "Restau_3": top[2],
+                    "Score_1": "", "Score_2": "", "Score_3": "",
+                    "Distance_coeff": coeffs[0], "Prix_coeff": coeffs[1], "Quantite_coeff": coeffs[2],
+                    "Gourmandise_coeff": coeffs[3], "Chaleur_slider": coeffs[4],
+                    "Healthy_slider": coeffs[5], "Sandwich_slider": coeffs[6],
+                }
+            )
+            vus = rng.choice(noms, size=min(swipes_per_user, restaurants), replace=False, p=popularite)
+            likes = rng.random(len(vus)) < 0.4
+            for resto, like in zip(vus, likes):
+                swipes.append(
+                    {"date": jour, "user_id": uid, "prenom": prenom, "nom": nom,
+                     "restaurant": resto, "decision": "like" if like else "dislike"}
+                )
+                lt_swipes.setdefault(jour, {}).setdefault(uid.replace(" ", "."), {})[str(resto)] = bool(like)
+
+    pd.DataFrame(tops).to_csv(os.path.join(data_dir, "tops.csv"), index=False)
+    pd.DataFrame(swipes).to_csv(os.path.join(data_dir, "tinder_swipes.csv"), index=False)
+
+    mot_de_passe = hashlib.sha256("x".encode()).hexdigest()
+    lt_users = {
+        uid.replace(" ", "."): {"prenom": p, "nom": n, "password": mot_de_passe, "is_admin": False}
+        for uid, p, n in people
+    }
+    lt_users["admin"] = {"prenom": "Admin", "nom": "Admin",
+                         "password": hashlib.sha256("admin".encode()).hexdigest(), "is_admin": True}
+    with open(os.path.join(lt_dir, "users.json"), "w", encoding="utf-8") as f:
+        json.dump(lt_users, f, ensure_ascii=False)
+    with open(os.path.join(lt_dir, "swipes.json"), "w", encoding="utf-8") as f:
+        json.dump(lt_swipes, f, ensure_ascii=False)
+
+    return {"restaurants": restaurants, "users": users, "days": days, "tops": len(tops), "swipes": len(swipes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un jeu de données synthétique pour les benchmarks.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--participation", type=float, default=0.6, help="part des inscrits qui répondent chaque jour")
+    parser.add_argument("--swipes-per-user", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.restaurants, args.users, args.days,
+                   args.participation, args.swipes_per_user, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Rush de midi simulé de bout en bout : des centaines de sessions Streamlit.
+
+    python -m benchmarks.lunch_rush --sessions 300 --workers 4 --p95-budget-ms 800
+
+Chaque session pilote une app sans navigateur (streamlit.testing AppTest) :
+  - app_dejeuner     : connexion (création de compte), réglage des sliders, enregistrement du top 3 ;
+  - app_tinder_resto : connexion, série de swipes (popups de match comprises) ;
+  - app_tinder_resto_v2 : inscription, connexion, série de swipes.
+Les sessions sont réparties entre `--workers` processus qui partagent un
+même dossier de données temporaire (généré par benchmarks.generate). Dans un
+processus, les sessions avancent à tour de rôle, une action chacune, comme
+sur un serveur Streamlit qui sert plusieurs utilisateurs ; les processus,
+eux, écrivent vraiment en même temps.
+
+Rapport : latences par action (p50 / p95 / p99 / max, en ms, mesurées sur
+le rerun qui suit l'action), écritures perdues (tops, swipes, comptes
+attendus mais absents du stockage), exceptions des apps et croissance du
+stockage. Code de sortie 1 si une action dépasse `--p95-budget-ms` au p95,
+si une écriture est perdue ou si une app a levé une exception.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from benchmarks.generate import generate
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = {
+    "dejeuner": os.path.join(REPO, "app_dejeuner.py"),
+    "tinder": os.path.join(REPO, "app_tinder_resto.py"),
+    "tinder_v2": os.path.join(REPO, "app_tinder_resto_v2.py"),
+}
+TIMEOUT = 120  # secondes par rerun (machine chargée)
+
+
+# ==============================
+# Sessions simulées
+# ==============================
+# Chaque session est un générateur : une action par `next()`, qui renvoie
+# (action, ms, exceptions) ; les compteurs d'écritures attendues sont mis à
+# jour dans `attendu`.
+
+def _etape(at, action):
+    debut = time.perf_counter()
+    at.run()
+    ms = (time.perf_counter() - debut) * 1000
+    return action, ms, [str(e.value) for e in at.exception]
+
+
+def _bouton(at, *prefixes):
+    for b in at.button:
+        if b.label.startswith(prefixes):
+            return b
+    return None
+
+
+def _login_v1(at, prenom, nom):
+    at.sidebar.text_input[0].input(prenom)
+    at.sidebar.text_input[1].input(nom)
+    at.sidebar.text_input[2].input("rush")
+    [b for b in at.sidebar.button if b.label == "Entrer"][0].click()
+
+
+def session_dejeuner(sid, rng, attendu):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APPS["dejeuner"], default_timeout=TIMEOUT)
+    yield _etape(at, "dejeuner.ouverture")
+    _login_v1(at, "Rush", f"D{sid}")
+    attendu["users"].append(f"Rush D{sid}")
+    yield _etape(at, "dejeuner.login")
+
+    for _ in range(3):
+        slider = at.slider[int(rng.integers(len(at.slider)))]
+        slider.set_value(int(rng.integers(slider.min, slider.max + 1)))
+        yield _etape(at, "dejeuner.slider")
+
+    _bouton(at, "💾").click()
+    attendu["tops"].append(f"Rush D{sid}")
+    yield _etape(at, "dejeuner.save_top")
+
+
+def session_tinder(sid, rng, attendu, swipes):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APPS["tinder"], default_timeout=TIMEOUT)
+    yield _etape(at, "tinder.ouverture")
+    _login_v1(at, "Rush", f"T{sid}")
+    attendu["users"].append(f"Rush T{sid}")
+    yield _etape(at, "tinder.login")
+
+    fait = 0
+    while fait < swipes:
+        suivant = _bouton(at, "➡️ Suivant")
+        if suivant is not None:
+            suivant.click()
+            yield _etape(at, "tinder.suivant")
+            continue
+        bouton = _bouton(at, "Swipe droite" if rng.random() < 0.5 else "⬅️ Swipe gauche")
+        if bouton is None:  # plus de restos à swiper
+            return
+        bouton.click()
+        attendu["swipes"] += 1
+        fait += 1
+        yield _etape(at, "tinder.swipe")
+
+
+def session_tinder_v2(sid, rng, attendu, swipes):
+    from streamlit.testing.v1 import AppTest
+
+    username = f"rush{sid}"
+    at = AppTest.from_file(APPS["tinder_v2"], default_timeout=TIMEOUT)
+    yield _etape(at, "tinder_v2.ouverture")
+
+    champs = {t.key: t for t in at.text_input}
+    champs["signup_username"].input(username)
+    champs["signup_prenom"].input("Rush")
+    champs["signup_nom"].input(f"V{sid}")
+    champs["signup_password"].input("rush")
+    champs["signup_confirm"].input("rush")
+    at.button(key="signup_btn").click()
+    attendu["lt_users"].append(username)
+    yield _etape(at, "tinder_v2.inscription")
+
+    champs = {t.key: t for t in at.text_input}
+    champs["login_username"].input(username)
+    champs["login_password"].input("rush")
+    at.button(key="login_btn").click()
+    yield _etape(at, "tinder_v2.login")
+
+    fait = 0
+    while fait < swipes:
+        continuer = _bouton(at, "Continuer à swiper")
+        if continuer is not None:
+            continuer.click()
+            yield _etape(at, "tinder_v2.continuer")
+            continue
+        cle = "like" if rng.random() < 0.5 else "dislike"
+        if not any(b.key == cle for b in at.button):  # plus de restos à swiper
+            return
+        at.button(key=cle).click()
+        attendu["lt_swipes"] += 1
+        fait += 1
+        yield _etape(at, "tinder_v2.swipe")
+
+
+def _sessions(apps, ids, swipes, seed, attendu):
+    gens = []
+    for sid in ids:
+        rng = np.random.default_rng(seed + sid)
+        app = apps[sid % len(apps)]
+        if app == "dejeuner":
+            gens.append(session_dejeuner(sid, rng, attendu))
+        elif app == "tinder":
+            gens.append(session_tinder(sid, rng, attendu, swipes))
+        else:
+            gens.append(session_tinder_v2(sid, rng, attendu, swipes))
+    return gens
+
+
+def _worker(args):
+    apps, data_dir, ids, swipes, seed = args
+    os.chdir(data_dir)
+    if REPO not in sys.path:
+        sys.path.insert(0, REPO)
+
+    attendu = {"users": [], "tops": [], "swipes": 0, "lt_users": [], "lt_swipes": 0}
+    latences, erreurs = {}, []
+    gens = _sessions(apps, ids, swipes, seed, attendu)
+    # Tour de rôle : une action par session et par tour
+    while gens:
+        for gen in list(gens):
+            try:
+                action, ms, exceptions = next(gen)
+            except StopIteration:
+                gens.remove(gen)
+                continue
+            latences.setdefault(action, []).append(ms)
+            if exceptions:
+                erreurs.extend(f"{action}: {e}" for e in exceptions)
+                gens.remove(gen)
+
+    from dejeuner.writebehind import close_all
+    close_all()  # les swipes différés doivent être écrits avant le décompte
+    return latences, erreurs, attendu
+
+
+# ==============================
+# Vérifications et rapport
+# ==============================
+
+def taille(path: str) -> dict:
+    """Octets et fichiers sous `path` (hors verrous)."""
+    octets = fichiers = 0
+    for racine, _, noms in os.walk(path):
+        for nom in noms:
+            if nom.endswith(".lock"):
+                continue
+            octets += os.path.getsize(os.path.join(racine, nom))
+            fichiers += 1
+    return {"bytes": octets, "files": fichiers}
+
+
+def pertes(attendu: dict) -> dict:
+    """Écritures attendues mais absentes du stockage (0 partout = rien de perdu)."""
+    from dejeuner.storage import get_lunch_tinder_store, get_storage
+
+    today = date.today().isoformat()
+    storage = get_storage("data")
+    store = get_lunch_tinder_store("lunch_tinder_data")
+
+    tops = set(storage.load_tops(today)["user_id"])
+    swipes = storage.load_swipes(today)
+    lt_swipes = store.swipes_for_day(today)
+    return {
+        "users": sum(storage.get_user(u) is None for u in attendu["users"]),
+        "tops": sum(u not in tops for u in attendu["tops"]),
+        "swipes": attendu["swipes"] - int(swipes["user_id"].str.startswith("Rush ").sum()),
+        "lt_users": sum(store.get_user(u) is None for u in attendu["lt_users"]),
+        "lt_swipes": attendu["lt_swipes"] - sum(len(v) for u, v in lt_swipes.items() if u.startswith("rush")),
+    }
+
+
+def run(sessions: int = 120, workers: int = 4, apps=tuple(APPS), swipes: int = 8,
+        restaurants: int = 60, users: int = 300, days: int = 5, seed: int = 0) -> dict:
+    from dejeuner.storage import get_lunch_tinder_store, get_storage
+
+    cwd = os.getcwd()
+    data_dir = tempfile.mkdtemp(prefix="lunch-rush-")
+    try:
+        generate(data_dir, restaurants=restaurants, users=users, days=days, seed=seed)
+        # Chemins relatifs comme dans les apps (base SQLite comprise)
+        os.chdir(data_dir)
+        # Migration des anciens formats avant le rush (sinon chaque worker la tenterait)
+        get_storage("data").load_users()
+        get_lunch_tinder_store("lunch_tinder_data").load_users()
+        avant = taille(data_dir)
+
+        parts = [list(range(w, sessions, workers)) for w in range(workers)]
+        debut = time.perf_counter()
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(workers) as pool:
+            resultats = pool.map(_worker, [(list(apps), data_dir, ids, swipes, seed) for ids in parts if ids])
+        duree = time.perf_counter() - debut
+
+        latences, erreurs = {}, []
+        attendu = {"users": [], "tops": [], "swipes": 0, "lt_users": [], "lt_swipes": 0}
+        for lat, err, att in resultats:
+            for action, ms in lat.items():
+                latences.setdefault(action, []).extend(ms)
+            erreurs.extend(err)
+            for k, v in att.items():
+                attendu[k] = attendu[k] + v
+
+        apres = taille(data_dir)
+        actions = {}
+        for action, ms in sorted(latences.items()):
+            ms = np.array(ms)
+            actions[action] = {
+                "n": len(ms),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                "p99_ms": round(float(np.percentile(ms, 99)), 1),
+                "max_ms": round(float(ms.max()), 1),
+            }
+        return {
+            "sessions": sessions,
+            "workers": workers,
+            "apps": list(apps),
+            "seconds": round(duree, 1),
+            "actions": actions,
+            "errors": erreurs,
+            "lost": pertes(attendu),
+            "storage": {
+                "before": avant,
+                "after": apres,
+                "growth_bytes": apres["bytes"] - avant["bytes"],
+                "growth_files": apres["files"] - avant["files"],
+            },
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=120)
+    parser.add_argument("--workers", type=int, default=4, help="processus serveurs simulés")
+    parser.add_argument("--app", choices=tuple(APPS) + ("all",), default="all")
+    parser.add_argument("--swipes", type=int, default=8, help="swipes par session Tinder")
+    parser.add_argument("--restaurants", type=int, default=60)
+    parser.add_argument("--users", type=int, default=300, help="inscrits déjà présents (historique)")
+    parser.add_argument("--days", type=int, default=5, help="jours d'historique")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--p95-budget-ms", type=float, default=1000)
+    parser.add_argument("--output", help="fichier JSON du rapport")
+    args = parser.parse_args()
+
+    apps = tuple(APPS) if args.app == "all" else (args.app,)
+    rapport = run(args.sessions, args.workers, apps, args.swipes, args.restaurants, args.users, args.days, args.seed)
+
+    print(f"{rapport['sessions']} sessions, {rapport['workers']} workers, {rapport['seconds']} s")
+    print(f"{'action':28s} {'n':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    depassements = []
+    for action, r in rapport["actions"].items():
+        alerte = r["p95_ms"] > args.p95_budget_ms
+        if alerte:
+            depassements.append(action)
+        print(f"{action:28s} {r['n']:6d} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f} "
+              f"{r['max_ms']:9.1f}{'  > budget' if alerte else ''}")
+    print("écritures perdues :", rapport["lost"])
+    print("stockage :", rapport["storage"])
+    for e in rapport["errors"][:10]:
+        print("ERREUR", e)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**rapport, "p95_budget_ms": args.p95_budget_ms}, f, indent=2, ensure_ascii=False)
+
+    if depassements or rapport["errors"] or any(rapport["lost"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
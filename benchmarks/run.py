@@ -0,0 +1,318 @@
+"""
+Suite de benchmarks des chemins chauds des apps.
+
+    python -m benchmarks.run --restaurants 500 --users 2000 --days 90 --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 0.2
+
+Génère un jeu de données synthétique (voir benchmarks.generate) dans un
+dossier temporaire, y mesure chaque benchmark (médiane et minimum de
+plusieurs répétitions) et enregistre les résultats en JSON. Avec
+`--baseline`, chaque médiane est comparée à celle du fichier de référence :
+au-delà de `--threshold` (20 % par défaut) le benchmark est signalé comme
+une régression et le code de sortie vaut 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from benchmarks.generate import BOBUN_EXCEL, generate
+
+REPEAT = 7
+NOISE_FLOOR_MS = 0.05  # en dessous, les écarts sont du bruit de mesure
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Enregistre `setup(ctx) -> fonction à mesurer` sous `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def mesurer(fn, repeat: int = REPEAT) -> dict:
+    fn()  # échauffement (imports, caches de premier appel)
+    durees = []
+    for _ in range(repeat):
+        debut = time.perf_counter()
+        fn()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return {
+        "median_ms": round(statistics.median(durees), 4),
+        "min_ms": round(min(durees), 4),
+        "runs": repeat,
+    }
+
+
+# ==============================
+# Contexte partagé
+# ==============================
+
+class Contexte:
+    """Données et objets communs aux benchmarks (créés paresseusement)."""
+
+    def __init__(self):
+        self.today = date.today().isoformat()
+        self._cache = {}
+
+    def get(self, key, factory):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def storage(self):
+        from dejeuner.storage import CsvStorage
+        return self.get("storage", lambda: CsvStorage("data"))
+
+    @property
+    def lt_store(self):
+        from dejeuner.storage import JsonLunchTinderStore
+        return self.get("lt_store", lambda: JsonLunchTinderStore("lunch_tinder_data"))
+
+    @property
+    def catalogue(self):
+        from dejeuner.catalog import load_catalog
+        return self.get("catalogue", lambda: load_catalog("Restaurants.xlsx"))
+
+    @property
+    def engine(self):
+        from dejeuner.scoring import get_engine
+        return self.get("engine", lambda: get_engine("Restaurants.xlsx"))
+
+    @property
+    def tops_today(self):
+        return self.get("tops_today", lambda: self.storage.load_tops(self.today))
+
+    @property
+    def user_id(self):
+        return self.tops_today["user_id"].iloc[0]
+
+
+# ==============================
+# Benchmarks
+# ==============================
+
+@benchmark("catalogue.load_catalog_hot")
+def _(ctx):
+    from dejeuner.catalog import load_catalog
+    return lambda: load_catalog("Restaurants.xlsx")
+
+
+@benchmark("dejeuner.calculer_score_global")
+def _(ctx):
+    from dejeuner.scoring import score_global
+    df, engine = ctx.catalogue, ctx.engine
+    coeffs = {"distance": 7, "prix": 3, "quantite": 5, "gourmandise": 8}
+    sliders = {"chaleur": 8, "healthy": 2, "sandwich": 5}
+    masque = engine.masque(conventionnel=True, no_go=["Burger"])
+    return lambda: score_global(df, engine, coeffs, sliders, masque)
+
+
+@benchmark("dejeuner.calculer_similarites_hot")
+def _(ctx):
+    from dejeuner.similarity import get_similarites
+    tops, uid = ctx.tops_today, ctx.user_id
+    version = ("bench", ctx.today, ctx.storage.version("tops"))
+    return lambda: get_similarites(tops, "rang", version=version).voisins(uid)
+
+
+@benchmark("dejeuner.similarity_matrix_cold")
+def _(ctx):
+    from dejeuner.similarity import SimilarityMatrix
+    tops = ctx.tops_today
+    return lambda: SimilarityMatrix(tops, "rang")
+
+
+@benchmark("team.tops_du_jour_load")
+def _(ctx):
+    return lambda: ctx.storage.load_tops(ctx.today)
+
+
+@benchmark("team.consensus_cold")
+def _(ctx):
+    from dejeuner.consensus import ConsensusBoard
+    board = ConsensusBoard(ctx.storage.load_tops)
+
+    def run():
+        board.invalidate()
+        return board.classement(ctx.today)
+    return run
+
+
+@benchmark("team.utilites_equipe")
+def _(ctx):
+    from dejeuner.scoring import utilites_equipe
+    return lambda: utilites_equipe(ctx.engine, ctx.tops_today)
+
+
+@benchmark("team.heatmap")
+def _(ctx):
+    from dejeuner.consensus import matrice_preferences
+    return lambda: matrice_preferences(ctx.tops_today)
+
+
+def _vote(methode, source):
+    def setup(ctx):
+        from dejeuner.consensus import agreger, bulletins_top3, bulletins_utilites
+        from dejeuner.scoring import utilites_equipe
+        if source == "top3":
+            bulletins = bulletins_top3(ctx.tops_today)
+        else:
+            bulletins = bulletins_utilites(utilites_equipe(ctx.engine, ctx.tops_today))
+        return lambda: agreger(methode, *bulletins)
+    return setup
+
+
+for _methode in ("borda", "approbation", "schulze", "kemeny"):
+    for _source in ("top3", "sliders"):
+        benchmark(f"team.vote_{_methode}_{_source}")(_vote(_methode, _source))
+
+
+@benchmark("tinder.matches_tab_cold")
+def _(ctx):
+    from dejeuner.likers import LikersIndex
+    index = LikersIndex(ctx.storage.load_swipes)
+    uid = ctx.get("swiper", lambda: ctx.storage.load_swipes(ctx.today)["user_id"].iloc[0])
+
+    def run():
+        index.invalidate()
+        return index.matches(ctx.today, uid)
+    return run
+
+
+@benchmark("tinder.matches_tab_hot")
+def _(ctx):
+    from dejeuner.likers import get_likers_index
+    index = get_likers_index(ctx.storage)
+    uid = ctx.get("swiper", lambda: ctx.storage.load_swipes(ctx.today)["user_id"].iloc[0])
+    return lambda: index.matches(ctx.today, uid)
+
+
+@benchmark("tinder.append_swipe")
+def _(ctx):
+    row = {"date": ctx.today, "user_id": "bench bench", "prenom": "Bench", "nom": "Bench",
+           "restaurant": "Resto 0000", "decision": "like"}
+    return lambda: ctx.storage.append_swipe(row)
+
+
+@benchmark("tinder_v2.add_swipe")
+def _(ctx):
+    return lambda: ctx.lt_store.add_swipe(ctx.today, "bench", "Resto 0000", True)
+
+
+@benchmark("tinder_v2.get_matches")
+def _(ctx):
+    store = ctx.lt_store
+    user = next(iter(store.swipes_for_day(ctx.today)))
+    return lambda: store.matches(ctx.today, user, "Resto 0000")
+
+
+@benchmark("bobun.normalize_columns")
+def _(ctx):
+    from dejeuner.bobun import normalize_columns
+    from dejeuner.catalog import load_catalog
+    brut = load_catalog(BOBUN_EXCEL)
+    return lambda: normalize_columns(brut)
+
+
+@benchmark("bobun.calculer_scores")
+def _(ctx):
+    from dejeuner.bobun import calculer_scores, normalize_columns
+    from dejeuner.catalog import load_catalog
+    restos = normalize_columns(load_catalog(BOBUN_EXCEL))
+    return lambda: calculer_scores(restos, 7, 5, 3)
+
+
+# ==============================
+# Exécution et comparaison
+# ==============================
+
+def run(scale: dict, selection=None, repeat: int = REPEAT) -> dict:
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if repo not in sys.path:
+        sys.path.insert(0, repo)
+    cwd = os.getcwd()
+    data_dir = tempfile.mkdtemp(prefix="bench-data-")
+    try:
+        taille = generate(data_dir, **scale)
+        os.chdir(data_dir)
+        ctx = Contexte()
+        results = {}
+        for name, setup in BENCHMARKS.items():
+            if selection and not any(s in name for s in selection):
+                continue
+            results[name] = mesurer(setup(ctx), repeat)
+            print(f"{name:45s} {results[name]['median_ms']:10.3f} ms")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": taille,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Liste des régressions : (nom, médiane de référence, médiane actuelle, ratio)."""
+    regressions = []
+    for name, res in current["results"].items():
+        ref = baseline["results"].get(name)
+        if ref is None:
+            continue
+        avant, apres = ref["median_ms"], res["median_ms"]
+        if apres - avant > NOISE_FLOOR_MS and apres > avant * (1 + threshold):
+            regressions.append((name, avant, apres, apres / avant if avant else float("inf")))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins chauds des apps déjeuner.")
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", nargs="*", help="sous-chaînes des benchmarks à lancer")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="fichier JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="ralentissement toléré (0.2 = +20 %%)")
+    args = parser.parse_args()
+
+    scale = {"restaurants": args.restaurants, "users": args.users, "days": args.days, "seed": args.seed}
+    current = run(scale, args.only, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != current["meta"]["scale"]:
+            print("⚠️ Échelle différente de la référence : comparaison indicative.")
+        regressions = compare(current, baseline, args.threshold)
+        for name, avant, apres, ratio in regressions:
+            print(f"RÉGRESSION {name}: {avant:.3f} ms -> {apres:.3f} ms (x{ratio:.2f})")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression au-delà du seuil.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Temps d'import au démarrage des apps (premier écran).
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --apps app_dejeuner --top 15 --output startup.json
+
+Chaque app est importée dans un interpréteur neuf avec `python -X importtime` :
+le rapport donne le temps total, les modules les plus coûteux (temps cumulé,
+profondeur d'import limitée) et si pandas, numpy, plotly et openpyxl ont été
+chargés. Ils ne devraient pas l'être : dejeuner.lazy les diffère jusqu'au
+premier écran qui s'en sert.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+APPS = ["app_dejeuner", "app_tinder_resto", "app_tinder_resto_v2", "app_bobun"]
+HEAVY = ["pandas", "numpy", "plotly", "openpyxl", "matplotlib"]
+REPEAT = 3
+DEPTH = 2  # profondeur d'import affichée (1 = modules importés directement par l'app)
+
+
+def importtime(module: str, repo: str) -> list:
+    """[(self µs, cumulé µs, profondeur, nom)] pour `import module` dans un interpréteur neuf."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=repo, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": repo},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} impossible :\n{proc.stderr.strip().splitlines()[-1]}")
+    lignes = []
+    for ligne in proc.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        soi, cumul, nom = ligne[len("import time:"):].split("|")
+        # L'indentation du nom (2 espaces par niveau) donne la profondeur d'import
+        profondeur = (len(nom) - len(nom.lstrip()) - 1) // 2
+        lignes.append((int(soi), int(cumul), profondeur, nom.strip()))
+    return lignes
+
+
+def profil(module: str, repo: str, repeat: int = REPEAT, top: int = 10) -> dict:
+    mesures = [importtime(module, repo) for _ in range(repeat)]
+    # Rapport détaillé sur la mesure médiane (total le plus représentatif)
+    totaux = [sum(soi for soi, _, _, _ in m) / 1000 for m in mesures]
+    mediane = mesures[totaux.index(statistics.median_low(totaux))]
+    charges = {nom for _, _, _, nom in mediane}
+    modules = sorted(
+        ((nom, round(cumul / 1000, 1), profondeur) for _, cumul, profondeur, nom in mediane if profondeur <= DEPTH),
+        key=lambda m: -m[1],
+    )
+    return {
+        "total_ms": round(statistics.median(totaux), 1),
+        "min_ms": round(min(totaux), 1),
+        "modules": len(mediane),
+        "heavy": {nom: nom in charges for nom in HEAVY},
+        "top": [{"module": nom, "cumulative_ms": ms, "depth": p} for nom, ms, p in modules[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import au démarrage des apps déjeuner.")
+    parser.add_argument("--apps", nargs="*", default=APPS, help="modules d'app à importer")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--top", type=int, default=10, help="nombre de modules les plus coûteux affichés")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    args = parser.parse_args()
+
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for app in args.apps:
+        res = results[app] = profil(app, repo, args.repeat, args.top)
+        lourds = ", ".join(nom for nom, charge in res["heavy"].items() if charge) or "aucun"
+        print(f"{app}: {res['total_ms']:.1f} ms (min {res['min_ms']:.1f}), "
+              f"{res['modules']} modules, modules lourds chargés : {lourds}")
+        for m in res["top"]:
+            print(f"  {m['module']:45s} {m['cumulative_ms']:8.1f} ms  (profondeur {m['depth']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "repeat": args.repeat,
+                },
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
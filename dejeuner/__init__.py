@@ -0,0 +1,8 @@
+"""
+Cœur des apps Streamlit du déjeuner : stockage, scoring, similarité,
+consensus... Les apps (app_*.py) n'en sont que des vues.
+
+Aucun module du paquet n'importe streamlit, plotly ou openpyxl (lu
+seulement par pandas au premier chargement d'un Excel) : le cœur s'importe,
+se teste et se mesure sans lancer Streamlit.
+"""
@@ -0,0 +1,202 @@
+"""
+Archives mensuelles compressées de l'historique (tops, swipes).
+
+Les partitions par jour plus anciennes que la fenêtre de rétention
+(`DEJEUNER_RETENTION_DAYS`, 30 jours par défaut) sont déplacées dans
+`<racine>/<YYYY-MM>.jsonl.gz` : une ligne JSON par enregistrement, avec sa
+date. `index.json` liste les jours de chaque mois archivé, pour qu'une
+lecture d'un jour récent n'ouvre jamais d'archive. Les tables
+(dejeuner.partitions, dejeuner.shards) lisent archives et fichiers du jour
+ensemble : les vues d'historique ne voient pas la différence.
+
+Compaction en ligne de commande (backend fichiers) :
+    python -m dejeuner.archives            # fenêtre par défaut
+    python -m dejeuner.archives --days 60 --dry-run
+ou depuis l'espace admin des apps.
+
+Une compaction renomme d'abord les partitions concernées en
+`<jour>.<ext>.archiving` ; si elle est interrompue, les fichiers restants
+sont repris par la suivante.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+from dejeuner import locking
+
+RETENTION_DAYS = int(os.environ.get("DEJEUNER_RETENTION_DAYS", "30"))
+INDEX_FILENAME = "index.json"
+PENDING_SUFFIX = ".archiving"
+
+
+def cutoff(days: int = RETENTION_DAYS, today: date = None) -> str:
+    """Premier jour conservé dans les fichiers chauds (les jours antérieurs sont archivés)."""
+    return ((today or date.today()) - timedelta(days=days)).isoformat()
+
+
+class MonthlyArchive:
+    """Enregistrements (dicts avec un champ `date`) archivés par mois."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._index = None
+        self._version = None
+        self._lock = threading.RLock()
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.root, f"{month}.jsonl.gz")
+
+    # ------------------------------
+    # Index
+    # ------------------------------
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _idx(self) -> dict:
+        """{mois: [jours]} (relu seulement si index.json a changé)."""
+        version = locking.file_version(self.index_path)
+        with self._lock:
+            if self._index is None or version != self._version:
+                self._index = self._read_index()
+                self._version = version
+            return self._index
+
+    def version(self):
+        """Version de l'index : change à chaque écriture d'archive."""
+        return locking.file_version(self.index_path)
+
+    def days(self) -> list:
+        return sorted(d for jours in self._idx().values() for d in jours)
+
+    def __contains__(self, day) -> bool:
+        return isinstance(day, str) and day in self._idx().get(day[:7], ())
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+
+    def _read_month(self, month: str) -> list:
+        path = self._path(month)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def read_day(self, day: str) -> list:
+        if day not in self:
+            return []
+        return [r for r in self._read_month(day[:7]) if r.get("date") == day]
+
+    def read_all(self) -> list:
+        return [r for month in sorted(self._idx()) for r in self._read_month(month)]
+
+    # ------------------------------
+    # Écriture
+    # ------------------------------
+
+    def _write_month(self, month: str, records):
+        def ecrire(f):
+            with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                gz.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8"))
+
+        locking.atomic_write(self._path(month), ecrire, mode="wb")
+
+    def _write_index(self, index: dict):
+        index = {m: sorted(jours) for m, jours in sorted(index.items()) if jours}
+        locking.atomic_write(self.index_path, lambda f: json.dump(index, f, indent=1), encoding="utf-8")
+
+    def add(self, records):
+        """Ajoute des enregistrements aux archives de leurs mois (après ceux déjà archivés)."""
+        par_mois = {}
+        for r in records:
+            par_mois.setdefault(r["date"][:7], []).append(r)
+        if not par_mois:
+            return
+        with locking.file_lock(self.index_path), self._lock:
+            index = self._read_index()
+            for month, nouveaux in sorted(par_mois.items()):
+                self._write_month(month, self._read_month(month) + nouveaux)
+                index[month] = sorted(set(index.get(month, [])) | {r["date"] for r in nouveaux})
+            self._write_index(index)
+
+    def filter(self, keep, day: str = None):
+        """Ne garde que les enregistrements où `keep(r)` est vrai (d'un jour, ou de tous)."""
+        with locking.file_lock(self.index_path), self._lock:
+            index = self._read_index()
+            months = [day[:7]] if day is not None else list(index)
+            changed = False
+            for month in months:
+                if month not in index:
+                    continue
+                records = self._read_month(month)
+                kept = [r for r in records if (day is not None and r.get("date") != day) or keep(r)]
+                if len(kept) == len(records):
+                    continue
+                changed = True
+                index[month] = sorted({r["date"] for r in kept})
+                if kept:
+                    self._write_month(month, kept)
+                else:
+                    locking.remove(self._path(month))
+            if changed:
+                self._write_index(index)
+
+    def drop_day(self, day: str):
+        if day in self:
+            self.filter(lambda r: False, day=day)
+
+    def clear(self):
+        with locking.file_lock(self.index_path), self._lock:
+            for month in self._read_index():
+                locking.remove(self._path(month))
+            if os.path.exists(self.index_path):
+                self._write_index({})
+
+
+def pending(root: str, ext: str) -> dict:
+    """Partitions en cours d'archivage laissées par une compaction interrompue : {jour: chemin}."""
+    if not os.path.isdir(root):
+        return {}
+    suffixe = ext + PENDING_SUFFIX
+    return {f[: -len(suffixe)]: os.path.join(root, f) for f in os.listdir(root) if f.endswith(suffixe)}
+
+
+# ==============================
+# Ligne de commande
+# ==============================
+
+def compact_all(days: int = RETENTION_DAYS, dry_run: bool = False) -> dict:
+    """Archive les jours antérieurs à la fenêtre, pour tous les stores fichiers."""
+    from dejeuner.storage import get_lunch_tinder_store, get_storage
+
+    avant = cutoff(days)
+    return {
+        "dejeuner": get_storage().compact(avant, dry_run=dry_run),
+        "lunch_tinder": get_lunch_tinder_store().compact(avant, dry_run=dry_run),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive l'historique ancien des tops et swipes.")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="jours gardés dans les fichiers chauds")
+    parser.add_argument("--dry-run", action="store_true", help="affiche ce qui serait archivé sans rien déplacer")
+    args = parser.parse_args(argv)
+
+    print(f"Archivage des jours antérieurs au {cutoff(args.days)}{' (simulation)' if args.dry_run else ''}")
+    for store, tables in compact_all(args.days, dry_run=args.dry_run).items():
+        for table, jours in tables.items():
+            etendue = f" ({jours[0]} → {jours[-1]})" if jours else ""
+            print(f"  {store}.{table} : {len(jours)} jour(s){etendue}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cœur de app_bobun : normalisation de la base Excel et scoring des restos.
+
+Aucune dépendance à Streamlit.
+"""
+
+from __future__ import annotations
+
+from dejeuner.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Base intégrée, utilisée si le fichier Excel est absent ou illisible
+_BASE_INTEGREE = {
+    "nom": ["Pho 11", "L'othentique Vietnam", "Banemi", "Song Heng", "Le petit Cambodge", "James Bun", "Entre 2 rives"],
+    "temps_trajet": [12, 13, 18, 14, 13, 7, 10],
+    "note": [3.8, 4.6, 4.6, 4.5, 4.8, 4.4, 4.5],
+    "prix": [11.80, 15.00, 14.90, 13.00, 15.50, 14.50, 14.00],
+}
+
+
+def default_restos() -> pd.DataFrame:
+    """Base intégrée (construite à la demande : importer le module ne charge pas pandas)."""
+    return pd.DataFrame(_BASE_INTEGREE)
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit une base Excel avec colonnes:
+    - Restaurant
+    - Temps de trajet
+    - Note
+    - Prix
+    vers les noms internes:
+    - nom, temps_trajet, note, prix
+    Tolère quelques variantes (espaces, underscore, casse).
+    """
+    df = df.copy()
+
+    # Nettoyage des noms de colonnes
+    df.columns = [str(c).strip() for c in df.columns]
+
+    # Mapping tolérant
+    mapping = {}
+    for c in df.columns:
+        key = c.strip().lower().replace("_", " ")
+        key = " ".join(key.split())  # espaces multiples -> un seul
+
+        if key in ["restaurant", "resto", "nom", "name"]:
+            mapping[c] = "nom"
+        elif key in ["temps de trajet", "temps trajet", "trajet", "temps", "tps trajet", "tps de trajet"]:
+            mapping[c] = "temps_trajet"
+        elif key in ["note", "rating", "score", "avis"]:
+            mapping[c] = "note"
+        elif key in ["prix", "price", "tarif", "cout", "coût"]:
+            mapping[c] = "prix"
+
+    df = df.rename(columns=mapping)
+
+    required = ["nom", "temps_trajet", "note", "prix"]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes: {missing}. Colonnes détectées: {list(df.columns)}")
+
+    # Cast types
+    df["nom"] = df["nom"].astype(str).str.strip()
+    df["temps_trajet"] = pd.to_numeric(df["temps_trajet"], errors="coerce")
+    df["note"] = pd.to_numeric(df["note"], errors="coerce")
+    df["prix"] = pd.to_numeric(df["prix"], errors="coerce")
+
+    # On drop ce qui est incomplet
+    df = df.dropna(subset=required)
+
+    # Un peu de ménage
+    df = df[df["nom"] != ""]
+    return df
+
+
+def safe_norm(series: pd.Series, invert: bool = False) -> pd.Series:
+    """Normalise en [0,1]. Si constante => 1 partout. invert=True => 1 - norm."""
+    mn, mx = series.min(), series.max()
+    if pd.isna(mn) or pd.isna(mx):
+        out = pd.Series([0.0] * len(series), index=series.index)
+    elif mx == mn:
+        out = pd.Series([1.0] * len(series), index=series.index)
+    else:
+        out = (series - mn) / (mx - mn)
+
+    return 1 - out if invert else out
+
+
+def calculer_scores(df: pd.DataFrame, w_temps: float, w_note: float, w_prix: float) -> pd.DataFrame:
+    df = df.copy()
+
+    # Scores critères (0..1)
+    df["score_temps"] = safe_norm(df["temps_trajet"], invert=True)  # moins = mieux
+    df["score_note"] = safe_norm(df["note"], invert=False)         # plus = mieux
+    df["score_prix"] = safe_norm(df["prix"], invert=True)          # moins = mieux
+
+    total_weight = w_temps + w_note + w_prix
+    if total_weight == 0:
+        w_temps = w_note = w_prix = 1
+        total_weight = 3
+
+    df["score_final"] = (
+        df["score_temps"] * w_temps +
+        df["score_note"] * w_note +
+        df["score_prix"] * w_prix
+    ) / total_weight * 100
+
+    return df.sort_values("score_final", ascending=False)
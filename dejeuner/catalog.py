@@ -0,0 +1,137 @@
+"""
+Cache partagé des catalogues Excel (Restaurants.xlsx, benchmark bobun...).
+
+Le classeur n'est parsé (openpyxl) qu'une fois par version du fichier :
+  - en mémoire, pour tout le processus, clé = (mtime, taille) du fichier ;
+  - sur disque, dans un pickle voisin (`<fichier>.cache.pkl`) qui permet un
+    démarrage à chaud sans openpyxl. Si le mtime a bougé sans que le contenu
+    change (copie, touch), le hash SHA-1 évite de reparser.
+Remplacer le fichier Excel suffit : la version suivante est rechargée au
+prochain appel.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+
+from dejeuner.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+SIDECAR_SUFFIX = ".cache.pkl"
+SIDECAR_FORMAT = 1
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CatalogCache:
+    """Cache d'un classeur Excel, invalidé quand le fichier change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sidecar_path = path + SIDECAR_SUFFIX
+        self._stamp = None  # (mtime_ns, taille) de la version en mémoire
+        self._hash = None
+        self._df = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self) -> pd.DataFrame:
+        """Retourne le catalogue (copie, les appelants peuvent la modifier)."""
+        return self.snapshot()[1].copy()
+
+    def snapshot(self):
+        """(version, DataFrame partagé) : le DataFrame ne doit pas être modifié."""
+        info = os.stat(self.path)  # FileNotFoundError si le classeur a disparu
+        stamp = (info.st_mtime_ns, info.st_size)
+        with self._lock:
+            if self._df is None or stamp != self._stamp:
+                self.misses += 1
+                self._reload(stamp)
+            else:
+                self.hits += 1
+            return self._stamp, self._df
+
+    def _reload(self, stamp):
+        sidecar = self._read_sidecar()
+        if sidecar is not None and tuple(sidecar["stamp"]) == stamp:
+            self._set(stamp, sidecar["hash"], sidecar["df"])
+            return
+
+        digest = _file_hash(self.path)
+        if sidecar is not None and sidecar["hash"] == digest:
+            df = sidecar["df"]
+        elif self._df is not None and self._hash == digest:
+            df = self._df
+        else:
+            df = pd.read_excel(self.path)
+        self._set(stamp, digest, df)
+        self._write_sidecar()
+
+    def _set(self, stamp, digest, df):
+        self._stamp = stamp
+        self._hash = digest
+        self._df = df
+
+    def _read_sidecar(self):
+        try:
+            with open(self.sidecar_path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != SIDECAR_FORMAT:
+            return None
+        return data
+
+    def _write_sidecar(self):
+        data = {"format": SIDECAR_FORMAT, "stamp": self._stamp, "hash": self._hash, "df": self._df}
+        tmp = f"{self.sidecar_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.sidecar_path)
+        except OSError:
+            # Dossier en lecture seule : on garde juste le cache mémoire
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_catalog_cache(path: str) -> CatalogCache:
+    key = os.path.abspath(path)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = CatalogCache(path)
+            _CACHES[key] = cache
+        return cache
+
+
+def all_catalog_caches() -> list:
+    """Caches de catalogue ouverts par le processus (métriques)."""
+    with _CACHES_LOCK:
+        return list(_CACHES.values())
+
+
+def load_catalog(path: str) -> pd.DataFrame:
+    """Équivalent de `pd.read_excel(path)`, parsé une seule fois par version du fichier."""
+    return get_catalog_cache(path).get()
+
+
+def load_catalog_snapshot(path: str):
+    """(version, copie du catalogue) : la version change avec le fichier (voir `sync_restaurants`)."""
+    version, df = get_catalog_cache(path).snapshot()
+    return version, df.copy()
@@ -0,0 +1,315 @@
+"""
+Classement de consensus du jour (app_dejeuner, onglet « Vue d'équipe »).
+
+Chaque top 3 rapporte 3/2/1 points à ses restaurants. Le classement d'un
+jour est construit une fois à partir des tops stockés, puis tenu à jour à
+chaque top enregistré ou remplacé : on retire l'ancien bulletin de la
+personne et on ajoute le nouveau (au plus 6 mises à jour). Score, nombre de
+votants et liste des votants de chaque restaurant sont donc toujours prêts.
+Le classement est partagé par toutes les sessions du processus ; chaque jour
+retient la version des tops (voir dejeuner.versions) sur laquelle il a été
+construit, et il est relu quand un autre processus la fait avancer.
+
+D'autres méthodes d'agrégation (Borda complet, approbation, Schulze,
+approximation de Kemeny) sont disponibles plus bas. Elles travaillent sur une
+matrice de bulletins (votants × restaurants, plus haut = préféré), issue des
+top 3 ou des classements complets calculés depuis les sliders, et sur la
+matrice des duels D[a, b] = nombre de votants préférant a à b.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from dejeuner.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+COLONNES_TOP = ["Restau_1", "Restau_2", "Restau_3"]
+POIDS = (3, 2, 1)
+MAX_JOURS = 3  # jours gardés en mémoire
+
+
+def bulletin(row: dict) -> tuple:
+    """Restaurants (nettoyés) d'un top 3, dans l'ordre, sans les cases vides."""
+    restos = []
+    for col in COLONNES_TOP:
+        resto = row.get(col)
+        if isinstance(resto, str) and resto.strip():
+            restos.append(resto.strip())
+        else:
+            restos.append(None)
+    return tuple(restos)
+
+
+class _Jour:
+    def __init__(self, version=None):
+        self.version = version  # version des tops reflétée par le classement
+        self.personnes = {}  # user_id -> (prénom, nom, bulletin), dans l'ordre des tops
+        self.scores = {}     # restaurant -> points
+        self.votants = {}    # restaurant -> {user_id: points}
+
+    def retirer(self, user_id):
+        ancien = self.personnes.pop(user_id, None)
+        if ancien is None:
+            return
+        for resto, poids in zip(ancien[2], POIDS):
+            if resto is None:
+                continue
+            self.scores[resto] -= poids
+            votants = self.votants[resto]
+            votants.pop(user_id, None)
+            if not votants:
+                del self.votants[resto]
+                del self.scores[resto]
+
+    def ajouter(self, row):
+        user_id = row["user_id"]
+        self.retirer(user_id)
+        restos = bulletin(row)
+        self.personnes[user_id] = (row.get("prenom"), row.get("nom"), restos)
+        for resto, poids in zip(restos, POIDS):
+            if resto is None:
+                continue
+            self.scores[resto] = self.scores.get(resto, 0) + poids
+            self.votants.setdefault(resto, {})[user_id] = poids
+
+
+class ConsensusBoard:
+    """
+    `load_day(jour)` doit renvoyer le DataFrame des tops de ce jour ;
+    `version()` (optionnel) la version courante des tops, tous processus confondus.
+    Les user_id de `exclure` (en minuscules, ex. l'admin) ne votent pas.
+    """
+
+    def __init__(self, load_day, exclure=(), version=None):
+        self._load_day = load_day
+        self._version = version
+        self._exclure = {u.lower() for u in exclure}
+        self._jours = {}
+        self._lock = threading.RLock()
+
+    def _exclu(self, user_id) -> bool:
+        return str(user_id).lower() in self._exclure
+
+    def _version_courante(self):
+        return self._version() if self._version is not None else None
+
+    def _jour(self, day) -> _Jour:
+        with self._lock:
+            # Version lue avant le chargement : une écriture concurrente la fera avancer
+            version = self._version_courante()
+            jour = self._jours.get(day)
+            if jour is None or jour.version != version:
+                jour = _Jour(version)
+                for row in self._load_day(day).to_dict("records"):
+                    if not self._exclu(row["user_id"]):
+                        jour.ajouter(row)
+                self._jours[day] = jour
+                for ancien in sorted(self._jours)[:-MAX_JOURS]:
+                    del self._jours[ancien]
+            return jour
+
+    # ------------------------------
+    # Lectures
+    # ------------------------------
+
+    def classement(self, day) -> pd.DataFrame:
+        """Restaurant, Score_consensus, Nb_personnes ; du plus consensuel au moins consensuel."""
+        with self._lock:
+            jour = self._jour(day)
+            lignes = [(r, s, len(jour.votants[r])) for r, s in jour.scores.items()]
+        df = pd.DataFrame(lignes, columns=["Restaurant", "Score_consensus", "Nb_personnes"])
+        return df.sort_values(["Score_consensus", "Nb_personnes"], ascending=False, kind="stable")
+
+    def score(self, day, restaurant) -> int:
+        with self._lock:
+            return self._jour(day).scores.get(restaurant, 0)
+
+    def votants(self, day, restaurant) -> list:
+        """[{user_id, prenom, nom, points}] des personnes ayant `restaurant` dans leur top 3."""
+        with self._lock:
+            jour = self._jour(day)
+            return [
+                {"user_id": uid, "prenom": jour.personnes[uid][0], "nom": jour.personnes[uid][1], "points": pts}
+                for uid, pts in jour.votants.get(restaurant, {}).items()
+            ]
+
+    def nb_votants(self, day) -> int:
+        with self._lock:
+            return len(self._jour(day).personnes)
+
+    # ------------------------------
+    # Mises à jour
+    # ------------------------------
+
+    def record(self, row: dict):
+        """À appeler après chaque top enregistré (ou remplacé)."""
+        if self._exclu(row["user_id"]):
+            return
+        with self._lock:
+            jour = self._jours.get(row.get("date"))
+            if jour is not None:
+                jour.ajouter(row)
+                # À jour seulement si ce top est la seule écriture depuis la version du jour
+                version = self._version_courante()
+                if version is not None and jour.version is not None and version == jour.version + 1:
+                    jour.version = version
+
+    def invalidate(self, day=None):
+        """À appeler après une suppression : le jour (ou tout) sera reconstruit à la prochaine lecture."""
+        with self._lock:
+            if day is None:
+                self._jours.clear()
+            else:
+                self._jours.pop(day, None)
+
+
+def matrice_preferences(tops_df: pd.DataFrame):
+    """Matrice Personne × Restaurant des poids 3/2/1 (None si aucun top exploitable)."""
+    records = []
+    for row in tops_df.to_dict("records"):
+        label = f"{row['prenom']} {row['nom']}"
+        for col, weight in zip(COLONNES_TOP, POIDS):
+            resto = row[col]
+            if not isinstance(resto, str) or resto.strip() == "":
+                continue
+            records.append(
+                {"Personne": label, "Restaurant": resto.strip(), "Poids": weight}
+            )
+
+    if not records:
+        return None
+    df_long = pd.DataFrame(records)
+    return df_long.pivot_table(
+        index="Personne",
+        columns="Restaurant",
+        values="Poids",
+        aggfunc="sum",
+        fill_value=0,
+    )
+
+
+_BOARDS = {}
+_BOARDS_LOCK = threading.Lock()
+
+
+def get_consensus_board(storage, exclure=()) -> ConsensusBoard:
+    """Classement partagé associé à un objet de stockage (voir dejeuner.storage)."""
+    with _BOARDS_LOCK:
+        board = _BOARDS.get(id(storage))
+        if board is None:
+            board = ConsensusBoard(storage.load_tops, exclure, lambda: storage.version("tops"))
+            _BOARDS[id(storage)] = board
+        return board
+
+
+# ==============================
+# Méthodes d'agrégation des classements
+# ==============================
+
+BLOC_DUELS = 20_000_000  # cases (votants × m × m) comparées par bloc
+
+
+def bulletins_top3(tops_df: pd.DataFrame):
+    """(noms des restaurants cités, bulletins votants × restaurants en points 3/2/1, 0 = non cité)."""
+    colonnes = {}
+    lignes = []
+    for row in tops_df.to_dict("records"):
+        lignes.append([(colonnes.setdefault(r, len(colonnes)), p) for r, p in zip(bulletin(row), POIDS) if r])
+    bulletins = np.zeros((len(lignes), len(colonnes)), dtype=np.float32)
+    for i, ligne in enumerate(lignes):
+        for j, points in ligne:
+            bulletins[i, j] = max(bulletins[i, j], points)
+    return np.array(list(colonnes), dtype=object), bulletins
+
+
+def bulletins_utilites(utilites: pd.DataFrame):
+    """(noms, bulletins) à partir de la matrice d'utilité (voir dejeuner.scoring.utilites_equipe)."""
+    return utilites.columns.to_numpy(dtype=object), utilites.to_numpy(dtype=np.float32)
+
+
+def matrice_duels(bulletins: np.ndarray) -> np.ndarray:
+    """D[a, b] = nombre de votants qui préfèrent strictement a à b (comparaisons vectorisées par blocs)."""
+    n, m = bulletins.shape
+    duels = np.zeros((m, m), dtype=np.int32)
+    bloc = max(1, BLOC_DUELS // max(1, m * m))
+    for debut in range(0, n, bloc):
+        b = bulletins[debut : debut + bloc]
+        duels += (b[:, :, None] > b[:, None, :]).sum(axis=0, dtype=np.int32)
+    return duels
+
+
+def borda(bulletins, duels) -> np.ndarray:
+    """Borda complet : nombre total d'adversaires battus dans les bulletins (ex æquo = 0)."""
+    return duels.sum(axis=1).astype(np.float64)
+
+
+def approbation(bulletins, duels, k: int = 3) -> np.ndarray:
+    """Chaque votant approuve ses `k` restaurants préférés (parmi ceux de valeur > 0, i.e. cités)."""
+    k = min(k, bulletins.shape[1])
+    approuves = np.zeros(bulletins.shape, dtype=bool)
+    if k == 0:
+        return approuves.sum(axis=0).astype(np.float64)
+    meilleurs = np.argpartition(-bulletins, k - 1, axis=1)[:, :k]
+    np.put_along_axis(approuves, meilleurs, True, axis=1)
+    approuves &= bulletins > 0
+    return approuves.sum(axis=0).astype(np.float64)
+
+
+def schulze(bulletins, duels) -> np.ndarray:
+    """Méthode de Schulze : nombre d'adversaires battus par le chemin le plus fort (Floyd-Warshall vectorisé)."""
+    chemins = np.where(duels > duels.T, duels, 0)
+    for k in range(duels.shape[0]):
+        np.maximum(chemins, np.minimum(chemins[:, k : k + 1], chemins[k : k + 1, :]), out=chemins)
+    return (chemins > chemins.T).sum(axis=1).astype(np.float64)
+
+
+def kemeny(bulletins, duels, max_iter: int = None) -> np.ndarray:
+    """
+    Approximation de Kemeny par recherche locale : on part de l'ordre de
+    Borda et on déplace à chaque tour le restaurant dont le déplacement
+    (vers n'importe quelle position) gagne le plus d'accords par paire,
+    jusqu'à ce qu'aucun déplacement n'améliore. Score = m - position.
+    """
+    m = duels.shape[0]
+    ordre = np.argsort(-borda(bulletins, duels), kind="stable")
+    max_iter = 20 * m if max_iter is None else max_iter
+    for _ in range(max_iter):
+        marge = (duels - duels.T)[np.ix_(ordre, ordre)].astype(np.int64)
+        # cumul[p, j] = Σ_{i<j} marge[p, i]
+        cumul = np.zeros((m, m + 1), dtype=np.int64)
+        np.cumsum(marge, axis=1, out=cumul[:, 1:])
+        pos = np.arange(m)
+        diag = cumul[pos, pos][:, None]
+        gains = np.where(
+            pos[None, :] < pos[:, None],
+            diag - cumul[:, :m],                          # p remonte en q : il passe devant ordre[q..p-1]
+            -(cumul[:, 1:] - cumul[pos, pos + 1][:, None]),  # p descend en q : il passe derrière ordre[p+1..q]
+        )
+        p, q = np.unravel_index(np.argmax(gains), gains.shape)
+        if gains[p, q] <= 0:
+            break
+        ordre = np.insert(np.delete(ordre, p), q, ordre[p])
+    scores = np.empty(m)
+    scores[ordre] = m - np.arange(m)
+    return scores
+
+
+METHODES = {
+    "borda": borda,
+    "approbation": approbation,
+    "schulze": schulze,
+    "kemeny": kemeny,
+}
+
+
+def agreger(methode: str, noms, bulletins: np.ndarray) -> pd.DataFrame:
+    """Restaurant, Score : classement collectif selon `methode` (voir METHODES), du premier au dernier."""
+    if methode not in METHODES:
+        raise ValueError(f"Méthode de vote inconnue: {methode!r} (attendu: {tuple(METHODES)})")
+    duels = matrice_duels(bulletins)
+    scores = METHODES[methode](bulletins, duels)
+    df = pd.DataFrame({"Restaurant": noms, "Score": scores})
+    return df.sort_values("Score", ascending=False, kind="stable")
@@ -0,0 +1,101 @@
+"""
+Journal CSV en ajout seul (append-only).
+
+Un enregistrement = une ligne ajoutée en fin de fichier, sans relire ni
+réécrire l'historique. Le fichier reste un CSV classique (même en-tête,
+même encodage que `DataFrame.to_csv`), donc lisible par `pd.read_csv`.
+Ajouts et réécritures prennent le verrou inter-processus du fichier, et une
+réécriture remplace le fichier d'un coup (voir dejeuner.locking).
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import time
+
+from dejeuner import locking
+from dejeuner.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Politiques de fsync après un ajout
+FSYNC_ALWAYS = "always"      # fsync à chaque ajout (aucune perte possible)
+FSYNC_INTERVAL = "interval"  # au plus un fsync toutes les `fsync_interval` secondes
+FSYNC_NEVER = "never"        # on laisse l'OS vider ses buffers
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER)
+
+
+class Journal:
+    """Fichier CSV dans lequel on ajoute des lignes une par une."""
+
+    def __init__(self, path: str, columns, fsync: str = FSYNC_ALWAYS, fsync_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync!r} (attendu: {FSYNC_POLICIES})")
+        self.path = path
+        self.columns = list(columns)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+        self._entete = (None, None)  # (inode, colonnes) du fichier existant
+
+    def _should_fsync(self) -> bool:
+        if self.fsync == FSYNC_ALWAYS:
+            return True
+        if self.fsync == FSYNC_INTERVAL:
+            return time.monotonic() - self._last_fsync >= self.fsync_interval
+        return False
+
+    def append(self, record: dict):
+        """Ajoute un enregistrement (les colonnes absentes sont laissées vides)."""
+        self.append_many([record])
+
+    def _colonnes_du_fichier(self, inode) -> list:
+        """En-tête du fichier existant (relu seulement si le fichier a été remplacé)."""
+        if self._entete[0] != inode:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                self._entete = (inode, next(csv.reader(f), self.columns))
+        return self._entete[1]
+
+    def append_many(self, records):
+        """
+        Ajoute plusieurs enregistrements en une seule écriture. Un fichier
+        existant garde son en-tête (écrit avec d'anciennes colonnes) : les
+        champs absents de l'en-tête sont ignorés.
+        """
+        records = list(records)
+        if not records:
+            return
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        with locking.file_lock(self.path):
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                if f.tell() == 0:
+                    writer.writerow(self.columns)
+                    columns = self.columns
+                else:
+                    columns = self._colonnes_du_fichier(os.fstat(f.fileno()).st_ino)
+                for record in records:
+                    writer.writerow(["" if record.get(c) is None else record.get(c) for c in columns])
+                f.flush()
+                if self._should_fsync():
+                    os.fsync(f.fileno())
+                    self._last_fsync = time.monotonic()
+
+    def read(self) -> pd.DataFrame:
+        """Reconstruit le DataFrame à partir du journal."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return pd.DataFrame(columns=self.columns)
+        df = pd.read_csv(self.path, dtype=str)
+        for c in self.columns:
+            if c not in df.columns:
+                df[c] = pd.NA
+        return df
+
+    def rewrite(self, df: pd.DataFrame):
+        """Réécrit tout le journal (réservé aux suppressions, rares)."""
+        with locking.file_lock(self.path):
+            locking.atomic_write(self.path, lambda f: df.to_csv(f, index=False), newline="", encoding="utf-8")
@@ -0,0 +1,70 @@
+"""
+Imports différés des modules lourds (pandas, numpy...).
+
+    pd = lazy_import("pandas")
+
+`pd` est un module intermédiaire : le vrai `import pandas` n'a lieu qu'au
+premier accès à un attribut (`pd.DataFrame`...), puis ses attributs sont
+recopiés et servis directement. Un écran qui n'en a pas besoin (connexion)
+s'affiche donc sans payer l'import. Les modules qui s'en servent déclarent
+`from __future__ import annotations`, pour que les annotations
+`-> pd.DataFrame` ne déclenchent pas l'import à la définition.
+
+`prefetch("pandas", "numpy")` les importe dans un thread d'arrière-plan,
+pendant que l'utilisateur remplit l'écran de connexion.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import types
+
+logger = logging.getLogger(__name__)
+
+
+class _LazyModule(types.ModuleType):
+    def _charger(self):
+        # import_module est thread-safe (verrou par module de l'import system)
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr):
+        # Appelé seulement pour un attribut absent : avant le chargement, ou
+        # pour un sous-module importé après coup
+        return getattr(self._charger(), attr)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Le module `name`, importé au premier accès à l'un de ses attributs."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
+
+
+def loaded(name: str) -> bool:
+    """Vrai si `name` a réellement été importé dans ce processus."""
+    return name in sys.modules
+
+
+_prefetched = set()
+_prefetch_lock = threading.Lock()
+
+
+def _importer(names):
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.warning("préchargement : module %s indisponible", name)
+
+
+def prefetch(*names: str):
+    """Importe `names` en arrière-plan (une fois par processus et par module)."""
+    with _prefetch_lock:
+        names = [n for n in names if n not in _prefetched and not loaded(n)]
+        _prefetched.update(names)
+    if names:
+        threading.Thread(target=_importer, args=(names,), name="prefetch", daemon=True).start()
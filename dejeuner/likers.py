@@ -0,0 +1,135 @@
+"""
+Index inversé (jour, restaurant) -> personnes qui l'ont liké.
+
+Construit une fois par jour à partir des swipes stockés, puis tenu à jour à
+chaque swipe : « qui a liké ce resto aujourd'hui ? » devient une lecture de
+dictionnaire, et les matchs d'une personne se calculent en O(ses likes).
+L'index est partagé par toutes les sessions du processus. Chaque jour retient
+la version des swipes (voir dejeuner.versions) sur laquelle il a été
+construit : une écriture d'un autre processus la fait avancer, et le jour est
+relu à la lecture suivante.
+"""
+
+import threading
+
+LIKE = "like"
+MAX_JOURS = 3  # jours gardés en mémoire (aujourd'hui et les précédents récents)
+
+
+class _Jour:
+    def __init__(self, version=None):
+        self.version = version  # version des swipes reflétée par l'index
+        self.likers = {}  # restaurant -> {user_id: "Prénom Nom"}
+        self.likes = {}   # user_id -> {restaurant: None}, dans l'ordre des likes
+
+    def ajouter(self, user_id, nom_complet, restaurant):
+        self.likers.setdefault(restaurant, {})[user_id] = nom_complet
+        self.likes.setdefault(user_id, {})[restaurant] = None
+
+
+class LikersIndex:
+    """
+    `load_day(jour)` doit renvoyer le DataFrame des swipes de ce jour ;
+    `version()` (optionnel) la version courante des swipes, tous processus confondus.
+    """
+
+    def __init__(self, load_day, version=None):
+        self._load_day = load_day
+        self._version = version
+        self._jours = {}
+        self._lock = threading.RLock()
+
+    def _version_courante(self):
+        return self._version() if self._version is not None else None
+
+    def _jour(self, day) -> _Jour:
+        with self._lock:
+            # Version lue avant le chargement : une écriture concurrente la fera avancer
+            version = self._version_courante()
+            jour = self._jours.get(day)
+            if jour is None or jour.version != version:
+                jour = _Jour(version)
+                for row in self._load_day(day).to_dict("records"):
+                    if row.get("decision") == LIKE:
+                        jour.ajouter(row["user_id"], _nom_complet(row), row["restaurant"])
+                self._jours[day] = jour
+                for ancien in sorted(self._jours)[:-MAX_JOURS]:
+                    del self._jours[ancien]
+            return jour
+
+    # ------------------------------
+    # Lectures
+    # ------------------------------
+
+    def preload(self, day):
+        """Charge l'index d'un jour (échauffement, voir dejeuner.warmup)."""
+        self._jour(day)
+
+    def likers(self, day, restaurant, exclude=None) -> dict:
+        """{user_id: "Prénom Nom"} des personnes ayant liké `restaurant` ce jour-là."""
+        with self._lock:
+            likers = dict(self._jour(day).likers.get(restaurant, {}))
+        likers.pop(exclude, None)
+        return likers
+
+    def likes(self, day, user_id) -> list:
+        """Restaurants likés par `user_id` ce jour-là, dans l'ordre des likes."""
+        with self._lock:
+            return list(self._jour(day).likes.get(user_id, {}))
+
+    def matches(self, day, user_id) -> dict:
+        """{restaurant: {user_id: nom}} des restos likés par `user_id` et par d'autres (ordre des likes)."""
+        with self._lock:
+            jour = self._jour(day)
+            result = {}
+            for restaurant in jour.likes.get(user_id, {}):
+                others = {u: n for u, n in jour.likers.get(restaurant, {}).items() if u != user_id}
+                if others:
+                    result[restaurant] = others
+            return result
+
+    # ------------------------------
+    # Mises à jour
+    # ------------------------------
+
+    def record(self, row: dict):
+        """À appeler après chaque swipe enregistré."""
+        if row.get("decision") != LIKE:
+            return
+        with self._lock:
+            jour = self._jours.get(row["date"])
+            if jour is not None:
+                jour.ajouter(row["user_id"], _nom_complet(row), row["restaurant"])
+                _suivre(jour, self._version_courante())
+
+    def invalidate(self, day=None):
+        """À appeler après une suppression : le jour (ou tout) sera reconstruit à la prochaine lecture."""
+        with self._lock:
+            if day is None:
+                self._jours.clear()
+            else:
+                self._jours.pop(day, None)
+
+
+def _nom_complet(row) -> str:
+    return f"{row.get('prenom')} {row.get('nom')}"
+
+
+def _suivre(jour: _Jour, version):
+    """Après un ajout local : le jour reste à jour si ce swipe est la seule écriture depuis sa version."""
+    if version is not None and jour.version is not None and version == jour.version + 1:
+        jour.version = version
+
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_likers_index(storage) -> LikersIndex:
+    """Index partagé associé à un objet de stockage (voir dejeuner.storage)."""
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(id(storage))
+        if index is None:
+            index = LikersIndex(storage.load_swipes, lambda: storage.version("swipes"))
+            _INDEXES[id(storage)] = index
+        return index
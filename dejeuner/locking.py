@@ -0,0 +1,201 @@
+"""
+Écritures sûres en concurrence pour les fichiers de données (CSV, JSON).
+
+Trois briques :
+  - `FileLock` : verrou inter-processus (fichier `<chemin>.lock`, flock sous
+    Unix, msvcrt sous Windows) ; tous les écrivains d'un même fichier le
+    prennent, qu'ils ajoutent une ligne ou réécrivent le fichier ;
+  - `atomic_write` : écriture dans un fichier temporaire voisin puis
+    `os.replace`, un lecteur voit donc l'ancienne ou la nouvelle version,
+    jamais un fichier à moitié écrit ;
+  - `update` : lecture-modification-écriture optimiste. On lit et on calcule
+    sans verrou, puis on n'écrit (sous verrou) que si le fichier n'a pas
+    changé entre-temps ; sinon on recommence après une courte pause
+    aléatoire. Après `MAX_RETRIES` conflits, on refait tout sous verrou pour
+    garantir la progression.
+"""
+
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = ".lock"
+MAX_RETRIES = 3
+BACKOFF = 0.005  # secondes, doublé à chaque conflit (avec gigue)
+
+# Compteurs du processus (benchmarks, diagnostic)
+stats = {"commits": 0, "conflicts": 0, "fallbacks": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str):
+    with _stats_lock:
+        stats[key] += 1
+
+
+class FileLock:
+    """Verrou exclusif inter-processus (et inter-threads) associé à un fichier de données."""
+
+    def __init__(self, path: str):
+        self.path = path + LOCK_SUFFIX
+        self._local = threading.local()
+
+    def __enter__(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            f = open(self.path, "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:  # LK_LOCK abandonne après ~10 s
+                            continue
+            except BaseException:
+                f.close()
+                raise
+            self._local.file = f
+        self._local.depth = depth + 1  # réentrant dans un même thread
+        return self
+
+    def __exit__(self, *exc):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            f = self._local.file
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                f.close()
+                self._local.file = None
+
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+def file_lock(path: str) -> FileLock:
+    """Verrou partagé par tout le processus pour `path`."""
+    key = os.path.abspath(path)
+    with _LOCKS_LOCK:
+        lock = _LOCKS.get(key)
+        if lock is None:
+            lock = FileLock(path)
+            _LOCKS[key] = lock
+        return lock
+
+
+def try_lock(path: str):
+    """
+    Verrou exclusif non bloquant sur `path` (fichier `<chemin>.lock`) : le
+    fichier ouvert, qui garde le verrou jusqu'à sa fermeture (ou la fin du
+    processus), ou None si quelqu'un d'autre le détient déjà.
+    """
+    lock_path = path + LOCK_SUFFIX
+    parent = os.path.dirname(lock_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    f = open(lock_path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def file_version(path: str):
+    """Version d'un fichier : (inode, mtime, taille), None s'il n'existe pas."""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+
+def atomic_write(path: str, write, mode: str = "w", **open_kwargs):
+    """
+    Appelle `write(f)` sur un fichier temporaire voisin de `path`, le
+    synchronise sur disque puis le met en place par `os.replace`.
+    """
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode, **open_kwargs) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(10):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:  # Windows : fichier ouvert par un lecteur
+                if attempt == 9:
+                    raise
+                time.sleep(0.01 * (attempt + 1))
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def remove(path: str):
+    """Supprime `path` sous son verrou (sans erreur s'il n'existe plus)."""
+    with file_lock(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def update(path: str, read, modify, write, retries: int = MAX_RETRIES):
+    """
+    Lecture-modification-écriture optimiste de `path`.
+
+    read()        -> données actuelles
+    modify(data)  -> nouvelles données (None = rien à écrire)
+    write(data)   -> écrit les données (appelé sous verrou ; doit être atomique)
+    Retourne les données écrites (ou None).
+    """
+    for attempt in range(retries):
+        version = file_version(path)
+        data = modify(read())
+        with file_lock(path):
+            if file_version(path) == version:
+                if data is not None:
+                    write(data)
+                    _count("commits")
+                return data
+        _count("conflicts")
+        time.sleep(random.uniform(0, BACKOFF * 2**attempt))
+
+    # Trop de conflits : on sérialise
+    _count("fallbacks")
+    with file_lock(path):
+        data = modify(read())
+        if data is not None:
+            write(data)
+            _count("commits")
+        return data
@@ -0,0 +1,78 @@
+"""
+Mémoïsation des vues dérivées, partagée par toutes les sessions du processus.
+
+`memoize(key, version, compute)` renvoie le résultat en cache pour `key` tant
+que `version` (voir dejeuner.versions) n'a pas changé, sinon recalcule. Un
+seul calcul par clé à la fois : les sessions qui arrivent pendant le calcul
+attendent son résultat au lieu de le refaire. Les valeurs sont partagées, les
+appelants ne doivent pas les modifier.
+"""
+
+import threading
+from collections import OrderedDict
+
+MAX_ENTREES = 256
+
+
+class Memo:
+    def __init__(self, max_entrees: int = MAX_ENTREES):
+        self.max_entrees = max_entrees
+        self._data = OrderedDict()  # key -> (version, valeur)
+        self._calculs = {}          # key -> [verrou du calcul, sessions qui l'utilisent]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lire(self, key, version):
+        entree = self._data.get(key)
+        if entree is not None and entree[0] == version:
+            self._data.move_to_end(key)
+            return True, entree[1]
+        return False, None
+
+    def get(self, key, version, compute):
+        with self._lock:
+            trouve, valeur = self._lire(key, version)
+            if trouve:
+                self.hits += 1
+                return valeur
+            calcul = self._calculs.setdefault(key, [threading.Lock(), 0])
+            calcul[1] += 1
+
+        try:
+            with calcul[0]:
+                with self._lock:
+                    trouve, valeur = self._lire(key, version)
+                    if trouve:
+                        self.hits += 1
+                        return valeur
+                    self.misses += 1
+                valeur = compute()
+                with self._lock:
+                    self._data[key] = (version, valeur)
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.max_entrees:
+                        self._data.popitem(last=False)
+                return valeur
+        finally:
+            # Le verrou reste tant qu'une session l'attend : pas de second calcul en parallèle
+            with self._lock:
+                calcul[1] -= 1
+                if not calcul[1]:
+                    del self._calculs[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_MEMO = Memo()
+
+
+def memoize(key, version, compute):
+    """Résultat de `compute()` pour (`key`, `version`), calculé une fois par version."""
+    return _MEMO.get(key, version, compute)
+
+
+def memo_stats() -> dict:
+    return {"hits": _MEMO.hits, "misses": _MEMO.misses, "entries": len(_MEMO._data)}
@@ -0,0 +1,197 @@
+"""
+Métriques des apps au format texte Prometheus (exposition 0.0.4).
+
+Compteurs d'usage incrémentés par les apps (`incr`), durées des spans de
+dejeuner.timing (histogrammes : rerun, chargements, calculs, écritures),
+caches (vues mémoïsées, catalogue) et écritures de fichiers (dejeuner.locking).
+Les débits (swipes par minute...) se calculent côté Prometheus :
+`rate(dejeuner_swipes_total[1m]) * 60`.
+
+Deux façons de les exposer, activées par variables d'environnement au
+premier appel de `start_exporter()` :
+  - `DEJEUNER_METRICS_FILE` : fichier `.prom` réécrit (atomiquement) toutes
+    les `DEJEUNER_METRICS_INTERVAL` secondes (15 par défaut), pour le
+    « textfile collector » de node_exporter ;
+  - `DEJEUNER_METRICS_PORT` : endpoint HTTP local `http://127.0.0.1:<port>/metrics`,
+    avec `/health` (processus vivant) et `/ready` (échauffement terminé,
+    voir dejeuner.warmup : 200, ou 503 tant qu'il ne l'est pas ; détail en JSON).
+Les compteurs sont ceux du processus (remis à zéro au redémarrage).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dejeuner import locking, timing, warmup
+from dejeuner.catalog import all_catalog_caches
+from dejeuner.memo import memo_stats
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.environ.get("DEJEUNER_METRICS_FILE")
+METRICS_PORT = os.environ.get("DEJEUNER_METRICS_PORT")
+METRICS_INTERVAL = float(os.environ.get("DEJEUNER_METRICS_INTERVAL", "15"))
+
+# Compteurs d'usage connus : nom -> aide
+COUNTERS = {
+    "dejeuner_swipes_total": "Swipes enregistrés.",
+    "dejeuner_tops_saved_total": "Tops 3 enregistrés ou remplacés.",
+    "dejeuner_logins_total": "Tentatives de connexion et créations de compte.",
+}
+
+_counters = {}  # (nom, labels triés) -> valeur
+_counters_lock = threading.Lock()
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Incrémente le compteur `name` (déclaré dans COUNTERS) pour ces labels."""
+    if name not in COUNTERS:
+        raise ValueError(f"Compteur inconnu: {name!r}")
+    key = (name, tuple(sorted(labels.items())))
+    with _counters_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+# ==============================
+# Format texte
+# ==============================
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    def echapper(v):
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{echapper(v)}"' for k, v in pairs) + "}"
+
+
+def _nombre(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def render() -> str:
+    """Toutes les métriques du processus, au format texte Prometheus."""
+    lignes = []
+
+    def famille(name, kind, aide, samples):
+        lignes.append(f"# HELP {name} {aide}")
+        lignes.append(f"# TYPE {name} {kind}")
+        for suffixe, pairs, valeur in samples:
+            lignes.append(f"{name}{suffixe}{_labels(pairs)} {_nombre(valeur)}")
+
+    with _counters_lock:
+        counters = dict(_counters)
+    for name, aide in COUNTERS.items():
+        famille(name, "counter", aide, [("", pairs, v) for (n, pairs), v in sorted(counters.items()) if n == name])
+
+    samples = []
+    for span, stats in sorted(timing.spans().items()):
+        cumul, appels, total_ns = stats.histogram()
+        for borne, n in zip(timing.BUCKETS, cumul):
+            samples.append(("_bucket", (("span", span), ("le", repr(borne))), n))
+        samples.append(("_bucket", (("span", span), ("le", "+Inf")), cumul[-1]))
+        samples.append(("_sum", (("span", span),), total_ns / 1e9))
+        samples.append(("_count", (("span", span),), appels))
+    famille("dejeuner_span_duration_seconds", "histogram",
+            "Durée des étapes des reruns (rerun, chargement.*, calcul.*, rendu.*, ecriture.*).", samples)
+
+    memo = memo_stats()
+    catalogues = all_catalog_caches()
+    famille("dejeuner_cache_hits_total", "counter", "Lectures servies par un cache.", [
+        ("", (("cache", "vues"),), memo["hits"]),
+        ("", (("cache", "catalogue"),), sum(c.hits for c in catalogues)),
+    ])
+    famille("dejeuner_cache_misses_total", "counter", "Lectures qui ont dû recalculer ou relire.", [
+        ("", (("cache", "vues"),), memo["misses"]),
+        ("", (("cache", "catalogue"),), sum(c.misses for c in catalogues)),
+    ])
+
+    famille("dejeuner_file_updates_total", "counter",
+            "Mises à jour de fichiers : écrites, conflits optimistes, repli sous verrou.",
+            [("", (("result", k),), v) for k, v in sorted(locking.stats.items())])
+
+    etat = warmup.status()["warmups"]
+    famille("dejeuner_warmup_ready", "gauge", "Échauffement des caches terminé (première passe).",
+            [("", (("app", name),), int(e["ready"])) for name, e in etat.items()])
+    famille("dejeuner_warmup_passes_total", "counter", "Passes d'échauffement terminées.",
+            [("", (("app", name),), e["passes"]) for name, e in etat.items()])
+    famille("dejeuner_warmup_errors", "gauge", "Étapes en erreur lors de la dernière passe d'échauffement.",
+            [("", (("app", name),), e["errors"]) for name, e in etat.items()])
+
+    return "\n".join(lignes) + "\n"
+
+
+# ==============================
+# Exposition (fichier .prom, HTTP local)
+# ==============================
+
+def write_file(path: str):
+    """Écrit les métriques dans `path` (remplacement atomique)."""
+    texte = render()
+    locking.atomic_write(path, lambda f: f.write(texte), encoding="utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        chemin = self.path.split("?")[0]
+        if chemin in ("/", "/metrics"):
+            self._repondre(200, "text/plain; version=0.0.4", render())
+        elif chemin == "/health":
+            self._repondre(200, "text/plain", "ok\n")
+        elif chemin == "/ready":
+            etat = warmup.status()
+            self._repondre(200 if etat["ready"] else 503, "application/json", json.dumps(etat, indent=1) + "\n")
+        else:
+            self.send_error(404)
+
+    def _repondre(self, code: int, content_type: str, texte: str):
+        corps = texte.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass  # pas de log par requête de scrape
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Démarre l'endpoint /metrics dans un thread d'arrière-plan."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _ecrire_en_boucle(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path)
+        except Exception:
+            logger.exception("métriques : écriture de %s impossible", path)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_exporter():
+    """Lance l'export configuré par l'environnement (une fois par processus)."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    if METRICS_FILE:
+        threading.Thread(target=_ecrire_en_boucle, args=(METRICS_FILE, METRICS_INTERVAL),
+                         name="metrics-file", daemon=True).start()
+    if METRICS_PORT:
+        try:
+            serve(int(METRICS_PORT))
+        except OSError as e:
+            # Port déjà pris (autre app lancée avec la même config) : on continue sans endpoint
+            logger.warning("métriques : port %s indisponible (%s)", METRICS_PORT, e)
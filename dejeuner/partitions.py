@@ -0,0 +1,263 @@
+"""
+Tables CSV partitionnées par jour.
+
+Chaque jour est un fichier `<racine>/<YYYY-MM-DD>.csv` : lire « aujourd'hui »
+ne parse que les lignes du jour, et vider une journée revient à supprimer un
+fichier. Chaque partition est un `Journal`, donc un ajout reste une seule
+ligne écrite en fin de fichier ; les modifications d'un jour passent par
+`update_day` (lecture-modification-écriture optimiste, voir dejeuner.locking).
+
+Avec un `codec` (dejeuner.restaurants.IdCodec), les colonnes de noms de
+restaurants sont écrites en ids entiers et redécodées à la lecture : la
+table se lit et s'écrit toujours avec ses colonnes logiques.
+
+Avec `archive_root`, `compact(avant)` déplace les jours anciens dans des
+archives mensuelles compressées (dejeuner.archives) ; `read` et `days` les
+incluent, `update_day` ne modifie que les jours encore chauds (seul
+`drop_day` efface aussi un jour archivé).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+
+from dejeuner import locking
+from dejeuner.archives import PENDING_SUFFIX, MonthlyArchive, pending
+from dejeuner.journal import Journal, FSYNC_ALWAYS
+from dejeuner.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Partition des lignes sans date exploitable (import d'anciens fichiers)
+UNDATED = "sans-date"
+
+_DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _partition_key(day) -> str:
+    if isinstance(day, str) and _DAY_RE.match(day.strip()):
+        return day.strip()
+    return UNDATED
+
+
+class DayPartitionedTable:
+    """Une table (tops, swipes...) découpée en un fichier CSV par jour."""
+
+    def __init__(self, root: str, columns, legacy_path: str = None, fsync: str = FSYNC_ALWAYS, codec=None,
+                 archive_root: str = None):
+        self.root = root
+        self.columns = list(columns)
+        self.codec = codec
+        self.physical_columns = codec.physical(self.columns) if codec else self.columns
+        self.archive = MonthlyArchive(archive_root) if archive_root else None
+        self.fsync = fsync
+        self._journals = {}
+        self._lock = threading.RLock()
+        if legacy_path:
+            self._migrate_legacy(legacy_path)
+
+    # ------------------------------
+    # Partitions
+    # ------------------------------
+
+    def _journal(self, day: str) -> Journal:
+        key = _partition_key(day)
+        with self._lock:
+            journal = self._journals.get(key)
+            if journal is None:
+                journal = Journal(os.path.join(self.root, f"{key}.csv"), self.physical_columns, fsync=self.fsync)
+                self._journals[key] = journal
+            return journal
+
+    def hot_days(self):
+        """Jours encore dans les fichiers par jour."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(f[:-4] for f in os.listdir(self.root) if f.endswith(".csv"))
+
+    def days(self):
+        """Liste triée des jours présents (archives comprises)."""
+        if self.archive is None:
+            return self.hot_days()
+        return sorted(set(self.hot_days()) | set(self.archive.days()))
+
+    def _migrate_legacy(self, legacy_path: str):
+        """Découpe un ancien fichier monolithique en partitions (une seule fois)."""
+        if not os.path.exists(legacy_path) or os.path.isdir(self.root):
+            return
+        legacy = pd.read_csv(legacy_path, dtype=str) if os.path.getsize(legacy_path) else pd.DataFrame()
+        os.makedirs(self.root, exist_ok=True)
+        self.rewrite(legacy)
+        os.replace(legacy_path, legacy_path + ".migrated")
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+
+    def read(self, day: str = None) -> pd.DataFrame:
+        """Lit un jour (`day`) ou toute la table si `day` est None."""
+        if day is not None:
+            hot = self._journal(day).read()
+            if self.archive is None or day not in self.archive:
+                return self._decode(hot)
+            frames = [self._archived(self.archive.read_day(day)), hot]
+        else:
+            frames = [self._journal(d).read() for d in self.hot_days()]
+            if self.archive is not None:
+                frames.insert(0, self._archived(self.archive.read_all()))
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return self._decode(pd.DataFrame(columns=self.physical_columns))
+        # Décodage après concaténation : une seule catégorie pour toute la table
+        return self._decode(pd.concat(frames, ignore_index=True))
+
+    def _decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.codec is None:
+            return df
+        return self.codec.decode_frame(df, order=self.columns)
+
+    def _archived(self, records) -> pd.DataFrame:
+        if not records:
+            return pd.DataFrame(columns=self.physical_columns)
+        return pd.DataFrame(records, dtype=str)
+
+    # ------------------------------
+    # Écriture
+    # ------------------------------
+
+    def append(self, record: dict):
+        """Ajoute une ligne dans la partition de son jour."""
+        if self.codec is not None:
+            record = self.codec.encode_records([record])[0]
+        self._journal(record.get("date")).append(record)
+
+    def append_many(self, records):
+        """Ajoute plusieurs lignes : une seule écriture par jour concerné."""
+        if self.codec is not None:
+            records = self.codec.encode_records(records)
+        par_jour = {}
+        for record in records:
+            par_jour.setdefault(_partition_key(record.get("date")), []).append(record)
+        for day, lignes in par_jour.items():
+            self._journal(day).append_many(lignes)
+
+    def write_day(self, day: str, df: pd.DataFrame):
+        """Remplace entièrement la partition chaude d'un jour (les archives ne sont pas touchées)."""
+        if df.empty:
+            locking.remove(self._journal(day).path)
+            return
+        if self.codec is not None:
+            df = self.codec.encode_frame(df)
+        self._journal(day).rewrite(df)
+
+    def update_day(self, day: str, modify):
+        """
+        Modifie la partition chaude d'un jour : `modify(df)` renvoie le nouveau
+        contenu (vide = supprimer le fichier du jour, None = ne rien écrire).
+        Rejoué si un autre écrivain a modifié le jour entre-temps.
+        """
+        journal = self._journal(day)
+        return locking.update(journal.path, lambda: self._decode(journal.read()), modify, lambda df: self.write_day(day, df))
+
+    def drop_day(self, day: str):
+        """Supprime toutes les lignes d'un jour, archives comprises."""
+        locking.remove(self._journal(day).path)
+        if self.archive is not None:
+            self.archive.drop_day(day)
+
+    def clear(self):
+        """Supprime toutes les partitions."""
+        for d in self.hot_days():
+            self.drop_day(d)
+        if self.archive is not None:
+            self.archive.clear()
+
+    def rewrite(self, df: pd.DataFrame):
+        """Réécrit toute la table à partir d'un DataFrame complet."""
+        if df.empty or "date" not in df.columns:
+            self.clear()
+            return
+        if self.archive is not None:
+            # Les jours réécrits repartent dans les fichiers chauds (recompactés plus tard)
+            self.archive.clear()
+        keys = df["date"].map(_partition_key)
+        present = set()
+        for key, part in df.groupby(keys, sort=False):
+            self.write_day(key, part)
+            present.add(key)
+        for d in self.hot_days():
+            if d not in present:
+                self.drop_day(d)
+
+    def delete_where(self, column: str, value, day: str = None):
+        """
+        Supprime les lignes où `column == value` (colonne non encodée), de
+        tous les jours ou du seul `day`, en ne réécrivant que les jours et les
+        mois d'archive concernés.
+        """
+        def sans_valeur(part):
+            if column not in part.columns:
+                return None
+            mask = part[column] == value
+            return part[~mask] if mask.any() else None
+
+        for d in self.hot_days() if day is None else [day]:
+            self.update_day(d, sans_valeur)
+        if self.archive is not None and (day is None or day in self.archive):
+            self.archive.filter(lambda r: r.get(column) != value, day=day)
+
+    # ------------------------------
+    # Archivage
+    # ------------------------------
+
+    def compact(self, before: str, dry_run: bool = False) -> list:
+        """Archive les jours antérieurs à `before` (YYYY-MM-DD) ; renvoie les jours archivés."""
+        if self.archive is None:
+            return []
+        repris = pending(self.root, ".csv")
+        jours = [d for d in self.hot_days() if d != UNDATED and d < before and d not in repris]
+        if dry_run:
+            return sorted(set(jours) | set(repris))
+        # Une compaction interrompue après l'écriture de l'archive : il ne reste qu'à nettoyer
+        a_archiver = {d: p for d, p in repris.items() if d not in self.archive}
+        for d in jours:
+            path = self._journal(d).path
+            with locking.file_lock(path):
+                os.replace(path, path + PENDING_SUFFIX)
+            a_archiver[d] = path + PENDING_SUFFIX
+
+        records = []
+        for d, path in sorted(a_archiver.items()):
+            part = pd.read_csv(path, dtype=str) if os.path.getsize(path) else pd.DataFrame()
+            part["date"] = d
+            records += [{k: (None if pd.isna(v) else v) for k, v in r.items()} for r in part.to_dict("records")]
+        self.archive.add(records)
+        for path in set(repris.values()) | set(a_archiver.values()):
+            os.remove(path)
+        return sorted(set(jours) | set(repris))
+
+
+# ==============================
+# Registre par processus
+# ==============================
+
+# Streamlit ré-exécute le script de l'app à chaque interaction : les tables
+# vivent ici pour que leurs verrous soient partagés entre reruns et sessions.
+_TABLES = {}
+_TABLES_LOCK = threading.Lock()
+
+
+def get_table(root: str, columns, legacy_path: str = None, fsync: str = FSYNC_ALWAYS, codec=None,
+              archive_root: str = None) -> DayPartitionedTable:
+    """Retourne la table partitionnée associée à `root` (créée au premier appel)."""
+    key = os.path.abspath(root)
+    with _TABLES_LOCK:
+        table = _TABLES.get(key)
+        if table is None:
+            table = DayPartitionedTable(
+                root, columns, legacy_path=legacy_path, fsync=fsync, codec=codec, archive_root=archive_root
+            )
+            _TABLES[key] = table
+        return table
@@ -0,0 +1,383 @@
+"""
+Registre des identifiants de restaurants.
+
+Les journaux (tops, swipes) stockent un petit entier par restaurant au lieu
+de son nom : `<data_dir>/restaurants.json` associe chaque id à son nom
+courant et à ses anciens noms. Un id est attribué à la première écriture
+d'un nom (jamais à la lecture) et ne change plus ; les noms ne sont
+résolus qu'à la lecture (`pd.Categorical`), donc renommer un restaurant
+renomme tout son historique.
+
+Un renommage est repéré de deux façons :
+  - colonne optionnelle `ID` du catalogue (Restaurants.xlsx) : une clé
+    stable par ligne, le nom peut changer librement (`sync`) ;
+  - explicitement : `rename(ancien, nouveau)` (via `rename_restaurant`
+    des stores, qui invalide aussi les vues mémoïsées ; action « Renommer »
+    de l'espace admin de app_dejeuner). Sans colonne `ID`, un nom modifié
+    dans l'Excel reçoit d'abord un nouvel id : le renommage explicite
+    rattache alors l'historique de l'ancien nom au nouveau (fusion).
+
+Le registre est indexé en mémoire et relu seulement si le fichier change ;
+les ajouts sont des lectures-modifications-écritures optimistes (voir
+dejeuner.locking). Il fait partie des données : à sauvegarder avec elles.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+
+from dejeuner import locking
+from dejeuner.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+REGISTRY_FILENAME = "restaurants.json"
+ID_COLUMN = "ID"  # colonne optionnelle du catalogue : clé stable d'un restaurant
+ID_DTYPE = "int16"
+MAX_ID = 2**15 - 1
+ID_SUFFIX = "_id"  # Restau_1 -> Restau_1_id dans les journaux
+
+
+def _cle(value):
+    """Clé de catalogue normalisée (12, 12.0 et "12" sont la même clé)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _nom(value):
+    """Nom de restaurant normalisé (None pour une valeur manquante ou vide)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _id_connu(idx, nom) -> int:
+    """Id d'un nom du registre, ou d'un `#<id>` (id sans nom, voir dejeuner.shards) ; -1 sinon."""
+    if nom is None:
+        return -1
+    if nom in idx.par_nom:
+        return idx.par_nom[nom]
+    if nom.startswith("#") and nom[1:].isdigit() and int(nom[1:]) <= MAX_ID:
+        return int(nom[1:])
+    return -1
+
+
+class _Index:
+    """Vue en mémoire du registre : nom -> id, clé -> id, id -> nom courant."""
+
+    def __init__(self, data: dict):
+        entries = data["restaurants"]
+        self.renommages = data.get("renommages", 0)
+        self.par_nom, self.par_cle, self.noms = {}, {}, {}
+        for e in entries:
+            for alias in e.get("alias", []):
+                self.par_nom.setdefault(alias, e["id"])
+        for e in entries:
+            self.par_nom[e["nom"]] = e["id"]
+            self.noms[e["id"]] = e["nom"]
+            if e.get("cle"):
+                self.par_cle[e["cle"]] = e["id"]
+        # Décodage vectorisé : id -> code de catégorie (-1 = inconnu)
+        categories = list(dict.fromkeys(self.noms.values()))
+        self.dtype = pd.CategoricalDtype(categories)  # construit une fois : la validation est coûteuse
+        position = {nom: i for i, nom in enumerate(categories)}
+        self.codes = np.full(max(self.noms, default=-1) + 2, -1, dtype=np.int32)
+        for id_, nom in self.noms.items():
+            self.codes[id_] = position[nom]
+
+
+class RestaurantRegistry:
+    def __init__(self, path: str):
+        self.path = path
+        self._index = None
+        self._version = None
+        self._lock = threading.RLock()
+        self._synced = None  # (version du catalogue, version du registre) déjà synchronisées
+
+    # ------------------------------
+    # Fichier
+    # ------------------------------
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return {"renommages": 0, "restaurants": []}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, data: dict):
+        with locking.file_lock(self.path):
+            locking.atomic_write(self.path, lambda f: json.dump(data, f, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def _idx(self) -> _Index:
+        """Index à jour (relu seulement si le fichier a changé)."""
+        version = locking.file_version(self.path)
+        with self._lock:
+            if self._index is None or version != self._version:
+                self._index = _Index(self._read())
+                self._version = version
+            return self._index
+
+    def renommages(self) -> int:
+        """Compteur de renommages, pour invalider les vues décodées."""
+        return self._idx().renommages
+
+    def noms_par_id(self) -> dict:
+        """{id: nom courant} (ne pas modifier)."""
+        return self._idx().noms
+
+    def _modifier(self, modify) -> _Index:
+        with self._lock:
+            locking.update(self.path, self._read, modify, self._write)
+            return self._idx()
+
+    # ------------------------------
+    # Encodage / décodage
+    # ------------------------------
+
+    def ids(self, noms) -> np.ndarray:
+        """Ids (int16, -1 pour un nom manquant ou vide) ; les noms inconnus reçoivent un id."""
+        noms = [_nom(n) for n in noms]
+        idx = self._idx()
+        inconnus = list(dict.fromkeys(n for n in noms if n is not None and _id_connu(idx, n) < 0))
+        if inconnus:
+            idx = self._modifier(lambda data: _ajouter(data, inconnus))
+        return np.array([_id_connu(idx, n) for n in noms], dtype=ID_DTYPE)
+
+    def connus(self, noms) -> np.ndarray:
+        """Comme `ids`, en lecture seule : -1 pour un nom inconnu (le registre n'est pas modifié)."""
+        idx = self._idx()
+        return np.array([_id_connu(idx, _nom(n)) for n in noms], dtype=ID_DTYPE)
+
+    def id(self, nom: str) -> int:
+        return int(self.ids([nom])[0])
+
+    def nom(self, id_):
+        """Nom courant d'un id (None s'il est inconnu)."""
+        return self._idx().noms.get(id_)
+
+    def noms(self, ids) -> pd.Categorical:
+        """Noms courants des ids (NaN pour -1, vide ou inconnu)."""
+        idx = self._idx()
+        ids = np.asarray(ids)
+        if ids.dtype.kind not in "iuf":
+            ids = pd.to_numeric(pd.Series(ids, dtype=object), errors="coerce").to_numpy(dtype=float)
+        ids = np.nan_to_num(ids.astype(float), nan=-1).astype(np.int64)
+        valides = (ids >= 0) & (ids < len(idx.codes))
+        codes = np.full(len(ids), -1, dtype=np.int32)
+        codes[valides] = idx.codes[ids[valides]]
+        return pd.Categorical.from_codes(codes, dtype=idx.dtype, validate=False)
+
+    # ------------------------------
+    # Renommages
+    # ------------------------------
+
+    def rename(self, ancien: str, nouveau: str, fusion: bool = False):
+        """
+        Renomme un restaurant ; son historique suit, l'ancien nom reste un alias.
+        Avec `fusion`, `nouveau` peut déjà avoir son propre id (nom modifié
+        dans le catalogue) : les deux ids se lisent alors sous `nouveau`.
+        """
+        idx = self._idx()
+        if ancien not in idx.par_nom:
+            raise ValueError(f"Restaurant inconnu: {ancien!r}")
+        id_ = idx.par_nom[ancien]
+        autre = idx.par_nom.get(nouveau)
+        if autre is not None and autre != id_ and not fusion:
+            raise ValueError(f"Nom déjà utilisé par un autre restaurant: {nouveau!r}")
+
+        def renommer(data):
+            # Tous les ids lus sous `ancien` (y compris ceux d'une fusion précédente)
+            entrees = [e for e in data["restaurants"] if e["id"] == id_ or e["nom"] == ancien]
+            if not [e for e in entrees if _renommer(e, nouveau)]:
+                return None
+            data["renommages"] = data.get("renommages", 0) + 1
+            return data
+
+        self._modifier(renommer)
+
+    def sync(self, catalogue: pd.DataFrame, colonne: str = "Restaurant", version=None) -> bool:
+        """
+        Aligne le registre sur le catalogue : ids pour les nouveaux restaurants,
+        renommages repérés par la colonne `ID`. Vrai si un nom a changé.
+        `version` (voir dejeuner.catalog.load_catalog_snapshot) identifie le
+        contenu du catalogue : tant qu'elle et le registre sont inchangés, rien
+        n'est recomparé. Sans elle, tout le catalogue est recomparé au registre.
+        """
+        if colonne not in catalogue.columns:
+            return False
+        if version is not None and self._synced == (version, locking.file_version(self.path)):
+            return False
+        cles = catalogue[ID_COLUMN] if ID_COLUMN in catalogue.columns else [None] * len(catalogue)
+        paires = [(_cle(c), _nom(n)) for c, n in zip(cles, catalogue[colonne]) if _nom(n) is not None]
+
+        idx = self._idx()
+        a_jour = all(
+            idx.noms.get(idx.par_cle.get(c) if c else idx.par_nom.get(n)) == n for c, n in paires
+        )
+        renomme = False
+        if not a_jour:
+            renommes = []
+
+            def synchroniser(data):
+                renommes[:] = _synchroniser(data["restaurants"], paires)
+                if renommes:
+                    data["renommages"] = data.get("renommages", 0) + 1
+                return data
+
+            self._modifier(synchroniser)
+            renomme = bool(renommes)
+        if version is not None:
+            self._synced = (version, locking.file_version(self.path))
+        return renomme
+
+
+def _ajouter(data: dict, noms) -> dict:
+    entries = data["restaurants"]
+    connus = {e["nom"] for e in entries} | {a for e in entries for a in e.get("alias", [])}
+    suivant = max((e["id"] for e in entries), default=-1) + 1
+    for nom in noms:
+        if nom in connus:
+            continue
+        if suivant > MAX_ID:
+            raise ValueError(f"Plus de {MAX_ID + 1} restaurants : ids {ID_DTYPE} épuisés")
+        entries.append({"id": suivant, "nom": nom})
+        connus.add(nom)
+        suivant += 1
+    return data
+
+
+def _renommer(entree: dict, nouveau: str) -> bool:
+    if entree["nom"] == nouveau:
+        return False
+    alias = [a for a in entree.get("alias", []) if a != nouveau] + [entree["nom"]]
+    entree["nom"] = nouveau
+    entree["alias"] = alias
+    return True
+
+
+def _synchroniser(entries, paires) -> list:
+    """Applique les (clé, nom) du catalogue ; renvoie les ids renommés."""
+    par_id = {e["id"]: e for e in entries}
+    idx = _Index({"restaurants": entries})
+    par_cle, par_nom = idx.par_cle, idx.par_nom
+    renommes = []
+    for cle, nom in paires:
+        id_ = par_cle.get(cle) if cle else None
+        if id_ is None:
+            id_ = par_nom.get(nom)
+            if id_ is not None and cle and par_id[id_].get("cle"):
+                id_ = None  # même nom, autre clé : un autre restaurant
+        if id_ is None:
+            id_ = max(par_id, default=-1) + 1
+            if id_ > MAX_ID:
+                raise ValueError(f"Plus de {MAX_ID + 1} restaurants : ids {ID_DTYPE} épuisés")
+            par_id[id_] = {"id": id_, "nom": nom}
+            entries.append(par_id[id_])
+        entree = par_id[id_]
+        if cle and not entree.get("cle"):
+            entree["cle"] = cle
+            par_cle[cle] = id_
+        if _renommer(entree, nom):
+            renommes.append(id_)
+        par_nom[nom] = id_
+    return renommes
+
+
+# ==============================
+# Codec des journaux CSV
+# ==============================
+
+class IdCodec:
+    """
+    Encode des colonnes de noms de restaurants (`restaurant`, `Restau_1`...)
+    en colonnes d'ids `<colonne>_id` pour dejeuner.partitions, et les décode
+    en `pd.Categorical` à la lecture. Les fichiers écrits avant les ids (noms
+    en clair) restent lisibles tels quels.
+    """
+
+    def __init__(self, registry: RestaurantRegistry, columns):
+        self.registry = registry
+        self.columns = list(columns)
+
+    def physical(self, columns) -> list:
+        """Colonnes écrites sur disque."""
+        return [c + ID_SUFFIX if c in self.columns else c for c in columns]
+
+    def encode_records(self, records) -> list:
+        """Ajoute `<colonne>_id` aux enregistrements (le nom reste pour les anciens fichiers)."""
+        records = [dict(r) for r in records]
+        for c in self.columns:
+            ids = self.registry.ids([r.get(c) for r in records])
+            for r, id_ in zip(records, ids):
+                r[c + ID_SUFFIX] = None if id_ < 0 else int(id_)
+        return records
+
+    def encode_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        for c in self.columns:
+            if c in df.columns:
+                ids = self.registry.ids(df[c].tolist())
+                df[c] = pd.array(np.where(ids < 0, None, ids), dtype="Int16")
+                df = df.rename(columns={c: c + ID_SUFFIX})
+        return df
+
+    def decode_frame(self, df: pd.DataFrame, order=None) -> pd.DataFrame:
+        """Remplace (en place) les colonnes `<colonne>_id` par les noms ; colonnes `order` en tête."""
+        renommees = {}
+        for c in self.columns:
+            col_id = c + ID_SUFFIX
+            if col_id not in df.columns:
+                continue
+            ids = pd.to_numeric(df[col_id], errors="coerce").to_numpy(dtype=float, copy=True)
+            if c in df.columns:
+                # Lignes d'anciens fichiers (nom en clair, sans id) : la lecture n'attribue pas d'id
+                en_clair = np.flatnonzero(np.isnan(ids) & df[c].notna().to_numpy())
+                clairs = [_nom(n) for n in df[c].to_numpy()[en_clair]]
+                ids[en_clair] = self.registry.connus(clairs)
+                noms = self.registry.noms(ids)
+                # Nom en clair jamais enregistré : lu tel quel
+                hors_registre = {i: n for i, n, id_ in zip(en_clair, clairs, ids[en_clair]) if n is not None and id_ < 0}
+                if hors_registre:
+                    noms = noms.add_categories([n for n in dict.fromkeys(hors_registre.values()) if n not in noms.categories])
+                    noms[list(hors_registre)] = list(hors_registre.values())
+                df[c] = noms
+                del df[col_id]
+            else:
+                df[col_id] = self.registry.noms(ids)
+                renommees[col_id] = c
+        if renommees:
+            df.columns = [renommees.get(c, c) for c in df.columns]
+        if order is not None:
+            attendu = [c for c in order if c in df.columns]
+            attendu += [c for c in df.columns if c not in attendu]
+            if list(df.columns) != attendu:
+                df = df[attendu]
+        return df
+
+
+# ==============================
+# Registre par processus
+# ==============================
+
+_REGISTRIES = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(data_dir: str) -> RestaurantRegistry:
+    """Registre des restaurants de `data_dir` (partagé entre reruns et sessions)."""
+    path = os.path.abspath(os.path.join(data_dir, REGISTRY_FILENAME))
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(path)
+        if registry is None:
+            registry = RestaurantRegistry(path)
+            _REGISTRIES[path] = registry
+        return registry
+
@@ -0,0 +1,279 @@
+"""
+Moteur de scoring vectorisé des restaurants (app_dejeuner).
+
+Le catalogue est converti une fois en une matrice dense float32
+(restaurants × critères) : les 4 critères de base et les deux polarités
+(« haut » / « bas ») des filtres chaleur, healthy et sandwich. Un profil
+utilisateur devient un vecteur de poids, et tous les scores se calculent
+en un seul produit matrice-vecteur. Aucune dépendance à Streamlit.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from dejeuner.catalog import get_catalog_cache
+from dejeuner.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Critères pondérés par un coefficient 0..10 (0 = pas un critère)
+CRITERES_BASE = {
+    "distance": "Score_Distance",
+    "prix": "Score_Prix",
+    "quantite": "Score_Quantite",
+    "gourmandise": "Score_Gourmandise",
+}
+# Filtres directionnels pilotés par un slider 0..10 (5 = pas de préférence)
+FILTRES = {
+    "chaleur": "Filtre_Chaleur",
+    "healthy": "Filtre_Healthy",
+    "sandwich": "Filtre_Sandwich",
+}
+
+# Colonnes de tops.csv où sont sauvegardés les profils du jour
+COLONNES_PROFIL = {
+    "distance": "Distance_coeff",
+    "prix": "Prix_coeff",
+    "quantite": "Quantite_coeff",
+    "gourmandise": "Gourmandise_coeff",
+    "chaleur": "Chaleur_slider",
+    "healthy": "Healthy_slider",
+    "sandwich": "Sandwich_slider",
+}
+
+# Colonnes de la matrice : critères de base puis, par filtre, polarité haute et basse
+COLONNES = list(CRITERES_BASE) + [f"{f}_{pol}" for f in FILTRES for pol in ("haut", "bas")]
+_INDEX = {c: i for i, c in enumerate(COLONNES)}
+
+
+def construire_score_directionnel(serie, slider_val, low_is_best=False):
+    """
+    Transforme une série de 1 à 10 en un score aligné avec la préférence de l'utilisateur.
+
+    slider_val va de 0 à 10 :
+      - 5 = pas de préférence -> renvoie None (pas utilisé)
+      - >5 = préfère 'haut' (10)
+      - <5 = préfère 'bas' (1)
+
+    low_is_best = False pour :
+        - Chaleur : 1 = froid, 10 = chaud
+        - Healthy : 1 = pas healthy, 10 = healthy
+        - Sandwich : 1 = bol, 10 = sandwich
+    """
+    if slider_val == 5:
+        return None
+
+    if slider_val > 5:
+        # On préfère les valeurs hautes
+        if low_is_best:
+            score = 11 - serie
+        else:
+            score = serie
+    else:
+        # slider < 5 -> on préfère les valeurs basses
+        if low_is_best:
+            score = serie
+        else:
+            score = 11 - serie
+
+    score = score.clip(lower=1, upper=10)
+    return score
+
+
+def score_vectoriel(matrice: np.ndarray, poids: np.ndarray) -> np.ndarray:
+    """Moyenne pondérée de chaque ligne de `matrice` : un seul produit matrice-vecteur."""
+    return (matrice @ poids) / poids.sum()
+
+
+class ScoringEngine:
+    """Catalogue figé sous forme de matrice de critères, prêt à être scoré."""
+
+    def __init__(self, df: pd.DataFrame, version=None):
+        self.version = version
+        self.n = len(df)
+        self.matrice = np.zeros((self.n, len(COLONNES)), dtype=np.float32)
+        self.disponibles = np.zeros(len(COLONNES), dtype=bool)
+
+        for nom, col in CRITERES_BASE.items():
+            if col in df.columns:
+                self._remplir(nom, self._serie(df, col))
+        for nom, col in FILTRES.items():
+            if col in df.columns:
+                serie = self._serie(df, col)
+                self._remplir(f"{nom}_haut", construire_score_directionnel(serie, 10))
+                self._remplir(f"{nom}_bas", construire_score_directionnel(serie, 0))
+
+        if "Restaurant" in df.columns:
+            self.noms = df["Restaurant"].astype(str).to_numpy(dtype=object)
+        else:
+            self.noms = np.array([f"Restaurant #{i + 1}" for i in range(self.n)], dtype=object)
+
+        if "Filtre_Convention" in df.columns:
+            self.conventionnel = (pd.to_numeric(df["Filtre_Convention"], errors="coerce") == 1).to_numpy()
+        else:
+            self.conventionnel = None
+        if "Filtre_Type" in df.columns:
+            self.types = df["Filtre_Type"].to_numpy(dtype=object)
+        else:
+            self.types = None
+
+    @staticmethod
+    def _serie(df, col) -> pd.Series:
+        """Colonne numérique, NaN remplacés par la moyenne (comme l'affichage)."""
+        serie = pd.to_numeric(df[col], errors="coerce")
+        return serie.fillna(serie.mean())
+
+    def _remplir(self, colonne, serie):
+        i = _INDEX[colonne]
+        self.matrice[:, i] = serie.to_numpy(dtype=np.float32)
+        self.disponibles[i] = True
+
+    def __len__(self):
+        return self.n
+
+    # ------------------------------
+    # Profil -> poids
+    # ------------------------------
+
+    def poids(self, coeffs: dict, sliders: dict):
+        """
+        coeffs  : critère de base -> coefficient 0..10
+        sliders : filtre -> slider 0..10 (5 = pas de préférence)
+        Retourne (vecteur de poids float32, moyenne_simple). `moyenne_simple`
+        est vrai quand aucun critère n'est actif : on retombe alors sur la
+        moyenne des scores de base.
+        """
+        w = np.zeros(len(COLONNES), dtype=np.float32)
+        for nom in CRITERES_BASE:
+            coeff = coeffs.get(nom)
+            if coeff is not None and coeff > 0:
+                w[_INDEX[nom]] = coeff
+
+        max_coeff_base = max([c for c in coeffs.values() if c is not None] or [0])
+        filtre_coeff = max_coeff_base if max_coeff_base > 0 else 1
+        for nom in FILTRES:
+            slider = sliders.get(nom, 5)
+            if slider is None or slider == 5:
+                continue
+            w[_INDEX[f"{nom}_haut" if slider > 5 else f"{nom}_bas"]] = filtre_coeff
+
+        w[~self.disponibles] = 0
+        if w.sum() > 0:
+            return w, False
+
+        w[: len(CRITERES_BASE)] = self.disponibles[: len(CRITERES_BASE)]
+        if w.sum() == 0:
+            raise ValueError("Impossible de calculer un score global : aucune colonne de score trouvée.")
+        return w, True
+
+    def masque(self, conventionnel: bool = False, no_go=()) -> np.ndarray:
+        """Restaurants retenus par les contraintes fortes (conventionnel / no-go)."""
+        m = np.ones(self.n, dtype=bool)
+        if conventionnel and self.conventionnel is not None:
+            m &= self.conventionnel
+        if no_go and self.types is not None:
+            m &= ~np.isin(self.types, list(no_go))
+        return m
+
+    # ------------------------------
+    # Scores
+    # ------------------------------
+
+    def scores(self, coeffs: dict, sliders: dict):
+        """Scores globaux (float64, non arrondis) de tout le catalogue et le drapeau `moyenne_simple`."""
+        w, moyenne_simple = self.poids(coeffs, sliders)
+        return score_vectoriel(self.matrice, w).astype(np.float64), moyenne_simple
+
+    def scores_batch(self, profils) -> np.ndarray:
+        """
+        profils : liste de (coeffs, sliders), un par personne.
+        Retourne la matrice d'utilité (personnes × restaurants) en un seul
+        produit matriciel : poids normalisés (u × k) · critèresᵀ (k × n).
+        """
+        if not profils:
+            return np.zeros((0, self.n), dtype=np.float64)
+        poids = np.stack([self.poids(coeffs, sliders)[0] for coeffs, sliders in profils])
+        poids /= poids.sum(axis=1, keepdims=True)
+        return (poids @ self.matrice.T).astype(np.float64)
+
+
+# ==============================
+# Scoring de toute l'équipe
+# ==============================
+
+def _valeur_profil(row, col, default=5):
+    """Même règle que le pré-remplissage des sliders : 5 si absent ou illisible."""
+    value = row.get(col)
+    try:
+        if value is None or pd.isna(value):
+            return default
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def profils_depuis_tops(tops_df: pd.DataFrame):
+    """Liste de (coeffs, sliders) à partir des lignes de tops.csv."""
+    profils = []
+    for row in tops_df.to_dict("records"):
+        valeurs = {nom: _valeur_profil(row, col) for nom, col in COLONNES_PROFIL.items()}
+        coeffs = {nom: valeurs[nom] for nom in CRITERES_BASE}
+        sliders = {nom: valeurs[nom] for nom in FILTRES}
+        profils.append((coeffs, sliders))
+    return profils
+
+
+def utilites_equipe(engine: ScoringEngine, tops_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Utilité de chaque restaurant pour chaque répondant (lignes = user_id,
+    colonnes = restaurants), calculée à partir des préférences sauvegardées.
+    Les contraintes fortes (conventionnel, no-go) ne sont pas sauvegardées
+    et ne sont donc pas appliquées ici.
+    """
+    utilites = engine.scores_batch(profils_depuis_tops(tops_df))
+    return pd.DataFrame(utilites, index=tops_df["user_id"].to_numpy(), columns=engine.noms)
+
+
+def score_global(df: pd.DataFrame, engine: ScoringEngine, coeffs: dict, sliders: dict, masque: np.ndarray):
+    """
+    df : catalogue complet (mêmes lignes, même ordre que `engine`)
+    coeffs : dict critère de base -> coefficient (0..10)
+    sliders : dict filtre directionnel -> slider (0..10, 5 = pas de préférence)
+    masque : restaurants retenus par les contraintes fortes
+    Retourne (lignes retenues avec leur colonne Score_Global, moyenne_simple).
+    Lève ValueError si le profil est invalide.
+    """
+    scores, moyenne_simple = engine.scores(coeffs, sliders)
+    df = df[masque].copy()
+    df["Score_Global"] = np.round(scores[masque], 2)
+    return df, moyenne_simple
+
+
+def classements(utilites: pd.DataFrame) -> dict:
+    """user_id -> liste complète des restaurants, du préféré au moins aimé."""
+    ordre = np.argsort(-utilites.to_numpy(), axis=1, kind="stable")
+    noms = utilites.columns.to_numpy()
+    return {uid: noms[ordre[i]].tolist() for i, uid in enumerate(utilites.index)}
+
+
+# ==============================
+# Moteur partagé par processus
+# ==============================
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(path: str) -> ScoringEngine:
+    """Moteur du catalogue `path`, reconstruit seulement quand le fichier change."""
+    version, df = get_catalog_cache(path).snapshot()
+    key = os.path.abspath(path)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None or engine.version != version:
+            engine = ScoringEngine(df, version=version)
+            _ENGINES[key] = engine
+        return engine
@@ -0,0 +1,246 @@
+"""
+Swipes de Lunch Tinder en JSONL, un fichier par jour.
+
+`<racine>/<YYYY-MM-DD>.jsonl` contient une ligne par swipe :
+    {"user": "...", "restaurant": "...", "liked": true}
+ou, avec un registre de restaurants (dejeuner.restaurants), l'id à la place
+du nom : {"user": "...", "r": 12, "liked": true} ; les noms sont résolus à
+la lecture, et les vues relues après un renommage.
+La dernière ligne pour un (user, restaurant) fait foi. Un swipe coûte un
+petit ajout en fin de fichier ; la vue {user: {restaurant: liked}} d'un jour
+est gardée en mémoire, avec l'index inverse {restaurant: likers}, et
+complétée en ne lisant que les octets ajoutés depuis la dernière lecture
+(y compris par un autre processus). Ajouts et réécritures d'un jour prennent
+le verrou inter-processus de son fichier (voir dejeuner.locking).
+
+Avec `archive_root`, `compact(avant)` déplace l'état final des jours anciens
+dans des archives mensuelles compressées (dejeuner.archives) ; les vues de
+ces jours sont reconstruites depuis l'archive.
+"""
+
+import json
+import os
+import threading
+import time
+
+from dejeuner import locking
+from dejeuner.archives import PENDING_SUFFIX, MonthlyArchive, pending
+from dejeuner.journal import FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_POLICIES
+
+MAX_VUES = 3  # jours gardés en mémoire
+
+
+class _VueJour:
+    def __init__(self):
+        self.swipes = {}  # user -> {restaurant: liked}
+        self.likers = {}  # restaurant -> {user: None}, likes en cours uniquement
+        self.offset = 0   # octets du fichier déjà intégrés
+        self.inode = None
+        self.renommages = None
+        self.archive = None
+        self.charge = False
+
+
+class JsonlDayShards:
+    def __init__(self, root: str, legacy_path: str = None, fsync: str = FSYNC_ALWAYS, fsync_interval: float = 1.0,
+                 registry=None, archive_root: str = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync!r} (attendu: {FSYNC_POLICIES})")
+        self.root = root
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.registry = registry
+        self.archive = MonthlyArchive(archive_root) if archive_root else None
+        self._last_fsync = 0.0
+        self._vues = {}
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        if legacy_path:
+            self._migrate_legacy(legacy_path)
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.jsonl")
+
+    def hot_days(self):
+        return sorted(f[:-6] for f in os.listdir(self.root) if f.endswith(".jsonl"))
+
+    def days(self):
+        if self.archive is None:
+            return self.hot_days()
+        return sorted(set(self.hot_days()) | set(self.archive.days()))
+
+    def _migrate_legacy(self, legacy_path: str):
+        """Découpe l'ancien swipes.json ({jour: {user: {resto: liked}}}) en shards."""
+        if not os.path.exists(legacy_path) or self.days():
+            return
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            self.rewrite(json.load(f))
+        os.replace(legacy_path, legacy_path + ".migrated")
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+
+    def _vue(self, day: str) -> _VueJour:
+        path = self._path(day)
+        with self._lock:
+            vue = self._vues.get(day)
+            if vue is None:
+                vue = _VueJour()
+                self._vues[day] = vue
+                for ancien in sorted(self._vues)[:-MAX_VUES]:
+                    del self._vues[ancien]
+            try:
+                info = os.stat(path)
+                inode, taille = info.st_ino, info.st_size
+            except FileNotFoundError:
+                inode, taille = None, 0
+            renommages = self.registry.renommages() if self.registry is not None else None
+            archive = self.archive.version() if self.archive is not None else None
+            if (not vue.charge or inode != vue.inode or taille < vue.offset
+                    or renommages != vue.renommages or archive != vue.archive):
+                # Fichier remplacé ou tronqué, restaurant renommé, jour archivé : on repart de zéro
+                vue.__init__()
+                vue.inode, vue.renommages, vue.archive, vue.charge = inode, renommages, archive, True
+                if self.archive is not None and day in self.archive:
+                    noms = self._noms()
+                    for rec in self.archive.read_day(day):
+                        self._appliquer(vue, rec, noms)
+            if taille > vue.offset:
+                self._lire_suite(path, vue)
+            return vue
+
+    def _noms(self) -> dict:
+        return self.registry.noms_par_id() if self.registry is not None else {}
+
+    @staticmethod
+    def _appliquer(vue: _VueJour, rec: dict, noms: dict):
+        user, liked = rec["user"], bool(rec["liked"])
+        restaurant = rec["restaurant"] if "r" not in rec else noms.get(rec["r"], f"#{rec['r']}")
+        vue.swipes.setdefault(user, {})[restaurant] = liked
+        if liked:
+            vue.likers.setdefault(restaurant, {})[user] = None
+        else:
+            vue.likers.get(restaurant, {}).pop(user, None)
+
+    def _lire_suite(self, path: str, vue: _VueJour):
+        with open(path, "rb") as f:
+            f.seek(vue.offset)
+            data = f.read()
+        # Une ligne en cours d'écriture (sans \n final) sera lue au prochain passage
+        complet = data[: data.rfind(b"\n") + 1]
+        noms = self._noms()
+        for line in complet.splitlines():
+            if line.strip():
+                self._appliquer(vue, json.loads(line), noms)
+        vue.offset += len(complet)
+
+    def view_copy(self, day: str) -> dict:
+        """Copie de la vue matérialisée {user: {restaurant: liked}} du jour.
+
+        La copie est faite sous le verrou : la vue partagée est complétée (ou
+        reconstruite) par les autres threads de session.
+        """
+        with self._lock:
+            return _copie(self._vue(day).swipes)
+
+    def likers(self, day: str, restaurant: str) -> list:
+        """Users qui likent actuellement `restaurant` ce jour-là."""
+        with self._lock:
+            return list(self._vue(day).likers.get(restaurant, {}))
+
+    def load_all(self) -> dict:
+        """Tous les jours : {jour: {user: {restaurant: liked}}}."""
+        return {day: self.view_copy(day) for day in self.days()}
+
+    # ------------------------------
+    # Écriture
+    # ------------------------------
+
+    def append(self, day: str, user: str, restaurant: str, liked: bool):
+        self.append_many(day, [(user, restaurant, liked)])
+
+    def append_many(self, day: str, swipes):
+        """Ajoute des swipes (user, restaurant, liked) d'un même jour en une écriture."""
+        lines = "".join(_ligne(rec) for rec in self._records(swipes))
+        if not lines:
+            return
+        with self._lock, locking.file_lock(self._path(day)):
+            with open(self._path(day), "ab") as f:
+                f.write(lines.encode("utf-8"))
+                f.flush()
+                if self.fsync == FSYNC_ALWAYS or (
+                    self.fsync == FSYNC_INTERVAL and time.monotonic() - self._last_fsync >= self.fsync_interval
+                ):
+                    os.fsync(f.fileno())
+                    self._last_fsync = time.monotonic()
+
+    def rewrite(self, swipes: dict):
+        """Remplace tous les jours (opération rare : import, admin)."""
+        with self._lock:
+            if self.archive is not None:
+                self.archive.clear()
+            for day in self.hot_days():
+                if day not in swipes:
+                    locking.remove(self._path(day))
+            for day, by_user in swipes.items():
+                swipes_jour = [(u, r, liked) for u, by_resto in by_user.items() for r, liked in by_resto.items()]
+                lines = "".join(_ligne(rec) for rec in self._records(swipes_jour))
+                with locking.file_lock(self._path(day)):
+                    locking.atomic_write(self._path(day), lambda f: f.write(lines), encoding="utf-8")
+            self._vues.clear()
+
+    # ------------------------------
+    # Archivage
+    # ------------------------------
+
+    def compact(self, before: str, dry_run: bool = False) -> list:
+        """Archive l'état final des jours antérieurs à `before` (YYYY-MM-DD) ; renvoie ces jours."""
+        if self.archive is None:
+            return []
+        repris = pending(self.root, ".jsonl")
+        jours = [d for d in self.hot_days() if d < before and d not in repris]
+        if dry_run:
+            return sorted(set(jours) | set(repris))
+        with self._lock:
+            # Une compaction interrompue après l'écriture de l'archive : il ne reste qu'à nettoyer
+            a_archiver = {d: p for d, p in repris.items() if d not in self.archive}
+            for d in jours:
+                with locking.file_lock(self._path(d)):
+                    os.replace(self._path(d), self._path(d) + PENDING_SUFFIX)
+                a_archiver[d] = self._path(d) + PENDING_SUFFIX
+
+            records = []
+            for d, path in sorted(a_archiver.items()):
+                vue = _VueJour()
+                self._lire_suite(path, vue)
+                swipes = [(u, r, liked) for u, by_resto in vue.swipes.items() for r, liked in by_resto.items()]
+                records += [dict(rec, date=d) for rec in self._records(swipes, lecture=True)]
+            self.archive.add(records)
+            for path in set(repris.values()) | set(a_archiver.values()):
+                os.remove(path)
+        return sorted(set(jours) | set(repris))
+
+    def _records(self, swipes, lecture: bool = False):
+        """
+        Lignes à écrire. Avec `lecture` (compaction d'une vue relue), le
+        registre n'est pas modifié : un `#<id>` redonne son id, un nom inconnu
+        reste en clair.
+        """
+        swipes = list(swipes)
+        if self.registry is None:
+            return [{"user": u, "restaurant": r, "liked": bool(liked)} for u, r, liked in swipes]
+        noms = [r for _, r, _ in swipes]
+        ids = self.registry.connus(noms) if lecture else self.registry.ids(noms)
+        return [
+            {"user": u, "r": int(i), "liked": bool(liked)} if i >= 0 else {"user": u, "restaurant": r, "liked": bool(liked)}
+            for (u, r, liked), i in zip(swipes, ids)
+        ]
+
+
+def _ligne(rec: dict) -> str:
+    return json.dumps(rec, ensure_ascii=False) + "\n"
+
+
+def _copie(vue: dict) -> dict:
+    return {user: dict(by_resto) for user, by_resto in vue.items()}
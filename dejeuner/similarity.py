@@ -0,0 +1,148 @@
+"""
+Similarités entre les répondants du jour (« Qui te ressemble aujourd'hui ? »).
+
+Les top 3 du jour sont rangés dans une matrice personnes × restaurants
+(colonnes = uniquement les restaurants cités ce jour-là, d'où une matrice
+étroite même avec un gros catalogue) contenant les points 3/2/1 (0 = absent).
+Toute la matrice de similarité personnes × personnes est calculée en une
+fois, mise en cache par version des données, puis chaque personne lit ses
+voisins déjà triés.
+
+Mesures disponibles :
+  - "rang"    : Σ sur les restos communs de (4 - rang_moi) + (4 - rang_autre)
+                (la mesure historique de l'app) ;
+  - "cosinus" : cosinus entre les vecteurs de points ;
+  - "kendall" : tau-b de Kendall entre les classements (restos non cités ex æquo).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from dejeuner.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+METRIQUES = ("rang", "cosinus", "kendall")
+COLONNES_TOP = ["Restau_1", "Restau_2", "Restau_3"]
+CACHE_MAX = 16
+
+
+def _restos(row) -> list:
+    return [r if isinstance(r, str) else None for r in (row.get(c) for c in COLONNES_TOP)]
+
+
+class SimilarityMatrix:
+    def __init__(self, tops_df: pd.DataFrame, metrique: str = "rang"):
+        if metrique not in METRIQUES:
+            raise ValueError(f"Mesure de similarité inconnue: {metrique!r} (attendu: {METRIQUES})")
+        self.metrique = metrique
+        tops_df = tops_df.drop_duplicates(subset="user_id", keep="first")
+        records = tops_df.to_dict("records")
+
+        self.user_ids = [r["user_id"] for r in records]
+        self.personnes = {r["user_id"]: (r.get("prenom"), r.get("nom")) for r in records}
+        self._pos = {uid: i for i, uid in enumerate(self.user_ids)}
+
+        # Matrice des points (personnes × restaurants cités)
+        colonnes = {}
+        cellules = []
+        for i, row in enumerate(records):
+            for rang, resto in enumerate(_restos(row), start=1):
+                if resto:
+                    j = colonnes.setdefault(resto, len(colonnes))
+                    cellules.append((i, j, 4 - rang))
+        self.restaurants = np.array(list(colonnes), dtype=object)
+        self.points = np.zeros((len(records), len(colonnes)), dtype=np.float32)
+        for i, j, pts in cellules:
+            self.points[i, j] = max(self.points[i, j], pts)
+
+        cites = (self.points > 0).astype(np.float32)
+        self.communs = cites @ cites.T
+        self.scores = self._similarites(cites)
+
+        # Voisins triés de chacun (restos en commun uniquement)
+        self._voisins = {}
+        for i, uid in enumerate(self.user_ids):
+            candidats = np.flatnonzero(self.communs[i] > 0)
+            candidats = candidats[candidats != i]
+            ordre = candidats[np.argsort(-self.scores[i, candidats], kind="stable")]
+            self._voisins[uid] = ordre
+
+    def _similarites(self, cites: np.ndarray) -> np.ndarray:
+        P = self.points
+        if self.metrique == "rang":
+            # Σ_r [r commun] (P_ir + P_jr) = P·Bᵀ + B·Pᵀ
+            return P @ cites.T + cites @ P.T
+        if self.metrique == "cosinus":
+            normes = np.linalg.norm(P, axis=1)
+            normes[normes == 0] = 1
+            return (P @ P.T) / np.outer(normes, normes)
+        # Kendall : signe de chaque paire de restaurants pour chaque personne
+        a, b = np.triu_indices(P.shape[1], k=1)
+        signes = np.sign(P[:, a] - P[:, b])
+        concordance = signes @ signes.T
+        paires_non_ex_aequo = np.count_nonzero(signes, axis=1).astype(np.float32)
+        denom = np.sqrt(np.outer(paires_non_ex_aequo, paires_non_ex_aequo))
+        denom[denom == 0] = 1
+        return concordance / denom
+
+    def voisins(self, user_id: str) -> list:
+        """
+        Liste triée (plus similaire d'abord) de dicts :
+          {"user_id", "prenom", "nom", "score_sim", "restos_communs"}
+        """
+        i = self._pos.get(user_id)
+        if i is None:
+            return []
+        mes_restos = self.points[i] > 0
+        result = []
+        for j in self._voisins[user_id]:
+            communs = mes_restos & (self.points[j] > 0)
+            # Restos communs dans l'ordre de mon top 3
+            ordre = np.argsort(-self.points[i, communs], kind="stable")
+            uid = self.user_ids[j]
+            prenom, nom = self.personnes[uid]
+            score = self.scores[i, j]
+            result.append(
+                {
+                    "user_id": uid,
+                    "prenom": prenom,
+                    "nom": nom,
+                    "score_sim": int(round(score)) if self.metrique == "rang" else round(float(score), 2),
+                    "restos_communs": ", ".join(self.restaurants[communs][ordre]),
+                }
+            )
+        return result
+
+
+# ==============================
+# Cache par version des données
+# ==============================
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def empreinte(tops_df: pd.DataFrame) -> int:
+    """Empreinte du contenu utile des tops (sert de version quand on n'en a pas)."""
+    cols = [c for c in ["user_id", "prenom", "nom"] + COLONNES_TOP if c in tops_df.columns]
+    return int(pd.util.hash_pandas_object(tops_df[cols], index=False).sum())
+
+
+def get_similarites(tops_df: pd.DataFrame, metrique: str = "rang", version=None) -> SimilarityMatrix:
+    """Matrice de similarité partagée, recalculée seulement quand `version` (ou le contenu) change."""
+    key = (metrique, version if version is not None else empreinte(tops_df))
+    with _CACHE_LOCK:
+        matrice = _CACHE.get(key)
+        if matrice is not None:
+            _CACHE.move_to_end(key)
+            return matrice
+    matrice = SimilarityMatrix(tops_df, metrique)
+    with _CACHE_LOCK:
+        _CACHE[key] = matrice
+        while len(_CACHE) > CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return matrice
@@ -0,0 +1,770 @@
+"""
+Couche de stockage commune aux apps (utilisateurs, tops, swipes).
+
+Deux backends interchangeables, choisis via la variable d'environnement
+`DEJEUNER_STORAGE` :
+  - "files"  : fichiers plats (défaut) — users.csv + tops / swipes
+               partitionnés par jour, JSON pour Lunch Tinder ;
+  - "sqlite" : une base SQLite en mode WAL, partagée par toutes les apps
+               (les fichiers existants y sont importés au premier lancement).
+
+Les apps ne manipulent que `get_storage()` (app_dejeuner, app_tinder_resto)
+et `get_lunch_tinder_store()` (app_tinder_resto_v2).
+
+En mode fichiers, toute écriture prend le verrou inter-processus du fichier
+et les réécritures sont atomiques (fichier temporaire + `os.replace`) ; les
+lectures-modifications-écritures sont optimistes et rejouées en cas de
+conflit (voir dejeuner.locking). SQLite gère cela lui-même (transactions).
+
+Chaque store expose `version(table)`, un compteur qui augmente à chaque
+écriture (voir dejeuner.versions), pour mémoïser les vues dérivées.
+
+En mode fichiers, tops et swipes stockent des ids de restaurants plutôt que
+des noms (voir dejeuner.restaurants) : `sync_restaurants(catalogue, version)` aligne
+le registre sur Restaurants.xlsx, `rename_restaurant` renomme l'historique.
+`compact(avant)` archive les jours anciens (voir dejeuner.archives) ; les
+lectures d'historique incluent les archives.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from dejeuner import locking
+from dejeuner.journal import FSYNC_ALWAYS
+from dejeuner.lazy import lazy_import
+from dejeuner.partitions import get_table
+from dejeuner.restaurants import IdCodec, get_registry
+from dejeuner.shards import JsonlDayShards
+from dejeuner.users import UserDirectory
+from dejeuner.versions import VersionFiles, sqlite_triggers
+
+pd = lazy_import("pandas")
+
+BACKEND_FILES = "files"
+BACKEND_SQLITE = "sqlite"
+STORAGE_BACKEND = os.environ.get("DEJEUNER_STORAGE", BACKEND_FILES)
+
+DATA_DIR = "data"
+LUNCH_TINDER_DATA_DIR = "lunch_tinder_data"
+SQLITE_FILENAME = "dejeuner.sqlite3"
+ARCHIVES_DIR = "archives"
+
+# Politique de fsync du journal des swipes : "always", "interval" ou "never"
+SWIPES_FSYNC = os.environ.get("TINDER_SWIPES_FSYNC", FSYNC_ALWAYS)
+
+USERS_COLUMNS = ["user_id", "prenom", "nom", "password", "description"]
+TOPS_COLUMNS = [
+    "date",
+    "user_id",
+    "prenom",
+    "nom",
+    "Restau_1",
+    "Restau_2",
+    "Restau_3",
+    "Score_1",
+    "Score_2",
+    "Score_3",
+    "Distance_coeff",
+    "Prix_coeff",
+    "Quantite_coeff",
+    "Gourmandise_coeff",
+    "Chaleur_slider",
+    "Healthy_slider",
+    "Sandwich_slider",
+]
+SWIPES_COLUMNS = ["date", "user_id", "prenom", "nom", "restaurant", "decision"]
+TOPS_RESTAURANT_COLUMNS = ["Restau_1", "Restau_2", "Restau_3"]
+SWIPES_RESTAURANT_COLUMNS = ["restaurant"]
+
+
+def _str_or_none(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+# ==============================
+# Backend fichiers (CSV)
+# ==============================
+
+class CsvStorage:
+    """users.csv (annuaire indexé) + tops et swipes partitionnés par jour dans `data_dir`."""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self.users_path = os.path.join(data_dir, "users.csv")
+        os.makedirs(data_dir, exist_ok=True)
+        self.users = UserDirectory(self.users_path, USERS_COLUMNS)
+        self.restaurants = get_registry(data_dir)
+        self.tops = get_table(
+            os.path.join(data_dir, "tops"),
+            TOPS_COLUMNS,
+            legacy_path=os.path.join(data_dir, "tops.csv"),
+            codec=IdCodec(self.restaurants, TOPS_RESTAURANT_COLUMNS),
+            archive_root=os.path.join(data_dir, ARCHIVES_DIR, "tops"),
+        )
+        self.swipes = get_table(
+            os.path.join(data_dir, "tinder_swipes"),
+            SWIPES_COLUMNS,
+            legacy_path=os.path.join(data_dir, "tinder_swipes.csv"),
+            fsync=SWIPES_FSYNC,
+            codec=IdCodec(self.restaurants, SWIPES_RESTAURANT_COLUMNS),
+            archive_root=os.path.join(data_dir, ARCHIVES_DIR, "tinder_swipes"),
+        )
+        self.versions = VersionFiles(data_dir, ("users", "tops", "swipes"))
+
+    def version(self, table: str) -> int:
+        return self.versions.get(table)
+
+    # --- Restaurants ---
+
+    def sync_restaurants(self, catalogue: pd.DataFrame, version=None):
+        """Aligne le registre des ids sur le catalogue (renommages via la colonne `ID`)."""
+        if self.restaurants.sync(catalogue, version=version):
+            self.versions.bump("tops")
+            self.versions.bump("swipes")
+
+    def rename_restaurant(self, ancien: str, nouveau: str):
+        """Renomme un restaurant dans tout l'historique (tops et swipes), fusionné si `nouveau` existe déjà."""
+        self.restaurants.rename(ancien, nouveau, fusion=True)
+        self.versions.bump("tops")
+        self.versions.bump("swipes")
+
+    # --- Archivage ---
+
+    def compact(self, before: str, dry_run: bool = False) -> dict:
+        """Archive tops et swipes des jours antérieurs à `before` ; {table: jours archivés}."""
+        return {
+            "tops": self.tops.compact(before, dry_run=dry_run),
+            "swipes": self.swipes.compact(before, dry_run=dry_run),
+        }
+
+    # --- Utilisateurs ---
+
+    def load_users(self) -> pd.DataFrame:
+        return self.users.to_frame()
+
+    def save_users(self, df: pd.DataFrame):
+        self.users.replace_all(df)
+        self.versions.bump("users")
+
+    def get_user(self, user_id: str):
+        return self.users.get(user_id)
+
+    def add_user(self, row: dict):
+        self.users.add(row)
+        self.versions.bump("users")
+
+    def delete_user(self, user_id: str):
+        self.users.delete(user_id)
+        self.versions.bump("users")
+
+    # --- Tops ---
+
+    def load_tops(self, day: str = None) -> pd.DataFrame:
+        return self.tops.read(day)
+
+    def save_tops(self, df: pd.DataFrame):
+        self.tops.rewrite(df)
+        self.versions.bump("tops")
+
+    def upsert_top(self, row: dict):
+        def remplacer(tops_day):
+            tops_day = tops_day[tops_day["user_id"] != row["user_id"]]
+            return pd.concat([tops_day, pd.DataFrame([row])], ignore_index=True)
+
+        self.tops.update_day(row["date"], remplacer)
+        self.versions.bump("tops")
+
+    def delete_user_tops(self, user_id: str):
+        self.tops.delete_where("user_id", user_id)
+        self.versions.bump("tops")
+
+    # --- Swipes ---
+
+    def load_swipes(self, day: str = None) -> pd.DataFrame:
+        return self.swipes.read(day)
+
+    def save_swipes(self, df: pd.DataFrame):
+        self.swipes.rewrite(df)
+        self.versions.bump("swipes")
+
+    def append_swipe(self, row: dict):
+        self.swipes.append(row)
+        self.versions.bump("swipes")
+
+    def append_swipes(self, rows):
+        self.swipes.append_many(rows)
+        self.versions.bump("swipes")
+
+    def delete_swipes(self, day: str = None, user_id: str = None):
+        """Supprime les swipes d'un jour, d'un utilisateur, ou des deux combinés."""
+        if user_id is None:
+            if day is None:
+                self.swipes.clear()
+            else:
+                self.swipes.drop_day(day)
+        elif day is None:
+            self.swipes.delete_where("user_id", user_id)
+        else:
+            self.swipes.delete_where("user_id", user_id, day=day)
+        self.versions.bump("swipes")
+
+    def pop_last_swipe(self, day: str, user_id: str):
+        """Annule le dernier swipe d'un utilisateur pour un jour donné."""
+        def sans_dernier(swipes_day):
+            mine = swipes_day[swipes_day["user_id"] == user_id]
+            return None if mine.empty else swipes_day.drop(mine.index[-1])
+
+        self.swipes.update_day(day, sans_dernier)
+        self.versions.bump("swipes")
+
+
+# ==============================
+# Backend SQLite
+# ==============================
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    prenom TEXT, nom TEXT, password TEXT, description TEXT
+);
+CREATE TABLE IF NOT EXISTS tops (
+    {", ".join(f'"{c}" TEXT' for c in TOPS_COLUMNS)},
+    PRIMARY KEY (date, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tops_date_resto ON tops (date, Restau_1, Restau_2, Restau_3);
+CREATE TABLE IF NOT EXISTS swipes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT, user_id TEXT, prenom TEXT, nom TEXT, restaurant TEXT, decision TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_swipes_date_user ON swipes (date, user_id);
+CREATE INDEX IF NOT EXISTS idx_swipes_date_resto ON swipes (date, restaurant);
+CREATE TABLE IF NOT EXISTS lt_users (
+    username TEXT PRIMARY KEY,
+    prenom TEXT, nom TEXT, password TEXT, is_admin INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS lt_swipes (
+    date TEXT, username TEXT, restaurant TEXT, liked INTEGER NOT NULL,
+    PRIMARY KEY (date, username, restaurant)
+);
+CREATE INDEX IF NOT EXISTS idx_lt_swipes_date_resto ON lt_swipes (date, restaurant);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY
+);
+""" + sqlite_triggers(("users", "tops", "swipes", "lt_users", "lt_swipes"))
+
+
+class SqliteDatabase:
+    """Connexions SQLite (une par thread) sur une base en mode WAL."""
+
+    def __init__(self, path: str):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._local = threading.local()
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params=()):
+        return self.connection().execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        """Transaction d'écriture (BEGIN IMMEDIATE) ; dans une transaction en cours, s'y joint."""
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    def executemany(self, sql: str, rows, clear_sql: str = None):
+        """Insère `rows` en une transaction, après `clear_sql` éventuel (remplacement complet)."""
+        with self.transaction() as conn:
+            if clear_sql:
+                conn.execute(clear_sql)
+            conn.executemany(sql, rows)
+
+    def import_once(self, source: str, importer) -> bool:
+        """
+        Appelle `importer()` une seule fois par source (reprise des fichiers
+        existants). La source n'est marquée importée qu'avec ses données, dans
+        la même transaction : un import interrompu est refait au lancement suivant.
+        """
+        with self.transaction() as conn:
+            cur = conn.execute("INSERT OR IGNORE INTO imports (source) VALUES (?)", (os.path.abspath(source),))
+            if cur.rowcount != 1:
+                return False
+            importer()
+        return True
+
+    def query_df(self, sql: str, columns, params=()) -> pd.DataFrame:
+        rows = self.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=columns, dtype=object)
+
+    def version(self, table: str) -> int:
+        row = self.execute("SELECT version FROM versions WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+
+class SqliteStorage:
+    """Même interface que `CsvStorage`, adossée aux tables users / tops / swipes."""
+
+    def __init__(self, db: SqliteDatabase, import_from: str = None):
+        self.db = db
+        if import_from and os.path.isdir(import_from):
+            db.import_once(import_from, lambda: self._import_csv(CsvStorage(import_from)))
+
+    def version(self, table: str) -> int:
+        return self.db.version(table)
+
+    # --- Restaurants ---
+
+    def sync_restaurants(self, catalogue: pd.DataFrame, version=None):
+        """Sans objet : la base garde les noms (renommer avec `rename_restaurant`)."""
+
+    def rename_restaurant(self, ancien: str, nouveau: str):
+        """Renomme un restaurant dans tout l'historique (tops et swipes), en une transaction."""
+        with self.db.transaction() as conn:
+            for col in TOPS_RESTAURANT_COLUMNS:
+                conn.execute(f'UPDATE tops SET "{col}" = ? WHERE "{col}" = ?', (nouveau, ancien))
+            conn.execute("UPDATE swipes SET restaurant = ? WHERE restaurant = ?", (nouveau, ancien))
+
+    def compact(self, before: str, dry_run: bool = False) -> dict:
+        """Sans objet : les requêtes par jour passent par les index de la base."""
+        return {}
+
+    def _import_csv(self, source: CsvStorage):
+        """Reprend les données du backend CSV à la création de la base."""
+        self.save_users(source.load_users())
+        self.save_tops(source.load_tops())
+        self.save_swipes(source.load_swipes())
+
+    # --- Utilisateurs ---
+
+    def load_users(self) -> pd.DataFrame:
+        cols = ", ".join(USERS_COLUMNS)
+        return self.db.query_df(f"SELECT {cols} FROM users ORDER BY rowid", USERS_COLUMNS)
+
+    def save_users(self, df: pd.DataFrame):
+        self._insert("users", USERS_COLUMNS, df.to_dict("records"), "INSERT OR REPLACE", replace_all=True)
+
+    def get_user(self, user_id: str):
+        cols = ", ".join(USERS_COLUMNS)
+        row = self.db.execute(f"SELECT {cols} FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return dict(zip(USERS_COLUMNS, row)) if row else None
+
+    def add_user(self, row: dict):
+        self._insert("users", USERS_COLUMNS, [row], "INSERT OR REPLACE")
+
+    def delete_user(self, user_id: str):
+        self.db.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+    # --- Tops ---
+
+    def load_tops(self, day: str = None) -> pd.DataFrame:
+        cols = ", ".join(f'"{c}"' for c in TOPS_COLUMNS)
+        if day is None:
+            return self.db.query_df(f"SELECT {cols} FROM tops ORDER BY rowid", TOPS_COLUMNS)
+        return self.db.query_df(f"SELECT {cols} FROM tops WHERE date = ? ORDER BY rowid", TOPS_COLUMNS, (day,))
+
+    def save_tops(self, df: pd.DataFrame):
+        self._insert("tops", TOPS_COLUMNS, df.to_dict("records"), "INSERT OR REPLACE", replace_all=True)
+
+    def upsert_top(self, row: dict):
+        # REPLACE supprime puis réinsère : le top remis à jour passe en fin de jour, comme en CSV
+        self._insert("tops", TOPS_COLUMNS, [row], "INSERT OR REPLACE")
+
+    def delete_user_tops(self, user_id: str):
+        self.db.execute("DELETE FROM tops WHERE user_id = ?", (user_id,))
+
+    # --- Swipes ---
+
+    def load_swipes(self, day: str = None) -> pd.DataFrame:
+        cols = ", ".join(SWIPES_COLUMNS)
+        if day is None:
+            return self.db.query_df(f"SELECT {cols} FROM swipes ORDER BY id", SWIPES_COLUMNS)
+        return self.db.query_df(f"SELECT {cols} FROM swipes WHERE date = ? ORDER BY id", SWIPES_COLUMNS, (day,))
+
+    def save_swipes(self, df: pd.DataFrame):
+        self._insert("swipes", SWIPES_COLUMNS, df.to_dict("records"), replace_all=True)
+
+    def append_swipe(self, row: dict):
+        self._insert("swipes", SWIPES_COLUMNS, [row])
+
+    def append_swipes(self, rows):
+        self._insert("swipes", SWIPES_COLUMNS, rows)
+
+    def delete_swipes(self, day: str = None, user_id: str = None):
+        """Supprime les swipes d'un jour, d'un utilisateur, ou des deux combinés."""
+        clauses, params = [], []
+        if day is not None:
+            clauses.append("date = ?")
+            params.append(day)
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        self.db.execute(f"DELETE FROM swipes{where}", params)
+
+    def pop_last_swipe(self, day: str, user_id: str):
+        """Annule le dernier swipe d'un utilisateur pour un jour donné."""
+        self.db.execute(
+            "DELETE FROM swipes WHERE id = (SELECT MAX(id) FROM swipes WHERE date = ? AND user_id = ?)",
+            (day, user_id),
+        )
+
+    # --- Interne ---
+
+    def _insert(self, table: str, columns, records, verb: str = "INSERT", replace_all: bool = False):
+        cols = ", ".join(f'"{c}"' for c in columns)
+        marks = ", ".join("?" for _ in columns)
+        rows = [tuple(_str_or_none(r.get(c)) for c in columns) for r in records]
+        clear_sql = f"DELETE FROM {table}" if replace_all else None
+        self.db.executemany(f"{verb} INTO {table} ({cols}) VALUES ({marks})", rows, clear_sql=clear_sql)
+
+
+# ==============================
+# Stores de Lunch Tinder (app_tinder_resto_v2)
+# ==============================
+
+class JsonLunchTinderStore:
+    """
+    users.json + swipes en JSONL, un fichier par jour (voir dejeuner.shards).
+    L'annuaire des utilisateurs est gardé en mémoire et relu seulement quand
+    users.json change (écriture par ce processus ou par un autre).
+    """
+
+    def __init__(self, data_dir: str = LUNCH_TINDER_DATA_DIR):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.users_path = os.path.join(data_dir, "users.json")
+        self._users = None
+        self._users_stamp = None
+        self._users_lock = threading.Lock()
+        self.restaurants = get_registry(data_dir)
+        self.swipes = JsonlDayShards(
+            os.path.join(data_dir, "swipes"),
+            legacy_path=os.path.join(data_dir, "swipes.json"),
+            fsync=SWIPES_FSYNC,
+            registry=self.restaurants,
+            archive_root=os.path.join(data_dir, ARCHIVES_DIR, "swipes"),
+        )
+        self.versions = VersionFiles(data_dir, ("users", "swipes"))
+
+    def version(self, table: str) -> int:
+        return self.versions.get(table)
+
+    # --- Restaurants ---
+
+    def sync_restaurants(self, catalogue: pd.DataFrame, version=None):
+        """Aligne le registre des ids sur le catalogue (renommages via la colonne `ID`)."""
+        if self.restaurants.sync(catalogue, version=version):
+            self.versions.bump("swipes")
+
+    def rename_restaurant(self, ancien: str, nouveau: str):
+        """Renomme un restaurant dans tout l'historique des swipes, fusionné si `nouveau` existe déjà."""
+        self.restaurants.rename(ancien, nouveau, fusion=True)
+        self.versions.bump("swipes")
+
+    # --- Archivage ---
+
+    def compact(self, before: str, dry_run: bool = False) -> dict:
+        """Archive les swipes des jours antérieurs à `before` ; {table: jours archivés}."""
+        return {"swipes": self.swipes.compact(before, dry_run=dry_run)}
+
+    def _read_json(self, path: str):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path: str, data):
+        with locking.file_lock(path):
+            locking.atomic_write(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # --- Utilisateurs ---
+
+    def _stamp(self):
+        try:
+            info = os.stat(self.users_path)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _directory(self) -> dict:
+        """Annuaire en mémoire (un stat par appel, relecture si le fichier a changé)."""
+        stamp = self._stamp()
+        with self._users_lock:
+            if self._users is None or stamp != self._users_stamp:
+                self._users = self._read_json(self.users_path)
+                self._users_stamp = stamp
+            return self._users
+
+    def load_users(self) -> dict:
+        return {username: dict(info) for username, info in self._directory().items()}
+
+    def save_users(self, users: dict):
+        with self._users_lock:
+            self._write_json(self.users_path, users)
+            self._users = {username: dict(info) for username, info in users.items()}
+            self._users_stamp = self._stamp()
+        self.versions.bump("users")
+
+    def get_user(self, username: str):
+        info = self._directory().get(username)
+        return dict(info) if info is not None else None
+
+    def add_user(self, username: str, info: dict):
+        def ajouter(users):
+            users[username] = info
+            return users
+
+        locking.update(self.users_path, self.load_users, ajouter, self.save_users)
+
+    def display_names(self, usernames) -> dict:
+        """{username: "Prénom Nom"} des utilisateurs connus."""
+        directory = self._directory()
+        return {u: f"{directory[u]['prenom']} {directory[u]['nom']}" for u in usernames if u in directory}
+
+    # --- Swipes ---
+
+    def load_swipes(self) -> dict:
+        return self.swipes.load_all()
+
+    def save_swipes(self, swipes: dict):
+        self.swipes.rewrite(swipes)
+        self.versions.bump("swipes")
+
+    def swipes_for_day(self, day: str) -> dict:
+        return self.swipes.view_copy(day)
+
+    def user_swipes(self, day: str, username: str) -> dict:
+        return self.swipes.view_copy(day).get(username, {})
+
+    def likers(self, day: str, restaurant: str):
+        """Usernames ayant liké `restaurant` ce jour-là."""
+        return self.swipes.likers(day, restaurant)
+
+    def matches(self, day: str, username: str, restaurant: str):
+        """Noms affichables des autres personnes ayant liké `restaurant` ce jour-là."""
+        others = [u for u in self.likers(day, restaurant) if u != username]
+        return list(self.display_names(others).values())
+
+    def add_swipe(self, day: str, username: str, restaurant: str, liked: bool):
+        self.swipes.append(day, username, restaurant, liked)
+        self.versions.bump("swipes")
+
+    def add_swipes(self, swipes):
+        """Ajoute des swipes (day, username, restaurant, liked) : une écriture par jour."""
+        par_jour = {}
+        for day, username, restaurant, liked in swipes:
+            par_jour.setdefault(day, []).append((username, restaurant, liked))
+        for day, lignes in par_jour.items():
+            self.swipes.append_many(day, lignes)
+        self.versions.bump("swipes")
+
+
+class SqliteLunchTinderStore:
+    """Même interface que `JsonLunchTinderStore`, tables lt_users / lt_swipes."""
+
+    def __init__(self, db: SqliteDatabase, import_from: str = None):
+        self.db = db
+        if import_from and os.path.isdir(import_from):
+            db.import_once(import_from, lambda: self._import_json(JsonLunchTinderStore(import_from)))
+
+    def version(self, table: str) -> int:
+        return self.db.version({"users": "lt_users", "swipes": "lt_swipes"}[table])
+
+    # --- Restaurants ---
+
+    def sync_restaurants(self, catalogue: pd.DataFrame, version=None):
+        """Sans objet : la base garde les noms (renommer avec `rename_restaurant`)."""
+
+    def rename_restaurant(self, ancien: str, nouveau: str):
+        """Renomme un restaurant dans tout l'historique des swipes."""
+        # OR REPLACE : un swipe déjà présent sous le nouveau nom le même jour est remplacé
+        self.db.execute("UPDATE OR REPLACE lt_swipes SET restaurant = ? WHERE restaurant = ?", (nouveau, ancien))
+
+    def compact(self, before: str, dry_run: bool = False) -> dict:
+        """Sans objet : les requêtes par jour passent par les index de la base."""
+        return {}
+
+    def _import_json(self, source: JsonLunchTinderStore):
+        """Reprend les données du backend JSON à la création de la base."""
+        self.save_users(source.load_users())
+        self.save_swipes(source.load_swipes())
+
+    # --- Utilisateurs ---
+
+    def load_users(self) -> dict:
+        rows = self.db.execute("SELECT username, prenom, nom, password, is_admin FROM lt_users ORDER BY rowid")
+        return {
+            u: {"prenom": p, "nom": n, "password": pw, "is_admin": bool(a)}
+            for u, p, n, pw, a in rows.fetchall()
+        }
+
+    def save_users(self, users: dict):
+        rows = [self._user_row(username, info) for username, info in users.items()]
+        self.db.executemany(self._USER_UPSERT, rows, clear_sql="DELETE FROM lt_users")
+
+    def get_user(self, username: str):
+        row = self.db.execute(
+            "SELECT prenom, nom, password, is_admin FROM lt_users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"prenom": row[0], "nom": row[1], "password": row[2], "is_admin": bool(row[3])}
+
+    def add_user(self, username: str, info: dict):
+        self.db.execute(self._USER_UPSERT, self._user_row(username, info))
+
+    def display_names(self, usernames) -> dict:
+        """{username: "Prénom Nom"} des utilisateurs connus."""
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        marks = ", ".join("?" for _ in usernames)
+        rows = self.db.execute(f"SELECT username, prenom, nom FROM lt_users WHERE username IN ({marks})", usernames)
+        names = {u: f"{p} {n}" for u, p, n in rows.fetchall()}
+        return {u: names[u] for u in usernames if u in names}
+
+    _USER_UPSERT = "INSERT OR REPLACE INTO lt_users (username, prenom, nom, password, is_admin) VALUES (?, ?, ?, ?, ?)"
+
+    @staticmethod
+    def _user_row(username: str, info: dict):
+        return (username, info.get("prenom"), info.get("nom"), info.get("password"), int(bool(info.get("is_admin"))))
+
+    # --- Swipes ---
+
+    def load_swipes(self) -> dict:
+        swipes = {}
+        rows = self.db.execute("SELECT date, username, restaurant, liked FROM lt_swipes ORDER BY rowid")
+        for day, username, restaurant, liked in rows.fetchall():
+            swipes.setdefault(day, {}).setdefault(username, {})[restaurant] = bool(liked)
+        return swipes
+
+    def save_swipes(self, swipes: dict):
+        rows = [
+            (day, username, restaurant, int(bool(liked)))
+            for day, by_user in swipes.items()
+            for username, by_resto in by_user.items()
+            for restaurant, liked in by_resto.items()
+        ]
+        self.db.executemany(
+            "INSERT OR REPLACE INTO lt_swipes (date, username, restaurant, liked) VALUES (?, ?, ?, ?)",
+            rows,
+            clear_sql="DELETE FROM lt_swipes",
+        )
+
+    def swipes_for_day(self, day: str) -> dict:
+        day_swipes = {}
+        rows = self.db.execute("SELECT username, restaurant, liked FROM lt_swipes WHERE date = ? ORDER BY rowid", (day,))
+        for username, restaurant, liked in rows.fetchall():
+            day_swipes.setdefault(username, {})[restaurant] = bool(liked)
+        return day_swipes
+
+    def user_swipes(self, day: str, username: str) -> dict:
+        rows = self.db.execute(
+            "SELECT restaurant, liked FROM lt_swipes WHERE date = ? AND username = ? ORDER BY rowid", (day, username)
+        )
+        return {restaurant: bool(liked) for restaurant, liked in rows.fetchall()}
+
+    def likers(self, day: str, restaurant: str):
+        """Usernames ayant liké `restaurant` ce jour-là."""
+        rows = self.db.execute(
+            "SELECT username FROM lt_swipes WHERE date = ? AND restaurant = ? AND liked = 1 ORDER BY rowid",
+            (day, restaurant),
+        )
+        return [r[0] for r in rows.fetchall()]
+
+    def matches(self, day: str, username: str, restaurant: str):
+        """Noms affichables des autres personnes ayant liké `restaurant` ce jour-là (une requête)."""
+        rows = self.db.execute(
+            "SELECT u.prenom, u.nom FROM lt_swipes s JOIN lt_users u ON u.username = s.username "
+            "WHERE s.date = ? AND s.restaurant = ? AND s.liked = 1 AND s.username != ? ORDER BY s.rowid",
+            (day, restaurant, username),
+        )
+        return [f"{p} {n}" for p, n in rows.fetchall()]
+
+    def add_swipe(self, day: str, username: str, restaurant: str, liked: bool):
+        self.add_swipes([(day, username, restaurant, liked)])
+
+    def add_swipes(self, swipes):
+        """Ajoute des swipes (day, username, restaurant, liked) en une transaction."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO lt_swipes (date, username, restaurant, liked) VALUES (?, ?, ?, ?)",
+            [(day, username, restaurant, int(bool(liked))) for day, username, restaurant, liked in swipes],
+        )
+
+
+# ==============================
+# Registre par processus
+# ==============================
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def sqlite_path() -> str:
+    return os.environ.get("DEJEUNER_SQLITE_PATH", os.path.join(DATA_DIR, SQLITE_FILENAME))
+
+
+def _get_database() -> SqliteDatabase:
+    key = ("db", os.path.abspath(sqlite_path()))
+    db = _STORES.get(key)
+    if db is None:
+        db = SqliteDatabase(sqlite_path())
+        _STORES[key] = db
+    return db
+
+
+def get_storage(data_dir: str = DATA_DIR, backend: str = None):
+    """Stockage users / tops / swipes (app_dejeuner et app_tinder_resto)."""
+    backend = backend or STORAGE_BACKEND
+    key = (backend, os.path.abspath(data_dir))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            if backend == BACKEND_SQLITE:
+                store = SqliteStorage(_get_database(), import_from=data_dir)
+            elif backend == BACKEND_FILES:
+                store = CsvStorage(data_dir)
+            else:
+                raise ValueError(f"Backend de stockage inconnu: {backend!r}")
+            _STORES[key] = store
+        return store
+
+
+def get_lunch_tinder_store(data_dir: str = LUNCH_TINDER_DATA_DIR, backend: str = None):
+    """Stockage utilisateurs / swipes de Lunch Tinder (app_tinder_resto_v2)."""
+    backend = backend or STORAGE_BACKEND
+    key = ("lunch_tinder", backend, os.path.abspath(data_dir))
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            if backend == BACKEND_SQLITE:
+                store = SqliteLunchTinderStore(_get_database(), import_from=data_dir)
+            elif backend == BACKEND_FILES:
+                store = JsonLunchTinderStore(data_dir)
+            else:
+                raise ValueError(f"Backend de stockage inconnu: {backend!r}")
+            _STORES[key] = store
+        return store
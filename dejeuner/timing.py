@@ -0,0 +1,180 @@
+"""
+Mesure légère des temps par étape (« span ») d'un rerun Streamlit.
+
+    with span("chargement.tops"):
+        ...
+
+    @timed("calcul.scoring")
+    def calculer(...):
+        ...
+
+Chaque span garde en mémoire du processus ses `WINDOW` dernières durées ;
+`rapport()` en tire p50 / p95 / p99 (fenêtre glissante), le nombre d'appels
+et le temps cumulé. Chaque span tient aussi un histogramme cumulatif
+(`BUCKETS`, exporté par dejeuner.metrics). Une mesure coûte deux lectures
+d'horloge et un ajout dans un deque (de l'ordre de la microseconde). Les
+noms suivent la convention `chargement.*`, `calcul.*`, `rendu.*`, plus
+`rerun` pour le script entier et `warmup.<app>` pour une passe
+d'échauffement ; les spans s'imbriquent (un `rendu.*` inclut les chargements
+et calculs faits pendant le rendu).
+
+`DEJEUNER_TIMING=0` désactive la mesure (les spans ne font plus rien).
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+
+from dejeuner.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+ENABLED = os.environ.get("DEJEUNER_TIMING", "1").lower() not in ("0", "false", "no", "off")
+WINDOW = int(os.environ.get("DEJEUNER_TIMING_WINDOW", "1000"))
+# Bornes des buckets d'histogramme, en secondes
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_BUCKETS_NS = tuple(int(b * 1e9) for b in BUCKETS)
+
+
+class SpanStats:
+    __slots__ = ("durees", "appels", "total_ns", "buckets", "_lock")
+
+    def __init__(self, window: int = WINDOW):
+        self.durees = deque(maxlen=window)  # ns, les plus récentes
+        self.appels = 0
+        self.total_ns = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # non cumulés, dernier = +Inf
+        self._lock = threading.Lock()
+
+    def add(self, ns: int):
+        i = bisect.bisect_left(_BUCKETS_NS, ns)
+        with self._lock:
+            self.durees.append(ns)
+            self.appels += 1
+            self.total_ns += ns
+            self.buckets[i] += 1
+
+    def clear(self):
+        with self._lock:
+            self.durees.clear()
+            self.appels = 0
+            self.total_ns = 0
+            self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def histogram(self):
+        """(buckets cumulés, nombre d'appels, somme en ns)."""
+        with self._lock:
+            buckets, appels, total_ns = list(self.buckets), self.appels, self.total_ns
+        cumul, acc = [], 0
+        for n in buckets:
+            acc += n
+            cumul.append(acc)
+        return cumul, appels, total_ns
+
+    def snapshot(self):
+        with self._lock:
+            return np.fromiter(self.durees, dtype=np.int64, count=len(self.durees)), self.appels, self.total_ns
+
+
+class _Span:
+    __slots__ = ("stats", "debut")
+
+    def __init__(self, stats: SpanStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.debut = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(perf_counter_ns() - self.debut)
+
+
+class _Rien:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_RIEN = _Rien()
+_SPANS = {}
+_SPANS_LOCK = threading.Lock()
+
+
+def stats(name: str) -> SpanStats:
+    s = _SPANS.get(name)
+    if s is None:
+        with _SPANS_LOCK:
+            s = _SPANS.setdefault(name, SpanStats())
+    return s
+
+
+def span(name: str):
+    """Context manager qui mesure son bloc sous `name`."""
+    if not ENABLED:
+        return _RIEN
+    return _Span(stats(name))
+
+
+def timed(name: str):
+    """Décorateur : chaque appel de la fonction est mesuré sous `name`."""
+    def decorer(fn):
+        if not ENABLED:
+            return fn
+        s = stats(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            debut = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                s.add(perf_counter_ns() - debut)
+        return wrapper
+    return decorer
+
+
+def spans() -> dict:
+    """name -> SpanStats de tous les spans connus."""
+    with _SPANS_LOCK:
+        return dict(_SPANS)
+
+
+def rapport() -> list:
+    """Une ligne par span (temps en ms), triées par temps cumulé décroissant."""
+    with _SPANS_LOCK:
+        items = list(_SPANS.items())
+    lignes = []
+    for name, s in items:
+        durees, appels, total_ns = s.snapshot()
+        if appels == 0:
+            continue
+        p50, p95, p99 = np.percentile(durees, [50, 95, 99]) / 1e6
+        lignes.append(
+            {
+                "Span": name,
+                "Appels": appels,
+                "p50 (ms)": round(float(p50), 3),
+                "p95 (ms)": round(float(p95), 3),
+                "p99 (ms)": round(float(p99), 3),
+                "Total (s)": round(total_ns / 1e9, 3),
+            }
+        )
+    return sorted(lignes, key=lambda l: l["Total (s)"], reverse=True)
+
+
+def reset():
+    # Remise à zéro en place : les fonctions décorées gardent leur SpanStats
+    with _SPANS_LOCK:
+        items = list(_SPANS.values())
+    for s in items:
+        s.clear()
@@ -0,0 +1,123 @@
+"""
+Annuaire des utilisateurs (users.csv) indexé en mémoire.
+
+Le fichier est lu une fois par processus dans un dict {user_id: ligne} ;
+une connexion coûte ensuite un `stat` et une lecture de dict, quel que soit
+le nombre d'inscrits. Il est relu seulement si un autre processus l'a
+modifié. Une création de compte ajoute une ligne en fin de fichier ; une
+suppression réécrit le fichier depuis l'index (sans reparser le CSV), de
+façon atomique. Toutes les écritures prennent le verrou du fichier (voir
+dejeuner.locking).
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import threading
+
+from dejeuner import locking
+from dejeuner.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+
+class UserDirectory:
+    def __init__(self, path: str, columns):
+        self.path = path
+        self.columns = list(columns)
+        self._users = None    # user_id -> ligne (dict), dans l'ordre du fichier
+        self._version = None  # version du fichier correspondant à l'index
+        self._lock = threading.RLock()
+
+    # ------------------------------
+    # Index
+    # ------------------------------
+
+    def _read(self):
+        users = {}
+        if os.path.exists(self.path):
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    record = {c: (row.get(c) or None) for c in self.columns}
+                    # Doublons éventuels : la première ligne fait foi (comme l'ancien filtre + iloc[0])
+                    users.setdefault(record["user_id"], record)
+        return users
+
+    def _index(self) -> dict:
+        """Index à jour (relu seulement si le fichier a changé depuis la dernière lecture)."""
+        version = locking.file_version(self.path)
+        with self._lock:
+            if self._users is None or version != self._version:
+                self._users = self._read()
+                self._version = version
+            return self._users
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+
+    def get(self, user_id: str):
+        record = self._index().get(user_id)
+        return dict(record) if record is not None else None
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._index()
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self._index().values()), columns=self.columns)
+
+    # ------------------------------
+    # Écriture
+    # ------------------------------
+
+    def add(self, row: dict):
+        """Crée un compte : une ligne ajoutée en fin de fichier."""
+        record = {c: _str_or_none(row.get(c)) for c in self.columns}
+        with locking.file_lock(self.path), self._lock:
+            users = self._index()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                if f.tell() == 0:
+                    writer.writerow(self.columns)
+                writer.writerow(["" if record[c] is None else record[c] for c in self.columns])
+            users.setdefault(record["user_id"], record)
+            self._version = locking.file_version(self.path)
+
+    def delete(self, user_id: str):
+        """Supprime un compte (réécriture atomique depuis l'index)."""
+        with locking.file_lock(self.path), self._lock:
+            users = self._index()
+            if user_id not in users:
+                return
+            del users[user_id]
+            self._write(users.values())
+
+    def replace_all(self, df: pd.DataFrame):
+        """Remplace tout l'annuaire (opérations d'admin, import)."""
+        records = [{c: _str_or_none(r.get(c)) for c in self.columns} for r in df.to_dict("records")]
+        with locking.file_lock(self.path), self._lock:
+            users = {}
+            for record in records:
+                users.setdefault(record["user_id"], record)
+            self._write(records)
+            self._users = users
+
+    def _write(self, records):
+        def ecrire(f):
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(self.columns)
+            for record in records:
+                writer.writerow(["" if record[c] is None else record[c] for c in self.columns])
+
+        locking.atomic_write(self.path, ecrire, newline="", encoding="utf-8")
+        self._version = locking.file_version(self.path)
+
+
+def _str_or_none(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
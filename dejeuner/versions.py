@@ -0,0 +1,70 @@
+"""
+Numéros de version des données, partagés entre processus.
+
+Chaque table (users, tops, swipes...) a un compteur qui augmente à chaque
+écriture faite par la couche de stockage. En mode fichiers, c'est un petit
+fichier `<données>/.versions/<table>` (largeur fixe, mis à jour sous verrou) ;
+en SQLite, une table `versions` tenue à jour par des triggers. Les vues
+dérivées (voir dejeuner.memo) se recalculent seulement quand il change.
+"""
+
+import os
+
+from dejeuner import locking
+
+VERSIONS_DIRNAME = ".versions"
+_LARGEUR = 20
+
+
+class VersionFile:
+    """Compteur monotone stocké dans un fichier."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def get(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                return int(f.read(_LARGEUR) or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self) -> int:
+        """Incrémente le compteur et retourne la nouvelle version."""
+        with locking.file_lock(self.path):
+            version = self.get() + 1
+            # Une seule écriture de largeur fixe : un lecteur ne voit jamais un nombre tronqué
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, str(version).zfill(_LARGEUR).encode("ascii"))
+            finally:
+                os.close(fd)
+            return version
+
+
+class VersionFiles:
+    """Compteurs des tables d'un dossier de données."""
+
+    def __init__(self, data_dir: str, tables):
+        root = os.path.join(data_dir, VERSIONS_DIRNAME)
+        self._files = {t: VersionFile(os.path.join(root, t)) for t in tables}
+
+    def get(self, table: str) -> int:
+        return self._files[table].get()
+
+    def bump(self, table: str) -> int:
+        return self._files[table].bump()
+
+
+def sqlite_triggers(tables) -> str:
+    """Schéma de la table `versions` et des triggers qui la tiennent à jour."""
+    sql = ["CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL);"]
+    for table in tables:
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            sql.append(
+                f"CREATE TRIGGER IF NOT EXISTS version_{table}_{op.lower()} AFTER {op} ON {table} BEGIN "
+                f"INSERT INTO versions (name, version) VALUES ('{table}', 1) "
+                f"ON CONFLICT(name) DO UPDATE SET version = version + 1; END;"
+            )
+    return "\n".join(sql)
@@ -0,0 +1,195 @@
+"""
+Échauffement des caches : au démarrage du serveur et avant le rush de midi.
+
+    warmup.start("dejeuner", [
+        ("catalogue", lambda: load_catalog(RESTAURANTS_PATH)),
+        ("tops", lambda: tops_du_jour(date.today().isoformat())),
+    ])
+
+Chaque app déclare ses étapes (lecture du catalogue Excel, matrice de
+scoring, partitions du jour, vues dérivées mémoïsées...) ; une passe les
+exécute dans l'ordre, dans un thread d'arrière-plan, après l'import de
+pandas et numpy. La première passe est lancée au premier rerun du processus
+(Streamlit n'exécute le script qu'à la première connexion : l'écran de
+connexion s'affiche pendant ce temps), les suivantes aux heures de
+`DEJEUNER_WARMUP_AT` (« 11:30 » par défaut, plusieurs heures séparées par
+des virgules, vide pour aucune) : les partitions du jour sont alors déjà
+chargées quand le premier collègue arrive.
+
+Une étape en erreur est journalisée et n'empêche pas les suivantes.
+`ready()` devient vrai à la fin de la première passe de chaque app ;
+`status()` détaille les passes (exposé par dejeuner.metrics sur `/ready`).
+`DEJEUNER_WARMUP=0` désactive l'échauffement (seuls les imports restent
+préchargés, voir dejeuner.lazy).
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dejeuner import lazy, timing
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DEJEUNER_WARMUP", "1").lower() not in ("0", "false", "no", "off")
+WARMUP_AT = os.environ.get("DEJEUNER_WARMUP_AT", "11:30")
+IMPORTS = ("pandas", "numpy")
+
+
+def horaires(texte: str) -> list:
+    """Heures « HH:MM » séparées par des virgules -> [(heure, minute)] triées."""
+    heures = []
+    for morceau in texte.split(","):
+        if morceau.strip():
+            h = datetime.strptime(morceau.strip(), "%H:%M")
+            heures.append((h.hour, h.minute))
+    return sorted(set(heures))
+
+
+def prochaine(heures, maintenant: datetime = None):
+    """Prochaine occurrence (datetime) d'une des `heures`, ou None si aucune."""
+    maintenant = maintenant or datetime.now()
+    candidats = []
+    for h, m in heures:
+        t = maintenant.replace(hour=h, minute=m, second=0, microsecond=0)
+        candidats.append(t if t > maintenant else t + timedelta(days=1))
+    return min(candidats, default=None)
+
+
+def _iso(t):
+    return t.isoformat(timespec="seconds") if t is not None else None
+
+
+class Warmup:
+    """Étapes `[(nom, fonction)]` d'une app, rejouées aux heures `heures`."""
+
+    def __init__(self, name: str, steps, heures=()):
+        self.name = name
+        self.steps = list(steps)
+        self.heures = list(heures)
+        self.passes = 0
+        self.running = False
+        self.last_start = None
+        self.last_end = None
+        self.next_run = None
+        self.resultats = {}  # étape -> {"ms", "error"}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.passes > 0
+
+    def run(self) -> bool:
+        """Une passe complète (synchrone). Vrai si aucune étape n'a échoué."""
+        with self._lock:
+            self.running = True
+            self.last_start = datetime.now()
+        resultats = {}
+        etapes = [("imports", lambda: [importlib.import_module(nom) for nom in IMPORTS])] + self.steps
+        with timing.span(f"warmup.{self.name}"):
+            for nom, fonction in etapes:
+                t0 = time.perf_counter()
+                erreur = None
+                try:
+                    fonction()
+                except Exception as e:
+                    logger.exception("échauffement %s : étape %s en erreur", self.name, nom)
+                    erreur = f"{type(e).__name__}: {e}"
+                resultats[nom] = {"ms": round((time.perf_counter() - t0) * 1000, 1), "error": erreur}
+        with self._lock:
+            self.resultats = resultats
+            self.last_end = datetime.now()
+            self.passes += 1
+            self.running = False
+        return not any(r["error"] for r in resultats.values())
+
+    def _boucle(self):
+        self.run()
+        while True:
+            with self._lock:
+                self.next_run = prochaine(self.heures)
+            if self.next_run is None:
+                return
+            time.sleep(max(0.0, (self.next_run - datetime.now()).total_seconds()))
+            self.run()
+
+    def start(self):
+        threading.Thread(target=self._boucle, name=f"warmup-{self.name}", daemon=True).start()
+
+    def status(self) -> dict:
+        with self._lock:
+            duree = (self.last_end - self.last_start).total_seconds() if self.last_end and not self.running else None
+            return {
+                "ready": self.ready,
+                "running": self.running,
+                "passes": self.passes,
+                "last_start": _iso(self.last_start),
+                "last_duration_s": round(duree, 3) if duree is not None else None,
+                "next_run": _iso(self.next_run),
+                "steps": dict(self.resultats),
+                "errors": sum(1 for r in self.resultats.values() if r["error"]),
+            }
+
+
+_warmups = {}
+_warmups_lock = threading.Lock()
+
+
+def start(name: str, steps, heures: str = WARMUP_AT) -> Warmup:
+    """Lance l'échauffement de l'app `name` (une fois par processus)."""
+    with _warmups_lock:
+        warmup = _warmups.get(name)
+        if warmup is not None:
+            return warmup
+        warmup = _warmups[name] = Warmup(name, steps, horaires(heures))
+    if ENABLED:
+        warmup.start()
+    else:
+        lazy.prefetch(*IMPORTS)
+    return warmup
+
+
+def get_warmup(name: str):
+    return _warmups.get(name)
+
+
+def resume(name: str) -> str:
+    """État de l'échauffement de `name` en une phrase (panneaux admin)."""
+    w = get_warmup(name)
+    if w is None or not ENABLED:
+        return "Échauffement des caches : désactivé" if not ENABLED else "Échauffement des caches : pas encore lancé"
+    e = w.status()
+    if not e["ready"]:
+        return "Échauffement des caches : première passe en cours…"
+    texte = f"Échauffement des caches : prêt (dernière passe {e['last_start'][11:]}"
+    if e["last_duration_s"] is not None:
+        texte += f", {e['last_duration_s']:.1f} s"
+    texte += ")"
+    if e["errors"]:
+        texte += " ⚠️ " + ", ".join(f"{n} : {r['error']}" for n, r in e["steps"].items() if r["error"])
+    if e["next_run"]:
+        texte += f" · prochaine passe {e['next_run'].replace('T', ' ')}"
+    return texte
+
+
+def ready() -> bool:
+    """Vrai quand chaque échauffement lancé dans ce processus a fini sa première passe."""
+    if not ENABLED:
+        return True
+    with _warmups_lock:
+        warmups = list(_warmups.values())
+    return all(w.ready for w in warmups)
+
+
+def status() -> dict:
+    """État de préparation du processus, détaillé par app."""
+    with _warmups_lock:
+        warmups = dict(_warmups)
+    return {
+        "ready": ready(),
+        "enabled": ENABLED,
+        "warmups": {name: w.status() for name, w in sorted(warmups.items())},
+    }
@@ -0,0 +1,378 @@
+"""
+Écriture différée (write-behind) des swipes des apps Tinder.
+
+Un swipe est d'abord ajouté à un journal de reprise (une ligne JSON, fsync
+selon `TINDER_SWIPES_FSYNC`) et gardé en mémoire ; un thread par processus
+l'écrit ensuite dans le stockage, par lots, toutes les `TINDER_FLUSH_MS`
+millisecondes ou dès `TINDER_FLUSH_BATCH` swipes en attente. Les lectures
+des stores enveloppés superposent les swipes en attente au stockage : un
+swipe est visible (matchs, likers...) dès qu'il est accepté.
+
+Au démarrage, les journaux laissés par un processus arrêté brutalement sont
+rejoués dans le stockage avant toute écriture nouvelle : un swipe accepté
+n'est jamais perdu (au pire écrit deux fois si l'arrêt tombe entre
+l'écriture d'un lot et l'effacement de son journal). Chaque file garde, tant
+que son processus vit, un verrou sur `<pid>.owner` : seuls les segments dont
+le propriétaire ne tient plus ce verrou sont repris, ceux des autres
+serveurs encore actifs sur le même dossier de données ne sont pas touchés.
+
+Désactivé par défaut : `TINDER_WRITE_BEHIND=1` pour l'activer.
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from dejeuner import locking
+from dejeuner.journal import FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_POLICIES
+from dejeuner.lazy import lazy_import
+from dejeuner.storage import SWIPES_COLUMNS, SWIPES_FSYNC, get_lunch_tinder_store, get_storage
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND = os.environ.get("TINDER_WRITE_BEHIND", "0").lower() in ("1", "true", "yes", "on")
+FLUSH_MS = int(os.environ.get("TINDER_FLUSH_MS", "200"))
+FLUSH_BATCH = int(os.environ.get("TINDER_FLUSH_BATCH", "100"))
+JOURNAL_DIRNAME = "write_behind"
+_SEGMENTS = itertools.count()  # numéros de segment uniques dans le processus
+
+
+class WriteBehindQueue:
+    """
+    File d'attente d'enregistrements (dicts JSON) vidée par lots dans
+    `flush(records)` par un thread d'arrière-plan.
+    """
+
+    def __init__(self, flush, journal_dir: str, interval_ms: int = FLUSH_MS, max_batch: int = FLUSH_BATCH,
+                 fsync: str = FSYNC_ALWAYS, fsync_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync!r} (attendu: {FSYNC_POLICIES})")
+        self._flush = flush
+        self.journal_dir = journal_dir
+        self.interval = interval_ms / 1000
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+
+        self._buffer = []       # acceptés, pas encore pris par un lot
+        self._en_cours = []     # lot en cours d'écriture
+        self._lock = threading.Lock()       # buffer + journal courant
+        self._io_lock = threading.RLock()   # écriture d'un lot / lecture cohérente
+        self._reveil = threading.Event()
+        self._arret = threading.Event()
+        self.accepted = 0
+        self.flushed = 0
+        self.batches = 0
+
+        os.makedirs(journal_dir, exist_ok=True)
+        with locking.file_lock(os.path.join(journal_dir, "recover")):
+            self._recover()
+            # Pris après la reprise : les segments d'un processus mort au même pid sont repris
+            self._owner = locking.try_lock(self._owner_path(os.getpid()))
+        self._journal_path = None
+        self._journal = None
+        self._ouvrir_segment()
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------
+    # Journal de reprise
+    # ------------------------------
+
+    def _ouvrir_segment(self):
+        self._journal_path = os.path.join(self.journal_dir, f"{os.getpid()}-{next(_SEGMENTS)}.jsonl")
+        self._journal = open(self._journal_path, "ab")
+
+    def _owner_path(self, pid) -> str:
+        return os.path.join(self.journal_dir, f"{pid}.owner")
+
+    def _recover(self):
+        """Rejoue les journaux laissés par un arrêt brutal (processus propriétaire disparu)."""
+        par_pid = {}
+        for name in sorted(os.listdir(self.journal_dir)):
+            if name.endswith(".jsonl"):
+                par_pid.setdefault(name.split("-", 1)[0], []).append(name)
+        for pid, names in par_pid.items():
+            owner = locking.try_lock(self._owner_path(pid))
+            if owner is None:
+                continue  # processus encore actif : ses segments sont à lui
+            try:
+                for name in names:
+                    path = os.path.join(self.journal_dir, name)
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    # Une dernière ligne incomplète n'a jamais été acquittée
+                    records = [json.loads(line) for line in data[: data.rfind(b"\n") + 1].splitlines() if line.strip()]
+                    if records:
+                        self._flush(records)
+                        logger.info("write-behind : %d swipes repris depuis %s", len(records), name)
+                    os.remove(path)
+            finally:
+                owner.close()
+            _effacer(self._owner_path(pid) + locking.LOCK_SUFFIX)
+
+    # ------------------------------
+    # API
+    # ------------------------------
+
+    def submit(self, record: dict):
+        """Accepte un enregistrement : journalisé, visible tout de suite, écrit plus tard."""
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync == FSYNC_ALWAYS or (
+                self.fsync == FSYNC_INTERVAL and time.monotonic() - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._journal.fileno())
+                self._last_fsync = time.monotonic()
+            self._buffer.append(record)
+            self.accepted += 1
+            plein = len(self._buffer) >= self.max_batch
+        if plein:
+            self._reveil.set()
+
+    def pending(self) -> list:
+        """Enregistrements acceptés mais pas encore dans le stockage, dans l'ordre."""
+        with self._lock:
+            return self._en_cours + self._buffer
+
+    def consistent(self):
+        """
+        Verrou à prendre autour de « lire le stockage + superposer pending() » :
+        aucun lot ne peut passer du buffer au stockage pendant la lecture.
+        """
+        return self._io_lock
+
+    def flush(self):
+        """Écrit tout de suite ce qui est en attente (appelé aussi par le thread)."""
+        with self._io_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                self._en_cours, self._buffer = self._buffer, []
+                self._journal.close()
+                a_effacer = self._journal_path
+                self._ouvrir_segment()
+            try:
+                self._flush(list(self._en_cours))
+            except Exception:
+                # On remet le lot en tête : il sera retenté au prochain passage
+                logger.exception("write-behind : échec d'écriture d'un lot, nouvel essai plus tard")
+                with self._lock:
+                    self._buffer = self._en_cours + self._buffer
+                    self._en_cours = []
+                # Le journal du lot est gardé tant que le lot n'est pas écrit
+                return
+            with self._lock:
+                self.flushed += len(self._en_cours)
+                self.batches += 1
+                self._en_cours = []
+            os.remove(a_effacer)
+            self._purger_segments()
+
+    def _purger_segments(self):
+        """Efface les segments de ce processus dont tout le contenu est écrit."""
+        with self._lock:
+            if self._buffer or self._en_cours:
+                return
+            courant = self._journal_path
+        prefixe = f"{os.getpid()}-"
+        for name in os.listdir(self.journal_dir):
+            path = os.path.join(self.journal_dir, name)
+            if name.startswith(prefixe) and name.endswith(".jsonl") and path != courant:
+                os.remove(path)
+
+    def _run(self):
+        while not self._arret.is_set():
+            self._reveil.wait(self.interval)
+            self._reveil.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("write-behind : erreur inattendue")
+
+    def close(self):
+        """Arrête le thread après un dernier flush."""
+        if self._arret.is_set():
+            return
+        self._arret.set()
+        self._reveil.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._lock:
+            self._journal.close()
+            vide = not self._buffer and not self._en_cours
+        if vide:
+            os.remove(self._journal_path)
+            if self._owner is not None:
+                self._owner.close()
+                self._owner = None
+                _effacer(self._owner_path(os.getpid()) + locking.LOCK_SUFFIX)
+
+
+def _effacer(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ==============================
+# Stores enveloppés
+# ==============================
+
+class WriteBehindStorage:
+    """Storage de app_tinder_resto (voir dejeuner.storage) dont les swipes sont différés."""
+
+    def __init__(self, storage, journal_dir: str, **options):
+        self.storage = storage
+        self.queue = WriteBehindQueue(storage.append_swipes, journal_dir, fsync=SWIPES_FSYNC, **options)
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def version(self, table: str) -> int:
+        # Les swipes acceptés comptent comme des écritures (ils sont déjà visibles)
+        return self.storage.version(table) + (self.queue.accepted if table == "swipes" else 0)
+
+    def append_swipe(self, row: dict):
+        self.queue.submit({c: row.get(c) for c in SWIPES_COLUMNS})
+
+    def load_swipes(self, day: str = None) -> pd.DataFrame:
+        with self.queue.consistent():
+            df = self.storage.load_swipes(day)
+            pending = [r for r in self.queue.pending() if day is None or r.get("date") == day]
+        if not pending:
+            return df
+        return pd.concat([df, pd.DataFrame(pending, columns=SWIPES_COLUMNS, dtype=object)], ignore_index=True)
+
+    # Les opérations qui réécrivent l'historique voient d'abord tout ce qui est en attente
+    def save_swipes(self, df: pd.DataFrame):
+        self.queue.flush()
+        self.storage.save_swipes(df)
+
+    def delete_swipes(self, day: str = None, user_id: str = None):
+        self.queue.flush()
+        self.storage.delete_swipes(day=day, user_id=user_id)
+
+    def pop_last_swipe(self, day: str, user_id: str):
+        self.queue.flush()
+        self.storage.pop_last_swipe(day, user_id)
+
+
+class WriteBehindLunchTinderStore:
+    """Store de Lunch Tinder (app_tinder_resto_v2) dont les swipes sont différés."""
+
+    def __init__(self, store, journal_dir: str, **options):
+        self.store = store
+        self.queue = WriteBehindQueue(self._flush, journal_dir, fsync=SWIPES_FSYNC, **options)
+
+    def _flush(self, records):
+        self.store.add_swipes([(r["date"], r["user"], r["restaurant"], r["liked"]) for r in records])
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def version(self, table: str) -> int:
+        return self.store.version(table) + (self.queue.accepted if table == "swipes" else 0)
+
+    def add_swipe(self, day: str, username: str, restaurant: str, liked: bool):
+        self.queue.submit({"date": day, "user": username, "restaurant": restaurant, "liked": bool(liked)})
+
+    def _pending(self, day: str):
+        return [r for r in self.queue.pending() if r["date"] == day]
+
+    def swipes_for_day(self, day: str) -> dict:
+        with self.queue.consistent():
+            day_swipes = self.store.swipes_for_day(day)
+            pending = self._pending(day)
+        for r in pending:
+            day_swipes.setdefault(r["user"], {})[r["restaurant"]] = r["liked"]
+        return day_swipes
+
+    def user_swipes(self, day: str, username: str) -> dict:
+        with self.queue.consistent():
+            swipes = self.store.user_swipes(day, username)
+            pending = self._pending(day)
+        for r in pending:
+            if r["user"] == username:
+                swipes[r["restaurant"]] = r["liked"]
+        return swipes
+
+    def likers(self, day: str, restaurant: str):
+        with self.queue.consistent():
+            likers = dict.fromkeys(self.store.likers(day, restaurant))
+            pending = self._pending(day)
+        for r in pending:
+            if r["restaurant"] == restaurant:
+                if r["liked"]:
+                    likers[r["user"]] = None
+                else:
+                    likers.pop(r["user"], None)
+        return list(likers)
+
+    def matches(self, day: str, username: str, restaurant: str):
+        others = [u for u in self.likers(day, restaurant) if u != username]
+        return list(self.display_names(others).values())
+
+    def load_swipes(self) -> dict:
+        self.queue.flush()
+        return self.store.load_swipes()
+
+    def save_swipes(self, swipes: dict):
+        self.queue.flush()
+        self.store.save_swipes(swipes)
+
+
+# ==============================
+# Registre par processus
+# ==============================
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_swipe_storage(data_dir: str, backend: str = None):
+    """`get_storage(data_dir)`, avec swipes différés si TINDER_WRITE_BEHIND est activé."""
+    storage = get_storage(data_dir, backend)
+    if not WRITE_BEHIND:
+        return storage
+    with _STORES_LOCK:
+        wrapped = _STORES.get(id(storage))
+        if wrapped is None:
+            wrapped = WriteBehindStorage(storage, os.path.join(data_dir, JOURNAL_DIRNAME, "tinder_swipes"))
+            _STORES[id(storage)] = wrapped
+        return wrapped
+
+
+def get_swipe_lunch_tinder_store(data_dir: str, backend: str = None):
+    """`get_lunch_tinder_store(data_dir)`, avec swipes différés si TINDER_WRITE_BEHIND est activé."""
+    store = get_lunch_tinder_store(data_dir, backend)
+    if not WRITE_BEHIND:
+        return store
+    with _STORES_LOCK:
+        wrapped = _STORES.get(id(store))
+        if wrapped is None:
+            wrapped = WriteBehindLunchTinderStore(store, os.path.join(data_dir, JOURNAL_DIRNAME, "swipes"))
+            _STORES[id(store)] = wrapped
+        return wrapped
+
+
+def close_all():
+    """Vide et arrête toutes les files du processus (fin de process sans atexit, benchmarks)."""
+    with _STORES_LOCK:
+        wrapped = list(_STORES.values())
+    for w in wrapped:
+        w.queue.close()
@@ -0,0 +1,89 @@
+import pandas as pd
+
+from dejeuner.archives import MonthlyArchive
+from dejeuner.partitions import DayPartitionedTable
+
+COLONNES = ["date", "user_id", "restaurant"]
+
+
+def _archive(tmp_path):
+    archive = MonthlyArchive(str(tmp_path / "archives"))
+    archive.add([
+        {"date": "2024-01-30", "user_id": "alice", "restaurant": "Pho"},
+        {"date": "2024-01-30", "user_id": "bob", "restaurant": "Sushi"},
+        {"date": "2024-01-31", "user_id": "alice", "restaurant": "Bobun"},
+        {"date": "2024-02-01", "user_id": "alice", "restaurant": "Pizza"},
+    ])
+    return archive
+
+
+def test_filter_d_un_jour(tmp_path):
+    archive = _archive(tmp_path)
+    archive.filter(lambda r: r["user_id"] != "alice", day="2024-01-30")
+
+    assert [r["user_id"] for r in archive.read_day("2024-01-30")] == ["bob"]
+    # Les autres jours du mois ne sont pas touchés
+    assert [r["restaurant"] for r in archive.read_day("2024-01-31")] == ["Bobun"]
+    assert archive.days() == ["2024-01-30", "2024-01-31", "2024-02-01"]
+
+
+def test_filter_de_tous_les_jours(tmp_path):
+    archive = _archive(tmp_path)
+    archive.filter(lambda r: r["user_id"] != "alice")
+
+    assert archive.days() == ["2024-01-30"]
+    assert [r["user_id"] for r in archive.read_all()] == ["bob"]
+
+
+def test_drop_day(tmp_path):
+    archive = _archive(tmp_path)
+    version = archive.version()
+    archive.drop_day("2024-01-31")
+
+    assert "2024-01-31" not in archive
+    assert archive.read_day("2024-01-31") == []
+    assert archive.days() == ["2024-01-30", "2024-02-01"]
+    assert archive.version() != version
+
+
+def _table(tmp_path):
+    table = DayPartitionedTable(str(tmp_path / "tops"), COLONNES, archive_root=str(tmp_path / "archives"))
+    table.append_many([
+        {"date": "2024-01-30", "user_id": "alice", "restaurant": "Pho"},
+        {"date": "2024-01-30", "user_id": "bob", "restaurant": "Sushi"},
+        {"date": "2024-02-10", "user_id": "alice", "restaurant": "Pizza"},
+    ])
+    assert table.compact("2024-02-01") == ["2024-01-30"]
+    return table
+
+
+def test_table_lit_archives_et_partitions(tmp_path):
+    table = _table(tmp_path)
+    assert table.hot_days() == ["2024-02-10"]
+    assert table.days() == ["2024-01-30", "2024-02-10"]
+    assert table.read("2024-01-30")["user_id"].tolist() == ["alice", "bob"]
+    assert len(table.read()) == 3
+
+
+def test_write_day_vide_garde_l_archive(tmp_path):
+    table = _table(tmp_path)
+    # Une partition chaude vidée pour un jour archivé : l'archive reste
+    table.append({"date": "2024-01-30", "user_id": "carol", "restaurant": "Bobun"})
+    table.write_day("2024-01-30", pd.DataFrame(columns=COLONNES))
+    assert table.read("2024-01-30")["user_id"].tolist() == ["alice", "bob"]
+
+
+def test_drop_day_supprime_l_archive(tmp_path):
+    table = _table(tmp_path)
+    table.drop_day("2024-01-30")
+    assert table.read("2024-01-30").empty
+    assert table.days() == ["2024-02-10"]
+
+
+def test_delete_where_d_un_jour(tmp_path):
+    table = _table(tmp_path)
+    table.append({"date": "2024-02-10", "user_id": "bob", "restaurant": "Pho"})
+    table.delete_where("user_id", "alice", day="2024-01-30")
+
+    assert table.read("2024-01-30")["user_id"].tolist() == ["bob"]
+    assert table.read("2024-02-10")["user_id"].tolist() == ["alice", "bob"]
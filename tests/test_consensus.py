@@ -0,0 +1,68 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from dejeuner.consensus import agreger, matrice_duels
+
+CANDIDATS = "ABCDE"
+
+
+def _bulletins(profil, candidats):
+    """Bulletins (votants × candidats) à partir de [(nombre, "ordre du premier au dernier")]."""
+    lignes = []
+    for nombre, ordre in profil:
+        ligne = [len(candidats) - ordre.index(c) for c in candidats]
+        lignes += [ligne] * nombre
+    return np.array(lignes, dtype=np.float32)
+
+
+def _ordre(methode, profil, candidats):
+    df = agreger(methode, np.array(list(candidats), dtype=object), _bulletins(profil, candidats))
+    return "".join(df["Restaurant"])
+
+
+# Exemple classique de la méthode de Schulze (45 votants, 5 candidats)
+SCHULZE = [
+    (5, "ACBED"), (5, "ADECB"), (8, "BEDAC"), (3, "CABED"),
+    (7, "CAEBD"), (2, "CBADE"), (7, "DCEBA"), (8, "EBADC"),
+]
+
+# Capitale du Tennessee (en %) : Memphis, Nashville, Chattanooga, Knoxville
+TENNESSEE = [(42, "MNCK"), (26, "NCKM"), (15, "CKNM"), (17, "KCNM")]
+
+
+def test_matrice_duels():
+    duels = matrice_duels(_bulletins(SCHULZE, CANDIDATS))
+    assert duels[0, 1] == 20 and duels[1, 0] == 25  # B bat A en duel
+    assert (np.diag(duels) == 0).all()
+    assert (duels + duels.T)[~np.eye(5, dtype=bool)].tolist() == [45] * 20
+
+
+def test_schulze():
+    df = agreger("schulze", np.array(list(CANDIDATS), dtype=object), _bulletins(SCHULZE, CANDIDATS))
+    assert "".join(df["Restaurant"]) == "EACBD"
+    assert df["Score"].tolist() == [4, 3, 2, 1, 0]
+
+
+def test_schulze_et_kemeny_condorcet():
+    # Nashville bat chacun des autres en duel
+    assert _ordre("schulze", TENNESSEE, "MNCK") == "NCKM"
+    assert _ordre("kemeny", TENNESSEE, "MNCK") == "NCKM"
+
+
+def test_kemeny_optimum_sur_un_petit_profil():
+    # Cycle A > B > C > A : l'optimum de Kemeny casse le duel le plus serré (C > A, 5 contre 4)
+    profil = [(4, "ABC"), (3, "BCA"), (2, "CAB")]
+    duels = matrice_duels(_bulletins(profil, "ABC"))
+
+    def desaccords(ordre):
+        return sum(duels["ABC".index(b), "ABC".index(a)] for i, a in enumerate(ordre) for b in ordre[i + 1 :])
+
+    assert _ordre("kemeny", profil, "ABC") == "ABC"
+    assert desaccords("ABC") == min(desaccords("".join(p)) for p in permutations("ABC"))
+
+
+def test_methode_inconnue():
+    with pytest.raises(ValueError):
+        agreger("plurality", np.array(["A"], dtype=object), np.ones((1, 1), dtype=np.float32))
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from dejeuner.restaurants import IdCodec, RestaurantRegistry
+
+
+def _registre(tmp_path):
+    return RestaurantRegistry(str(tmp_path / "restaurants.json"))
+
+
+def _contenu(registry):
+    with open(registry.path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_noms_vides_encodes_manquants(tmp_path):
+    registry = _registre(tmp_path)
+    assert registry.ids(["A", "", None, "  ", float("nan"), "B"]).tolist() == [0, -1, -1, -1, -1, 1]
+    assert [e["nom"] for e in _contenu(registry)["restaurants"]] == ["A", "B"]
+
+
+def test_encode_decode_aller_retour(tmp_path):
+    codec = IdCodec(_registre(tmp_path), ["Restau_1", "Restau_2"])
+    df = pd.DataFrame({"date": ["2024-03-01", "2024-03-01"], "Restau_1": ["Pho", "Bobun"], "Restau_2": ["Bobun", ""]})
+
+    encode = codec.encode_frame(df)
+    assert list(encode.columns) == ["date", "Restau_1_id", "Restau_2_id"]
+    assert encode["Restau_1_id"].tolist() == [0, 1]
+    assert encode["Restau_2_id"].isna().tolist() == [False, True]
+
+    decode = codec.decode_frame(encode.astype(object), order=["date", "Restau_1", "Restau_2"])
+    assert list(decode.columns) == ["date", "Restau_1", "Restau_2"]
+    assert decode["Restau_1"].tolist() == ["Pho", "Bobun"]
+    assert decode["Restau_2"].iloc[0] == "Bobun" and pd.isna(decode["Restau_2"].iloc[1])
+
+
+def test_decode_apres_renommage(tmp_path):
+    registry = _registre(tmp_path)
+    codec = IdCodec(registry, ["restaurant"])
+    records = codec.encode_records([{"restaurant": "Pho"}, {"restaurant": "Sushi"}])
+    registry.rename("Pho", "Pho 2")
+
+    df = pd.DataFrame(records).drop(columns="restaurant")
+    assert codec.decode_frame(df)["restaurant"].tolist() == ["Pho 2", "Sushi"]
+    assert registry.ids(["Pho"]).tolist() == [0]  # l'ancien nom reste un alias
+
+
+def test_decode_ne_modifie_pas_le_registre(tmp_path):
+    registry = _registre(tmp_path)
+    registry.ids(["Pho"])
+    avant = _contenu(registry)
+    codec = IdCodec(registry, ["restaurant"])
+    # Ancien fichier : noms en clair, sans id
+    df = pd.DataFrame({"restaurant": ["Pho", "Inconnu", None], "restaurant_id": [None, None, None]})
+
+    assert codec.decode_frame(df)["restaurant"].tolist()[:2] == ["Pho", "Inconnu"]
+    assert _contenu(registry) == avant
+
+
+def test_connus_lecture_seule(tmp_path):
+    registry = _registre(tmp_path)
+    registry.ids(["Pho"])
+    assert registry.connus(["Pho", "Inconnu", "#7", "", None]).tolist() == [0, -1, 7, -1, -1]
+    assert [e["nom"] for e in _contenu(registry)["restaurants"]] == ["Pho"]
+    # Un `#<id>` n'est jamais enregistré comme un nouveau nom
+    assert registry.ids(["#7"]).tolist() == [7]
+    assert [e["nom"] for e in _contenu(registry)["restaurants"]] == ["Pho"]
+
+
+def test_noms_ids_inconnus(tmp_path):
+    registry = _registre(tmp_path)
+    registry.ids(["Pho"])
+    noms = registry.noms(np.array([0, -1, 42]))
+    assert noms[0] == "Pho" and pd.isna(noms[1]) and pd.isna(noms[2])
@@ -0,0 +1,73 @@
+import json
+import os
+
+from dejeuner import locking
+from dejeuner.writebehind import WriteBehindQueue
+
+PID_MORT = 999_999_999  # pid d'un serveur arrêté brutalement
+
+
+def _segment(journal_dir, nom, records, fin=b""):
+    os.makedirs(journal_dir, exist_ok=True)
+    with open(os.path.join(journal_dir, nom), "wb") as f:
+        f.write(b"".join(json.dumps(r).encode("utf-8") + b"\n" for r in records) + fin)
+
+
+def _file(journal_dir, ecrits):
+    return WriteBehindQueue(ecrits.extend, journal_dir, interval_ms=10_000)
+
+
+def test_reprise_des_segments_d_un_processus_mort(tmp_path):
+    journal_dir = str(tmp_path / "write_behind")
+    _segment(journal_dir, f"{PID_MORT}-0.jsonl", [{"n": 1}, {"n": 2}])
+    # La dernière ligne, incomplète, n'a jamais été acquittée
+    _segment(journal_dir, f"{PID_MORT}-1.jsonl", [{"n": 3}], fin=b'{"n": 4')
+
+    ecrits = []
+    queue = _file(journal_dir, ecrits)
+    try:
+        assert ecrits == [{"n": 1}, {"n": 2}, {"n": 3}]
+        assert not [n for n in os.listdir(journal_dir) if n.startswith(f"{PID_MORT}-")]
+    finally:
+        queue.close()
+
+
+def test_segments_d_un_processus_actif_ignores(tmp_path):
+    journal_dir = str(tmp_path / "write_behind")
+    _segment(journal_dir, f"{PID_MORT}-0.jsonl", [{"n": 1}])
+    # Un autre serveur, toujours actif, tient le verrou de son propriétaire
+    owner = locking.try_lock(os.path.join(journal_dir, f"{PID_MORT}.owner"))
+    ecrits = []
+    try:
+        _file(journal_dir, ecrits).close()
+        assert ecrits == []
+        assert os.path.exists(os.path.join(journal_dir, f"{PID_MORT}-0.jsonl"))
+    finally:
+        owner.close()
+
+    # Une fois ce serveur arrêté, le démarrage suivant reprend ses swipes
+    _file(journal_dir, ecrits).close()
+    assert ecrits == [{"n": 1}]
+
+
+def test_submit_visible_puis_ecrit(tmp_path):
+    ecrits = []
+    queue = _file(str(tmp_path / "write_behind"), ecrits)
+    try:
+        queue.submit({"n": 1})
+        queue.submit({"n": 2})
+        assert queue.pending() == [{"n": 1}, {"n": 2}]
+        queue.flush()
+        assert ecrits == [{"n": 1}, {"n": 2}]
+        assert queue.pending() == []
+    finally:
+        queue.close()
+    assert [n for n in os.listdir(tmp_path / "write_behind") if n.endswith(".jsonl")] == []
+
+
+def test_close_ecrit_le_reste(tmp_path):
+    ecrits = []
+    queue = _file(str(tmp_path / "write_behind"), ecrits)
+    queue.submit({"n": 1})
+    queue.close()
+    assert ecrits == [{"n": 1}]